@@ -1,11 +1,14 @@
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery } from '@tanstack/react-query';
 import { queryKeys } from '@/lib/query-keys';
-import { requestHistoryApi, type RedemptionRequestResponse, type PaginatedResponse } from '@/lib/api';
+import { requestHistoryApi, HISTORY_MAX_PAGE_SIZE } from '@/lib/api';
 
 export function useRequestHistory(refetchInterval: number | false = 30_000) {
-  return useQuery<PaginatedResponse<RedemptionRequestResponse>>({
+  return useInfiniteQuery({
     queryKey: queryKeys.requests.history,
-    queryFn: () => requestHistoryApi.getProcessedRequests(),
+    queryFn: ({ pageParam }) =>
+      requestHistoryApi.getProcessedRequests({ cursor: pageParam, page_size: HISTORY_MAX_PAGE_SIZE }),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
     refetchInterval,
   });
 }
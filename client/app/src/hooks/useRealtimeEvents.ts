@@ -18,6 +18,15 @@ type SSEEventType =
   | "items_processed"
   | "ar_uploaded";
 
+/**
+ * Sent instead of queued events when this connection fell too far behind;
+ * the client should simply refetch.
+ */
+interface SSEResyncEvent {
+  type: "resync";
+  timestamp: number;
+}
+
 interface SSEEvent {
   type: SSEEventType;
   timestamp: number;
@@ -72,11 +81,14 @@ export function useRealtimeEvents() {
 
     es.onmessage = (event) => {
       try {
-        const data: SSEEvent = JSON.parse(event.data);
+        const data: SSEEvent | SSEResyncEvent = JSON.parse(event.data);
 
         // Invalidate relevant queries
         invalidateRequestQueries();
 
+        // Missed events were dropped server-side; the refetch above covers them
+        if (data.type === "resync") return;
+
         // Show a toast notification
         const label = EVENT_LABELS[data.type] || data.type;
         const detail = data.request_id ? ` #${data.request_id}` : "";
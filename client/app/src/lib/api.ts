@@ -9,6 +9,13 @@ export interface PaginatedResponse<T> {
   results: T[];
 }
 
+/** One keyset page from the request history endpoints (newest first, no count). */
+export interface CursorPage<T> {
+  next: string | null;
+  next_cursor: string | null;
+  results: T[];
+}
+
 
 
 const API_BASE_URL = API_URL;
@@ -691,56 +698,74 @@ export const handlerRequestsApi = {
   /**
    * Get the handler user's history of processed requests.
    * Shows all requests where the current user has processed items.
+   * The endpoint is cursor-paginated; this follows `next_cursor` until the last page.
    */
   async getHistory(): Promise<RedemptionRequestResponse[]> {
-    const response = await fetch(`${API_BASE_URL}/redemption-requests/handler-history/`, {
-      method: 'GET',
-      headers: { 'Content-Type': 'application/json' },
-      credentials: 'include',
-    });
+    const rows: RedemptionRequestResponse[] = [];
+    let cursor: string | null = null;
+    do {
+      const page: CursorPage<RedemptionRequestResponse> = await fetchHistoryPage(
+        'handler-history',
+        { cursor, page_size: HISTORY_MAX_PAGE_SIZE },
+        'Failed to fetch handler history',
+      );
+      rows.push(...page.results);
+      cursor = page.next_cursor;
+    } while (cursor);
+    return rows;
+  },
+};
 
-    if (!response.ok) {
-      const errorData = await response.json().catch(() => ({}));
-      throw new Error(errorData.error || 'Failed to fetch handler history');
+// Largest page the history endpoints serve
+export const HISTORY_MAX_PAGE_SIZE = 100;
+
+export interface RequestHistoryParams {
+  cursor?: string | null;
+  page_size?: number;
+  status?: string;
+  processing_status?: string;
+  team_id?: number;
+  date_from?: string;
+  date_to?: string;
+}
+
+async function fetchHistoryPage(
+  endpoint: 'history' | 'handler-history',
+  params: RequestHistoryParams | undefined,
+  errorMessage: string,
+): Promise<CursorPage<RedemptionRequestResponse>> {
+  const queryParams = new URLSearchParams();
+  Object.entries(params ?? {}).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') {
+      queryParams.append(key, String(value));
     }
+  });
 
-    return response.json();
-  },
-};
+  const qs = queryParams.toString();
+  const url = `${API_BASE_URL}/redemption-requests/${endpoint}/${qs ? '?' + qs : ''}`;
+
+  const response = await fetch(url, {
+    method: 'GET',
+    headers: { 'Content-Type': 'application/json' },
+    credentials: 'include',
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.error || errorMessage);
+  }
+
+  return response.json();
+}
 
 // Request History API - Admin only, shows all processed requests
 export const requestHistoryApi = {
   /**
-   * Get all processed redemption requests (Admin only).
-   * Returns all requests with processing_status='PROCESSED' regardless of assignment.
+   * Get one page of processed redemption requests (Admin only), newest first.
+   * Pass the previous page's `next_cursor` as `cursor` to fetch older requests.
    */
-  async getProcessedRequests(params?: {
-    page?: number;
-    page_size?: number;
-    search?: string;
-    ordering?: string;
-  }): Promise<PaginatedResponse<RedemptionRequestResponse>> {
-    const queryParams = new URLSearchParams();
-    if (params?.page) queryParams.append('page', params.page.toString());
-    if (params?.page_size) queryParams.append('page_size', params.page_size.toString());
-    if (params?.search) queryParams.append('search', params.search);
-    if (params?.ordering) queryParams.append('ordering', params.ordering);
-
-    const qs = queryParams.toString();
-    const url = `${API_BASE_URL}/redemption-requests/history/${qs ? '?' + qs : ''}`;
-
-    const response = await fetch(url, {
-      method: 'GET',
-      headers: { 'Content-Type': 'application/json' },
-      credentials: 'include',
-    });
-
-    if (!response.ok) {
-      const errorData = await response.json().catch(() => ({}));
-      throw new Error(errorData.error || 'Failed to fetch processed requests');
-    }
-
-    return response.json();
+  async getProcessedRequests(params?: RequestHistoryParams): Promise<CursorPage<RedemptionRequestResponse>> {
+    return fetchHistoryPage('history', params, 'Failed to fetch processed requests');
   },
 };
 
@@ -1,5 +1,5 @@
 import { useState, useEffect, useCallback } from "react";
-import { requestHistoryApi } from "@/lib/api";
+import { requestHistoryApi, HISTORY_MAX_PAGE_SIZE } from "@/lib/api";
 import { Input } from "@/components/ui/input";
 import {
   Search,
@@ -22,6 +22,9 @@ function RequestHistory() {  const [currentPage, setCurrentPage] = useState(1);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  // Cursor for the next (older) page; null once every page is loaded
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // Modal states
   const [showViewModal, setShowViewModal] = useState(false);
@@ -37,8 +40,17 @@ function RequestHistory() {  const [currentPage, setCurrentPage] = useState(1);
         setLoading(true);
       }
       setError(null);
-      const data = await requestHistoryApi.getProcessedRequests();
-      setRequests(data as unknown as RequestHistoryItem[]);
+      const page = await requestHistoryApi.getProcessedRequests({ page_size: HISTORY_MAX_PAGE_SIZE });
+      const fresh = page.results as unknown as RequestHistoryItem[];
+      if (isRefresh) {
+        // Refresh the newest page in place and keep older pages already
+        // loaded; the existing cursor still points past the oldest of them
+        const freshIds = new Set(fresh.map((request) => request.id));
+        setRequests((prev) => [...fresh, ...prev.filter((request) => !freshIds.has(request.id))]);
+      } else {
+        setRequests(fresh);
+        setNextCursor(page.next_cursor);
+      }
     } catch (err) {
       console.error("Error fetching processed requests:", err);
       setError(
@@ -65,6 +77,38 @@ function RequestHistory() {  const [currentPage, setCurrentPage] = useState(1);
     fetchRequests();
   }, [fetchRequests]);
 
+  const loadOlderRequests = useCallback(async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const page = await requestHistoryApi.getProcessedRequests({
+        cursor: nextCursor,
+        page_size: HISTORY_MAX_PAGE_SIZE,
+      });
+      const older = page.results as unknown as RequestHistoryItem[];
+      setRequests((prev) => {
+        const loadedIds = new Set(prev.map((request) => request.id));
+        return [...prev, ...older.filter((request) => !loadedIds.has(request.id))];
+      });
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error("Error fetching older requests:", err);
+      toast.error("Failed to load older requests");
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [nextCursor, loadingMore]);
+
+  const loadOlderButton = nextCursor ? (
+    <button
+      onClick={loadOlderRequests}
+      disabled={loadingMore}
+      className="w-full mt-4 px-3 py-2 rounded-lg text-sm font-semibold transition-colors disabled:opacity-50 bg-card border border-border hover:bg-accent"
+    >
+      {loadingMore ? "Loading..." : "Load older requests"}
+    </button>
+  ) : null;
+
   const pageSize = 7;
   const filteredRequests = requests.filter((request) => {
     if (!searchQuery.trim()) return true;
@@ -131,6 +175,7 @@ function RequestHistory() {  const [currentPage, setCurrentPage] = useState(1);
                 onExport={() => setShowExportModal(true)}
                 fillHeight
               />
+              {loadOlderButton}
             </div>
           )}
         </div>
@@ -186,6 +231,7 @@ function RequestHistory() {  const [currentPage, setCurrentPage] = useState(1);
                 <ChevronRight className="h-4 w-4" />
               </button>
             </div>
+            {loadOlderButton}
           </div>
         </div>
       <ViewRequestModal
@@ -73,6 +73,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'utils.middleware.RequestTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -81,6 +82,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'utils.middleware.SlidingSessionMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -203,7 +205,14 @@ SESSION_COOKIE_NAME = 'sessionid'
 SESSION_COOKIE_SAMESITE = 'Lax'
 SESSION_COOKIE_PATH = '/'
 SESSION_COOKIE_AGE = config('SESSION_COOKIE_AGE', default=28800, cast=int)  # 8 hours
-SESSION_SAVE_EVERY_REQUEST = True  # sliding window: reset expiry on every request
+# Sliding window: utils.middleware.SlidingSessionMiddleware re-saves an
+# authenticated session (new expiry + cookie) only once its remaining lifetime
+# falls below SESSION_REFRESH_THRESHOLD seconds (default: 5 minutes into it)
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_THRESHOLD = config('SESSION_REFRESH_THRESHOLD', default=SESSION_COOKIE_AGE - 300, cast=int)
+# 'django.contrib.sessions.backends.cached_db' also serves reads from CACHES['default'];
+# the engine must keep django_session rows (users.UserSession references them)
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.db')
 CSRF_COOKIE_SECURE = config('CSRF_COOKIE_SECURE', default=False, cast=bool)
 CSRF_COOKIE_SAMESITE = 'Lax'
 
@@ -228,6 +237,55 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=EMAIL_HOST_USER)
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 TEST_EMAIL = config('TEST_EMAIL', default='')
 
+# Outbound email queue: email helpers write to the OutboundEmail outbox and
+# `python manage.py send_queued_emails` delivers them. Disable to send inline.
+EMAIL_OUTBOX_ENABLED = config('EMAIL_OUTBOX_ENABLED', default=True, cast=bool)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = config('EMAIL_OUTBOX_RETRY_BASE_SECONDS', default=60, cast=int)
+
+# Server-Sent Events fan-out: 'memory' (single worker) or 'postgres' (LISTEN/NOTIFY,
+# required when running more than one uvicorn worker)
+SSE_BACKEND = config('SSE_BACKEND', default='memory')
+SSE_PG_CHANNEL = config('SSE_PG_CHANNEL', default='sse_events')
+# Per-connection queue bound. When a slow client overflows it, events are either
+# coalesced by request_id ('coalesce') or replaced by a single 'resync' event ('resync')
+SSE_QUEUE_MAXSIZE = config('SSE_QUEUE_MAXSIZE', default=100, cast=int)
+SSE_QUEUE_OVERFLOW = config('SSE_QUEUE_OVERFLOW', default='coalesce')
+# Recent events kept per user so reconnecting clients can replay from Last-Event-ID (0 disables)
+SSE_REPLAY_BUFFER_SIZE = config('SSE_REPLAY_BUFFER_SIZE', default=50, cast=int)
+
+# Seconds a worker trusts its cached Admin/Approver/Handler directory (users.roles)
+# before reloading; profile saves in the same worker invalidate it immediately
+ROLE_DIRECTORY_TTL = config('ROLE_DIRECTORY_TTL', default=60, cast=int)
+
+# Dashboard analytics read from the daily rollup tables (requests.rollup); set
+# False to aggregate raw requests instead, e.g. while a rebuild is pending
+ANALYTICS_USE_ROLLUP = config('ANALYTICS_USE_ROLLUP', default=True, cast=bool)
+
+# Analytics responses are cached per view + query params and invalidated when a
+# request changes status (requests.analytics_cache). locmem is per worker; with
+# several workers point ANALYTICS_CACHE_BACKEND at
+# django.core.cache.backends.filebased.FileBasedCache and LOCATION at a shared directory
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'analytics': {
+        'BACKEND': config('ANALYTICS_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('ANALYTICS_CACHE_LOCATION', default='analytics'),
+        'TIMEOUT': config('ANALYTICS_CACHE_TIMEOUT', default=300, cast=int),
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
+# Per-request instrumentation (utils.middleware.RequestTimingMiddleware):
+# requests slower than SLOW_REQUEST_MS or issuing more than SLOW_REQUEST_QUERIES
+# queries are logged to 'request_timing'; REQUEST_TIMING_HEADER adds Server-Timing
+REQUEST_TIMING_ENABLED = config('REQUEST_TIMING_ENABLED', default=True, cast=bool)
+REQUEST_TIMING_HEADER = config('REQUEST_TIMING_HEADER', default=DEBUG, cast=bool)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=1000, cast=int)
+SLOW_REQUEST_QUERIES = config('SLOW_REQUEST_QUERIES', default=100, cast=int)
+
 # Logging configuration for debugging email issues
 LOGGING = {
     'version': 1,
@@ -260,5 +318,10 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'request_timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
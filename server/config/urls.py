@@ -35,7 +35,7 @@ from views import (
     ActivateAccountView,
 )
 from items_catalogue.views import ProductListCreateView, ProductDetailView, ProductUnarchiveView, InventoryListView, InventoryDetailView, BulkAssignHandlerView, BulkUpdateStockView, BatchUpdateStockView, StockAuditLogListView
-from utils.sse_views import sse_events_view
+from utils.sse_views import sse_events_view, SSEStatsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -77,6 +77,7 @@ urlpatterns = [
     path('api/cart/', include('cart.urls')),
     # SSE real-time events
     path('api/sse/events/', sse_events_view, name='sse_events'),
+    path('api/sse/stats/', SSEStatsView.as_view(), name='sse_stats'),
 ]
 
 # Serve static files only in development (production uses IIS/collectstatic)
@@ -0,0 +1,132 @@
+"""
+Management command to compare catalogue search latency on a synthetic catalogue.
+
+Seeds N synthetic products inside a transaction, times the legacy
+OR-of-icontains filter against items_catalogue.search.search_products for a
+set of search terms (one COUNT plus the first listing page, like the API),
+plus the inventory listing's narrower search, then rolls everything back. Nothing is left behind in the database.
+
+Usage:
+    python manage.py benchmark_catalogue_search                  # 50k products
+    python manage.py benchmark_catalogue_search --products 5000 --repeat 10
+    python manage.py benchmark_catalogue_search --terms "cap" "blue shirt" "SYN-0042"
+    python manage.py benchmark_catalogue_search --products 50000 --explain   # also print query plans
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from items_catalogue.models import Product, ItemLegend
+from items_catalogue.search import INVENTORY_FIELDS, search_products, full_text_search_enabled
+
+ADJECTIVES = ['Blue', 'Red', 'Premium', 'Classic', 'Compact', 'Heavy Duty', 'Eco', 'Deluxe', 'Mini', 'Waterproof']
+NOUNS = ['Cap', 'Shirt', 'Umbrella', 'Tumbler', 'Notebook', 'Jacket', 'Tote Bag', 'Power Bank', 'Pen', 'Banner']
+CATEGORIES = ['Apparel', 'Drinkware', 'Office', 'Outdoor', 'Electronics', 'Signage']
+SIZES = ['Small', 'Medium', 'Large', 'XL']
+
+DEFAULT_TERMS = ['cap', 'blue shirt', 'waterproof', 'SYN-00042', 'drinkware', 'nonexistent']
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Benchmark catalogue search (icontains vs full-text) on a synthetic catalogue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=50000, help="Synthetic products to seed")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per term and strategy")
+        parser.add_argument("--terms", nargs="+", default=DEFAULT_TERMS, help="Search terms to time")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic data")
+        parser.add_argument("--explain", action="store_true", help="Print the query plan of each search")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        with transaction.atomic():
+            self._seed(options["products"], rng)
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE items_catalogue_product")
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n=== Catalogue search benchmark: {options['products']:,} products, "
+                f"{connection.vendor}, full-text={'on' if full_text_search_enabled() else 'off'} ===\n"
+            ))
+            self.stdout.write(f"{'term':<16} {'strategy':<10} {'matches':>8} {'p50 ms':>9} {'p95 ms':>9}")
+
+            strategies = (("icontains", self._legacy), ("search", self._current), ("inventory", self._inventory))
+            plans = []
+            for term in options["terms"]:
+                for label, build in strategies:
+                    qs = build(term)
+                    matches = qs.count()
+                    samples = [self._time_page(build, term) for _ in range(options["repeat"])]
+                    self.stdout.write(
+                        f"{term[:16]:<16} {label:<10} {matches:>8} "
+                        f"{_percentile(samples, 50):>9.2f} {_percentile(samples, 95):>9.2f}"
+                    )
+                    if options["explain"]:
+                        plans.append((term, label, qs.explain()))
+
+            for term, label, plan in plans:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n--- {label}: {term!r} ---"))
+                self.stdout.write(plan)
+
+            # Discard the synthetic catalogue
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("\nDone (synthetic products rolled back)"))
+
+    def _seed(self, count, rng):
+        legends = [choice for choice, _ in ItemLegend.choices]
+        batch = []
+        for i in range(count):
+            noun = rng.choice(NOUNS)
+            batch.append(Product(
+                item_code=f"SYN-{i:05d}",
+                item_name=f"{rng.choice(ADJECTIVES)} {noun} - {rng.choice(SIZES)}",
+                legend=rng.choice(legends),
+                category=rng.choice(CATEGORIES),
+                description=f"{rng.choice(ADJECTIVES)} {noun.lower()} for events and giveaways. "
+                            f"Ships in {rng.randint(1, 14)} days.",
+                points=rng.randint(10, 5000),
+                stock=rng.randint(0, 500),
+            ))
+        Product.objects.bulk_create(batch, batch_size=2000)
+
+    @staticmethod
+    def _legacy(term):
+        return Product.objects.filter(is_archived=False).filter(
+            Q(item_name__icontains=term) |
+            Q(item_code__icontains=term) |
+            Q(legend__icontains=term) |
+            Q(category__icontains=term) |
+            Q(description__icontains=term)
+        ).order_by("item_name", "id")
+
+    @staticmethod
+    def _current(term):
+        qs, ranked = search_products(Product.objects.filter(is_archived=False), term)
+        if ranked:
+            return qs.order_by("-search_rank", "item_name", "id")
+        return qs.order_by("item_name", "id")
+
+    @staticmethod
+    def _inventory(term):
+        qs, _ = search_products(Product.objects.filter(has_stock=True), term, fallback_fields=INVENTORY_FIELDS)
+        return qs.order_by("item_name", "id")
+
+    @staticmethod
+    def _time_page(build, term):
+        start = time.perf_counter()
+        qs = build(term)
+        qs.count()
+        list(qs[:15])
+        return (time.perf_counter() - start) * 1000
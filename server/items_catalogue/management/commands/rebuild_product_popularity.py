@@ -0,0 +1,65 @@
+"""
+Management command to recompute Product.approved_request_count from request history.
+
+The counter is maintained incrementally as requests are approved, rejected,
+withdrawn or cancelled. Run this after bulk imports/deletes that bypass
+RedemptionRequest.save(), or whenever the numbers look off.
+
+Usage:
+    python manage.py rebuild_product_popularity            # Rebuild all counters
+    python manage.py rebuild_product_popularity --dry-run  # Report drift only
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from items_catalogue.models import Product
+
+
+def approved_request_count_subquery():
+    """Correlated subquery yielding the true counter value for each product row."""
+    from requests.models import RedemptionRequestItem, RequestStatus, ProcessingStatus
+
+    counts = (
+        RedemptionRequestItem.objects
+        .filter(product=OuterRef('pk'), request__status=RequestStatus.APPROVED)
+        .exclude(request__processing_status=ProcessingStatus.CANCELLED)
+        .order_by()
+        .values('product')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized approved_request_count on every product"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report products whose counter has drifted",
+        )
+
+    def handle(self, *args, **options):
+        expected = approved_request_count_subquery()
+
+        drifted = list(
+            Product.objects.annotate(expected=expected)
+            .exclude(approved_request_count=expected)
+            .values_list("item_code", "approved_request_count", "expected")
+        )
+        for code, stored, actual in drifted:
+            self.stdout.write(f"   {code:<15} stored={stored:<6} actual={actual}")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} product(s) have a drifted counter (dry run)"))
+            return
+
+        with transaction.atomic():
+            updated = Product.objects.update(approved_request_count=expected)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt popularity counters for {updated} product(s); {len(drifted)} had drifted"
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-16 20:52
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_approved_request_count(apps, schema_editor):
+    Product = apps.get_model('items_catalogue', 'Product')
+    RedemptionRequestItem = apps.get_model('requests', 'RedemptionRequestItem')
+    counts = (
+        RedemptionRequestItem.objects
+        .filter(product=OuterRef('pk'), request__status='APPROVED')
+        .exclude(request__processing_status='CANCELLED')
+        .order_by()
+        .values('product')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    Product.objects.update(
+        approved_request_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items_catalogue', '0027_alter_product_pricing_formula'),
+        ('requests', '0029_split_remarks_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='approved_request_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_archived', '-approved_request_count', 'item_name', 'id'], name='product_popularity_idx'),
+        ),
+        migrations.RunPython(backfill_approved_request_count, migrations.RunPython.noop),
+    ]
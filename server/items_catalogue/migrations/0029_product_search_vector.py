@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-16 21:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Kept in sync with items_catalogue.search.SEARCH_CONFIG
+CREATE_SEARCH_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION items_catalogue_product_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.item_code, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.item_name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.legend, '') || ' ' || coalesce(NEW.category, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS product_search_vector_trigger ON items_catalogue_product",
+    """
+    CREATE TRIGGER product_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF item_code, item_name, legend, category, description
+        ON items_catalogue_product
+        FOR EACH ROW EXECUTE FUNCTION items_catalogue_product_search_vector()
+    """,
+    # Backfill: touching a watched column fires the trigger for every existing row
+    "UPDATE items_catalogue_product SET item_name = item_name",
+    "CREATE INDEX IF NOT EXISTS product_search_vector_gin ON items_catalogue_product USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS product_item_name_trgm ON items_catalogue_product USING gin (item_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS product_item_code_trgm ON items_catalogue_product USING gin (item_code gin_trgm_ops)",
+]
+
+DROP_SEARCH_SQL = [
+    "DROP INDEX IF EXISTS product_item_code_trgm",
+    "DROP INDEX IF EXISTS product_item_name_trgm",
+    "DROP INDEX IF EXISTS product_search_vector_gin",
+    "DROP TRIGGER IF EXISTS product_search_vector_trigger ON items_catalogue_product",
+    "DROP FUNCTION IF EXISTS items_catalogue_product_search_vector()",
+]
+
+
+def create_search_objects(apps, schema_editor):
+    # Trigger and GIN/trigram indexes are PostgreSQL-only; other backends use icontains
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in CREATE_SEARCH_SQL:
+            schema_editor.execute(statement, params=None)
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in DROP_SEARCH_SQL:
+            schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items_catalogue', '0028_product_approved_request_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+# Django compiles icontains on PostgreSQL to UPPER("col"::text) LIKE UPPER(%s),
+# so the trigram indexes must be on UPPER(col) to serve it. Kept in sync with
+# items_catalogue.search.TRIGRAM_FIELDS.
+CREATE_SQL = [
+    "DROP INDEX IF EXISTS product_item_name_trgm",
+    "DROP INDEX IF EXISTS product_item_code_trgm",
+    "CREATE INDEX IF NOT EXISTS product_item_name_upper_trgm ON items_catalogue_product USING gin (UPPER(item_name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS product_item_code_upper_trgm ON items_catalogue_product USING gin (UPPER(item_code) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS product_legend_upper_trgm ON items_catalogue_product USING gin (UPPER(legend) gin_trgm_ops)",
+]
+
+DROP_SQL = [
+    "DROP INDEX IF EXISTS product_legend_upper_trgm",
+    "DROP INDEX IF EXISTS product_item_code_upper_trgm",
+    "DROP INDEX IF EXISTS product_item_name_upper_trgm",
+    "CREATE INDEX IF NOT EXISTS product_item_name_trgm ON items_catalogue_product USING gin (item_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS product_item_code_trgm ON items_catalogue_product USING gin (item_code gin_trgm_ops)",
+]
+
+
+def create_upper_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in CREATE_SQL:
+            schema_editor.execute(statement, params=None)
+
+
+def drop_upper_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in DROP_SQL:
+            schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items_catalogue', '0029_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_upper_trgm_indexes, drop_upper_trgm_indexes),
+    ]
@@ -1,5 +1,8 @@
 import uuid
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from django.conf import settings
 
@@ -95,6 +98,14 @@ class Product(models.Model):
     stock = models.PositiveIntegerField(default=0)
     committed_stock = models.PositiveIntegerField(default=0)
     
+    # Popularity: number of approved (non-cancelled) redemption request items for this product.
+    # Maintained incrementally by RedemptionRequest.save(); rebuild with `rebuild_product_popularity`.
+    approved_request_count = models.PositiveIntegerField(default=0)
+    
+    # Full-text search document (PostgreSQL only). Maintained by a database trigger
+    # on insert/update, see items_catalogue.search; always NULL on other backends.
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    
     # Image
     image = models.ImageField(
         upload_to='catalogue_images/%Y/%m/',
@@ -122,6 +133,15 @@ class Product(models.Model):
         related_name='products_archived'
     )
     
+    class Meta:
+        indexes = [
+            # Backs ?ordering=popularity on the catalogue listing
+            models.Index(
+                fields=['is_archived', '-approved_request_count', 'item_name', 'id'],
+                name='product_popularity_idx',
+            ),
+        ]
+    
     @property
     def available_stock(self):
         """Returns stock available for new requests (stock minus committed).
@@ -132,26 +152,47 @@ class Product(models.Model):
         return max(0, self.stock - self.committed_stock)
     
     def commit_stock(self, quantity):
-        """Reserve stock for a pending request. No-op for items without stock tracking."""
+        """Reserve stock for a pending request. No-op for items without stock tracking.
+
+        The availability check runs inside the UPDATE itself, so concurrent
+        reservations can never oversell. Returns False (and leaves the row
+        untouched) when fewer than `quantity` units are available.
+        """
         if not self.has_stock:
-            return  # No stock tracking for made-to-order items
-        self.committed_stock += quantity
-        self.save(update_fields=['committed_stock'])
+            return True  # No stock tracking for made-to-order items
+        updated = Product.objects.filter(
+            pk=self.pk,
+            stock__gte=F('committed_stock') + quantity,
+        ).update(committed_stock=F('committed_stock') + quantity)
+        if updated:
+            self.refresh_from_db(fields=['stock', 'committed_stock'])
+        return bool(updated)
     
     def uncommit_stock(self, quantity):
         """Release reserved stock (on rejection/cancellation). No-op for items without stock tracking."""
         if not self.has_stock:
-            return  # No stock tracking for made-to-order items
-        self.committed_stock = max(0, self.committed_stock - quantity)
-        self.save(update_fields=['committed_stock'])
+            return True  # No stock tracking for made-to-order items
+        updated = Product.objects.filter(pk=self.pk).update(
+            committed_stock=Greatest(F('committed_stock') - quantity, Value(0)),
+        )
+        if updated:
+            self.refresh_from_db(fields=['stock', 'committed_stock'])
+        return bool(updated)
     
     def deduct_stock(self, quantity):
-        """Deduct actual stock and release committed (on processing). No-op for items without stock tracking."""
+        """Deduct actual stock and release committed (on processing). No-op for items without stock tracking.
+
+        Returns False when the product no longer has `quantity` units on hand.
+        """
         if not self.has_stock:
-            return  # No stock tracking for made-to-order items
-        self.stock -= quantity
-        self.committed_stock = max(0, self.committed_stock - quantity)
-        self.save(update_fields=['stock', 'committed_stock'])
+            return True  # No stock tracking for made-to-order items
+        updated = Product.objects.filter(pk=self.pk, stock__gte=quantity).update(
+            stock=F('stock') - quantity,
+            committed_stock=Greatest(F('committed_stock') - quantity, Value(0)),
+        )
+        if updated:
+            self.refresh_from_db(fields=['stock', 'committed_stock'])
+        return bool(updated)
 
 
 class FieldType(models.TextChoices):
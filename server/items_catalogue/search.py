@@ -0,0 +1,66 @@
+"""
+Catalogue search backend shared by the catalogue and inventory listings.
+
+On PostgreSQL, products carry a `search_vector` column that a database
+trigger keeps in sync (see migration 0029_product_search_vector). Searches
+over all of FALLBACK_FIELDS match that vector through its GIN index and are
+ranked by relevance. item_name and item_code also keep substring matching,
+so partial codes like "PLT-0" still work. legend, category and description
+are matched by word (with English stemming) rather than by substring.
+
+Searches over a narrower set of fields (e.g. the inventory listing), and
+other databases (SQLite in local development and tests), use the original
+OR-of-icontains filter on exactly the requested fields, unranked.
+
+Django compiles icontains to UPPER("col"::text) LIKE UPPER(%s) on
+PostgreSQL; the pg_trgm GIN indexes on UPPER(col) (migration
+0030_product_search_upper_trgm) serve it for TRIGRAM_FIELDS, so both the
+catalogue and the inventory searches are index scans.
+"""
+from django.db import connection
+from django.db.models import F, Q
+from django.contrib.postgres.search import SearchQuery, SearchRank
+
+# Must match the text search configuration used by the trigger in the migration
+SEARCH_CONFIG = 'english'
+
+# Fields searched with plain icontains when full-text search is unavailable
+FALLBACK_FIELDS = ('item_name', 'item_code', 'legend', 'category', 'description')
+
+# Fields searched by the inventory listing
+INVENTORY_FIELDS = ('item_name', 'item_code', 'legend')
+
+# Columns with an UPPER(col) gin_trgm_ops index on PostgreSQL
+TRIGRAM_FIELDS = ('item_name', 'item_code', 'legend')
+
+
+def full_text_search_enabled():
+    return connection.vendor == 'postgresql'
+
+
+def search_products(queryset, term, fallback_fields=FALLBACK_FIELDS):
+    """
+    Filter `queryset` to products matching `term`.
+
+    `fallback_fields` lists the columns to search. Full-text search covers
+    every column in FALLBACK_FIELDS, so it is only used when the caller asks
+    for all of them; otherwise those columns are matched with icontains.
+
+    Returns (queryset, ranked). When `ranked` is True the queryset carries a
+    `search_rank` annotation that callers should order by (descending).
+    """
+    if not full_text_search_enabled() or set(fallback_fields) != set(FALLBACK_FIELDS):
+        condition = Q()
+        for field in fallback_fields:
+            condition |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(condition), False
+
+    query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+    queryset = queryset.annotate(
+        search_rank=SearchRank(F('search_vector'), query),
+    ).filter(
+        Q(search_vector=query) |
+        Q(item_name__icontains=term) |
+        Q(item_code__icontains=term)
+    )
+    return queryset, True
@@ -41,7 +41,7 @@ class ProductSerializer(serializers.ModelSerializer):
     added_by = UserRelatedField(read_only=True)
     archived_by = UserRelatedField(read_only=True)
     available_stock = serializers.IntegerField(read_only=True)
-    request_count = serializers.IntegerField(read_only=True, default=0)
+    request_count = serializers.IntegerField(source='approved_request_count', read_only=True)
     mktg_admin_username = serializers.SerializerMethodField()
     image = RelativeImageField(required=False, allow_null=True)
     extra_fields = ProductExtraFieldSerializer(many=True, required=False)
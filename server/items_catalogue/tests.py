@@ -1,3 +1,300 @@
-from django.test import TestCase
+import threading
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection, close_old_connections
+from django.db.utils import OperationalError
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from users.models import UserProfile
+from utils.middleware import SlidingSessionMiddleware
+from .models import Product, StockAuditLog
+from .search import INVENTORY_FIELDS, search_products
+
+
+def login(client, user):
+    """force_login() plus the refresh stamp a real login sets, so the first
+    request does not also save the session (SlidingSessionMiddleware)."""
+    client.force_login(user)
+    session = client.session
+    SlidingSessionMiddleware.stamp(session)
+    session.save()
+
+
+class StockReservationTests(TestCase):
+    """commit/uncommit/deduct are conditional UPDATEs that report success via rowcount."""
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            item_code='CAP-001', item_name='Cap', points=10, stock=10, committed_stock=0,
+        )
+
+    def test_commit_refuses_to_oversell_from_stale_instance(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        self.assertTrue(self.product.commit_stock(8))
+        # `stale` still believes 10 units are free; the UPDATE must not trust it
+        self.assertFalse(stale.commit_stock(5))
+        self.assertTrue(stale.commit_stock(2))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.committed_stock, 10)
+
+    def test_uncommit_floors_at_zero(self):
+        self.product.commit_stock(3)
+        self.assertTrue(self.product.uncommit_stock(5))
+        self.assertEqual(self.product.committed_stock, 0)
+
+    def test_deduct_releases_commitment_and_checks_on_hand(self):
+        self.product.commit_stock(4)
+        self.assertTrue(self.product.deduct_stock(4))
+        self.assertEqual((self.product.stock, self.product.committed_stock), (6, 0))
+        self.assertFalse(self.product.deduct_stock(7))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 6)
+
+    def test_untracked_products_are_noops(self):
+        made_to_order = Product.objects.create(
+            item_code='MTO-001', item_name='Banner', points=5, has_stock=False,
+        )
+        self.assertTrue(made_to_order.commit_stock(100))
+        made_to_order.refresh_from_db()
+        self.assertEqual(made_to_order.committed_stock, 0)
+
+
+class InventoryAdjustmentTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='admin', password='pass1234!')
+        UserProfile.objects.create(user=user, position='Admin', full_name='Admin', email='admin@example.com')
+        self.client = Client()
+        self.client.force_login(user)
+        self.product = Product.objects.create(
+            item_code='CAP-001', item_name='Cap', points=10, stock=10, committed_stock=6,
+        )
+
+    def test_adjustment_cannot_cut_into_committed_stock(self):
+        url = f'/api/inventory/{self.product.id}/'
+        response = self.client.patch(url, {'adjustment': -5, 'reason': 'Damaged'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('committed stock (6)', response.json()['error'])
+
+        response = self.client.patch(url, {'adjustment': -4, 'reason': 'Damaged'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        log = StockAuditLog.objects.get(product=self.product)
+        self.assertEqual((log.previous_stock, log.new_stock), (10, 6))
+
+
+class BulkUpdateStockTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='admin', password='pass1234!')
+        UserProfile.objects.create(user=self.user, position='Admin', full_name='Admin', email='admin@example.com')
+        self.client = Client()
+        login(self.client, self.user)
+
+    def _make_products(self, count, start=0):
+        Product.objects.bulk_create([
+            Product(item_code=f'BLK-{start + i:03d}', item_name=f'Item {start + i}', points=1, stock=i)
+            for i in range(count)
+        ])
+
+    def _post(self, payload):
+        payload = {'password': 'pass1234!', **payload}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/inventory/bulk_update_stock/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_decrease_clamps_at_zero_and_audits_exact_snapshot(self):
+        self._make_products(5)
+        Product.objects.create(item_code='MTO-001', item_name='Banner', points=1, has_stock=False, stock=7)
+        body, _ = self._post({'stock_delta': -2, 'reason': 'Recount'})
+        self.assertEqual((body['updated_count'], body['failed_count']), (5, 0))
+        self.assertEqual(
+            list(Product.objects.filter(has_stock=True).order_by('item_code').values_list('stock', flat=True)),
+            [0, 0, 0, 1, 2],
+        )
+        self.assertEqual(Product.objects.get(item_code='MTO-001').stock, 7)
+        logs = {
+            log.product.item_code: (log.previous_stock, log.new_stock)
+            for log in StockAuditLog.objects.select_related('product')
+        }
+        self.assertEqual(logs['BLK-001'], (1, 0))
+        self.assertEqual(logs['BLK-004'], (4, 2))
+        self.assertEqual(len(logs), 5)
+
+    def test_query_count_does_not_grow_with_catalogue(self):
+        self._make_products(3)
+        _, small = self._post({'reset_to_zero': True, 'reason': 'Year end'})
+        self._make_products(30, start=3)
+        _, large = self._post({'stock_delta': 50})
+        self.assertEqual(small, large)
+        self.assertEqual(Product.objects.get(item_code='BLK-002').stock, 50)
+        self.assertEqual(Product.objects.get(item_code='BLK-010').stock, 57)
+
+
+class BatchUpdateStockTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='admin', password='pass1234!')
+        UserProfile.objects.create(user=user, position='Admin', full_name='Admin', email='admin@example.com')
+        self.client = Client()
+        login(self.client, user)
+
+    def _post(self, updates):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                '/api/inventory/batch_update_stock/', {'updates': updates}, content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_per_item_errors_are_reported_in_input_order(self):
+        ok = Product.objects.create(item_code='OK-1', item_name='Mug', points=1, stock=10)
+        held = Product.objects.create(item_code='HELD-1', item_name='Pen', points=1, stock=10, committed_stock=8)
+        untracked = Product.objects.create(item_code='MTO-1', item_name='Sign', points=1, has_stock=False)
+        body, _ = self._post([
+            {'id': ok.id, 'adjustment': 5},
+            {'id': held.id, 'adjustment': -3, 'reason': 'Damaged'},
+            {'id': ok.id, 'adjustment': -2},
+            {'id': untracked.id, 'adjustment': 1},
+            {'id': ok.id, 'adjustment': 'lots'},
+            {'id': held.id, 'adjustment': 0},
+            {'adjustment': 1},
+            {'id': ok.id, 'adjustment': -20, 'reason': 'Recount'},
+        ])
+        self.assertEqual(body['updated_ids'], [ok.id, ok.id])
+        self.assertEqual([f['id'] for f in body['failed']], [held.id, ok.id, untracked.id, ok.id, None])
+        self.assertIn('committed stock (8)', body['failed'][0]['error'])
+        self.assertEqual(body['failed'][2]['error'], 'Product not found or not inventory-tracked')
+        ok.refresh_from_db()
+        held.refresh_from_db()
+        self.assertEqual((ok.stock, held.stock), (0, 10))
+        logs = list(StockAuditLog.objects.order_by('id').values_list('previous_stock', 'new_stock'))
+        self.assertEqual(logs, [(10, 15), (15, 0)])
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        products = Product.objects.bulk_create([
+            Product(item_code=f'BAT-{i:03d}', item_name=f'Item {i}', points=1, stock=5) for i in range(40)
+        ])
+        _, small = self._post([{'id': p.id, 'adjustment': 1} for p in products[:2]])
+        _, large = self._post([{'id': p.id, 'adjustment': 1} for p in products])
+        self.assertEqual(small, large)
+        self.assertEqual(Product.objects.get(pk=products[0].pk).stock, 7)
+
+
+class CatalogueSearchTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(username='agent', password='pass1234!')
+        UserProfile.objects.create(user=user, position='Sales Agent', full_name='Agent', email='agent@example.com')
+        self.client = Client()
+        login(self.client, user)
+        self.cap = Product.objects.create(
+            item_code='CAP-100', item_name='Baseball Cap', category='Apparel', points=10, stock=5,
+        )
+        self.mug = Product.objects.create(
+            item_code='MUG-200', item_name='Travel Mug', description='Keeps coffee hot', points=10, stock=5,
+        )
+        Product.objects.create(item_code='PEN-300', item_name='Gel Pen', points=1, stock=5)
+
+    def _codes(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [row['item_code'] for row in response.json()['results']]
+
+    def test_matches_name_code_and_description(self):
+        self.assertEqual(self._codes('/api/catalogue/?search=cap'), ['CAP-100'])
+        self.assertEqual(self._codes('/api/catalogue/?search=MUG-2'), ['MUG-200'])
+        self.assertEqual(self._codes('/api/catalogue/?search=coffee'), ['MUG-200'])
+
+    def test_inventory_search(self):
+        self.assertEqual(self._codes('/api/inventory/?search=pen'), ['PEN-300'])
+        # Inventory searches name, code and legend only
+        self.assertEqual(self._codes('/api/inventory/?search=coffee'), [])
+        self.assertEqual(self._codes('/api/inventory/?search=Cap'), ['CAP-100'])
+
+    def test_listing_issues_a_single_count_and_constant_queries(self):
+        def run():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/api/catalogue/?search=cap')
+            self.assertEqual(response.status_code, 200)
+            sql = [q['sql'].upper() for q in ctx.captured_queries]
+            self.assertEqual(sum('COUNT(' in q for q in sql), 1)
+            return len(sql), response.json()['count']
+
+        small, count = run()
+        self.assertEqual(count, 1)
+        handler = User.objects.create_user(username='handler', password='pass1234!')
+        UserProfile.objects.create(user=handler, position='Handler', full_name='Hana', email='h@example.com')
+        for i in range(5):
+            product = Product.objects.create(
+                item_code=f'CAP-{i}', item_name=f'Cap {i}', points=1, stock=1, mktg_admin=handler,
+            )
+            product.extra_fields.create(field_key='size', label='Size', field_type='TEXT')
+        large, count = run()
+        self.assertEqual(count, 6)
+        self.assertEqual(small, large)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search requires PostgreSQL')
+    def test_name_matches_rank_above_description_matches(self):
+        Product.objects.create(
+            item_code='BAG-400', item_name='Tote Bag', description='Fits a travel mug', points=5, stock=5,
+        )
+        self.assertEqual(self._codes('/api/catalogue/?search=mug'), ['MUG-200', 'BAG-400'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Trigram indexes require PostgreSQL')
+    def test_inventory_search_can_use_trigram_indexes(self):
+        qs, ranked = search_products(Product.objects.all(), 'cap', fallback_fields=INVENTORY_FIELDS)
+        self.assertFalse(ranked)
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = qs.explain()
+        for index in ('product_item_name_upper_trgm', 'product_item_code_upper_trgm', 'product_legend_upper_trgm'):
+            self.assertIn(index, plan)
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    """Many threads reserving the same product must never oversell it."""
+
+    THREADS = 8
+    ATTEMPTS_PER_THREAD = 10
+    STOCK = 25
+
+    def test_parallel_commits_never_exceed_stock(self):
+        product = Product.objects.create(
+            item_code='HOT-001', item_name='Limited Jacket', points=100, stock=self.STOCK,
+        )
+        results = []
+        lock = threading.Lock()
+        start = threading.Barrier(self.THREADS)
+
+        def worker():
+            start.wait()
+            try:
+                instance = Product.objects.get(pk=product.pk)
+                for _ in range(self.ATTEMPTS_PER_THREAD):
+                    while True:
+                        try:
+                            ok = instance.commit_stock(1)
+                            break
+                        except OperationalError:
+                            # SQLite reports writer contention as "database is locked";
+                            # the statement did not apply, so simply retry it
+                            continue
+                    with lock:
+                        results.append(ok)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        product.refresh_from_db()
+        self.assertEqual(len(results), self.THREADS * self.ATTEMPTS_PER_THREAD)
+        self.assertEqual(results.count(True), self.STOCK)
+        self.assertEqual(product.committed_stock, self.STOCK)
@@ -4,7 +4,9 @@ import os
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.utils import timezone
-from django.db.models import Q, Case, When, Value, CharField, F, Count
+from django.db import transaction
+from django.db.models import Case, When, Value, CharField, F, Count
+from django.db.models.functions import Greatest
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -12,6 +14,7 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from .models import Product, StockAuditLog, log_stock_change, bulk_log_stock_changes, generate_stock_batch_id
 from .serializers import ProductSerializer, ProductInventorySerializer, StockAuditLogSerializer
+from .search import INVENTORY_FIELDS, search_products
 
 ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/webp']
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
@@ -46,40 +49,35 @@ class ProductListCreateView(APIView):
         if show_archived:
             # Show ONLY archived products
             products = products.filter(is_archived=True)
-            logger.info(f"Showing archived products only - Found {products.count()} archived products")
         else:
             # Show ONLY active (non-archived) products
             products = products.filter(is_archived=False)
-            logger.info(f"Showing active products only - Found {products.count()} active products")
 
+        ranked = False
         if search:
-            products = products.filter(
-                Q(item_name__icontains=search) |
-                Q(item_code__icontains=search) |
-                Q(legend__icontains=search) |
-                Q(category__icontains=search) |
-                Q(description__icontains=search)
-            )
-            logger.info(f"Filtering products by search: '{search}' - Found {products.count()} products")
-
-        # Annotate with request frequency (count of approved redemption request items)
-        products = products.annotate(
-            request_count=Count(
-                'redemption_items',
-                filter=Q(redemption_items__request__status='APPROVED'),
-            )
-        )
+            products, ranked = search_products(products, search)
 
         ordering = request.query_params.get('ordering', '').strip()
         if ordering == 'popularity':
-            products = products.order_by('-request_count', 'item_name', 'id')
+            # Denormalized counter, see Product.approved_request_count
+            products = products.order_by('-approved_request_count', 'item_name', 'id')
+        elif ranked:
+            products = products.order_by('-search_rank', 'item_name', 'id')
         else:
             products = products.order_by('item_name', 'id')
 
+        # Serializer reads mktg_admin.profile and extra_fields for every row
+        products = products.select_related('mktg_admin__profile').prefetch_related('extra_fields')
+
         paginator = CataloguePagination()
         paginated_products = paginator.paginate_queryset(products, request)
         serializer = ProductSerializer(paginated_products, many=True, context={'request': request})
 
+        # Reuse the paginator's (cached) COUNT rather than issuing another one
+        scope = 'archived' if show_archived else 'active'
+        matching = f" matching '{search}'" if search else ''
+        logger.info(f"Showing {scope} products{matching} - Found {paginator.page.paginator.count} products")
+
         return paginator.get_paginated_response(serializer.data)
     
     def post(self, request):
@@ -284,11 +282,10 @@ class InventoryListView(APIView):
         # Only show items that track inventory (has_stock=True)
         products = Product.objects.filter(has_stock=True)
         
+        ranked = False
         if search:
-            products = products.filter(
-                Q(item_name__icontains=search) |
-                Q(item_code__icontains=search) |
-                Q(legend__icontains=search)
+            products, ranked = search_products(
+                products, search, fallback_fields=INVENTORY_FIELDS,
             )
         
         # Annotate with stock status for filtering
@@ -309,7 +306,10 @@ class InventoryListView(APIView):
             elif status_filter.lower() == 'in stock':
                 products = products.filter(stock__gt=10)
         
-        products = products.order_by('item_name', 'id')
+        if ranked:
+            products = products.order_by('-search_rank', 'item_name', 'id')
+        else:
+            products = products.order_by('item_name', 'id')
         
         paginator = InventoryPagination()
         paginated_products = paginator.paginate_queryset(products, request)
@@ -364,20 +364,26 @@ class InventoryDetailView(APIView):
                     "error": "Reason is required when decreasing stock"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Validate stock won't go below committed_stock
-            new_stock = product.stock + adjustment
-            if new_stock < 0:
-                return Response({
-                    "error": "Stock cannot go below zero"
-                }, status=status.HTTP_400_BAD_REQUEST)
-            if new_stock < product.committed_stock:
+            with transaction.atomic():
+                # Conditional UPDATE: stock + adjustment must stay >= committed_stock (and so >= 0).
+                # The row stays locked until commit, so the re-read below is an exact snapshot.
+                updated = Product.objects.filter(
+                    pk=product.pk,
+                    stock__gte=F('committed_stock') - adjustment,
+                ).update(stock=F('stock') + adjustment)
+                product.refresh_from_db(fields=['stock', 'committed_stock'])
+            
+            if not updated:
+                if product.stock + adjustment < 0:
+                    return Response({
+                        "error": "Stock cannot go below zero"
+                    }, status=status.HTTP_400_BAD_REQUEST)
                 return Response({
                     "error": f"Stock cannot go below committed stock ({product.committed_stock})"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            previous_stock = product.stock
-            product.stock = new_stock
-            product.save(update_fields=['stock'])
+            new_stock = product.stock
+            previous_stock = new_stock - adjustment
             
             # Log the change
             adj_type = StockAuditLog.AdjustmentType.ADD if adjustment > 0 else StockAuditLog.AdjustmentType.DECREASE
@@ -588,31 +594,37 @@ class BulkUpdateStockView(APIView):
             operation = "update"
         
         try:
-            # Get all products with inventory tracking enabled
-            tracked_items = Product.objects.filter(has_stock=True)
-            
-            updated_count = 0
-            failed_count = 0
-            failed_items = []
-            audit_entries = []
             batch_id = generate_stock_batch_id()
             user = request.user if request.user.is_authenticated else None
             
-            # Update each item's stock
-            for item in tracked_items:
-                try:
+            if reset_to_zero:
+                adj_type = StockAuditLog.AdjustmentType.BULK_RESET
+                new_stock_expr = Value(0)
+            else:
+                adj_type = StockAuditLog.AdjustmentType.BULK_ADD if stock_delta > 0 else StockAuditLog.AdjustmentType.BULK_DECREASE
+                # Ensure stock doesn't go negative
+                new_stock_expr = Greatest(F('stock') + stock_delta, Value(0))
+            
+            with transaction.atomic():
+                # Lock and snapshot every inventory-tracked product first. Nothing else can
+                # write these rows until commit, so the audit trail below is exact
+                # (the portable equivalent of UPDATE ... RETURNING the old values).
+                tracked_items = list(
+                    Product.objects.select_for_update()
+                    .filter(has_stock=True)
+                    .only('id', 'item_code', 'item_name', 'stock')
+                    .order_by('id')
+                )
+                
+                # One set-based UPDATE for the whole catalogue
+                updated_count = Product.objects.filter(
+                    id__in=[item.id for item in tracked_items]
+                ).update(stock=new_stock_expr)
+                
+                audit_entries = []
+                for item in tracked_items:
                     previous_stock = item.stock
-                    if reset_to_zero:
-                        item.stock = 0
-                        adj_type = StockAuditLog.AdjustmentType.BULK_RESET
-                    else:
-                        # Calculate new stock, ensure it doesn't go negative
-                        new_stock = max(0, item.stock + stock_delta)
-                        item.stock = new_stock
-                        adj_type = StockAuditLog.AdjustmentType.BULK_ADD if stock_delta > 0 else StockAuditLog.AdjustmentType.BULK_DECREASE
-                    item.save(update_fields=['stock'])
-                    updated_count += 1
-                    
+                    item.stock = 0 if reset_to_zero else max(0, previous_stock + stock_delta)
                     audit_entries.append({
                         'product': item,
                         'product_name': item.item_name,
@@ -623,14 +635,10 @@ class BulkUpdateStockView(APIView):
                         'reason': reason,
                         'batch_id': batch_id,
                     })
-                except Exception as e:
-                    logger.error(f"Failed to update stock for item {item.item_code}: {str(e)}")
-                    failed_count += 1
-                    failed_items.append(item.item_code)
-            
-            # Bulk log all audit entries
-            if audit_entries:
-                bulk_log_stock_changes(audit_entries)
+                
+                # Bulk log all audit entries
+                if audit_entries:
+                    bulk_log_stock_changes(audit_entries)
             
             if reset_to_zero:
                 message = f"Successfully reset stock to 0 for {updated_count} item(s)"
@@ -642,7 +650,7 @@ class BulkUpdateStockView(APIView):
             response_data = {
                 "message": message,
                 "updated_count": updated_count,
-                "failed_count": failed_count,
+                "failed_count": 0,
                 "total_affected": len(tracked_items),
                 "operation": operation
             }
@@ -650,10 +658,6 @@ class BulkUpdateStockView(APIView):
             if not reset_to_zero:
                 response_data["stock_delta"] = stock_delta
             
-            if failed_count > 0:
-                response_data["failed_items"] = failed_items
-                response_data["message"] = f"Updated {updated_count} of {len(tracked_items)} items. {failed_count} failed."
-            
             logger.info(log_message)
             
             return Response(response_data, status=status.HTTP_200_OK)
@@ -689,14 +693,18 @@ class BatchUpdateStockView(APIView):
         batch_id = generate_stock_batch_id()
         user = request.user if request.user.is_authenticated else None
         
+        # First pass: validate each entry's shape without touching the database.
+        # Failures are recorded in their original position so the report matches the input.
+        results = []
         for update in updates:
+            item_id = None
             try:
                 item_id = update.get('id')
                 adjustment = update.get('adjustment')
                 reason = str(update.get('reason', '')).strip()
                 
                 if item_id is None or adjustment is None:
-                    failed.append({'id': item_id, 'error': 'Missing id or adjustment'})
+                    results.append({'id': item_id, 'error': 'Missing id or adjustment'})
                     continue
                 
                 adjustment = int(adjustment)
@@ -705,20 +713,46 @@ class BatchUpdateStockView(APIView):
                 
                 # Require reason for decreases
                 if adjustment < 0 and not reason:
-                    failed.append({'id': item_id, 'error': 'Reason is required when decreasing stock'})
+                    results.append({'id': item_id, 'error': 'Reason is required when decreasing stock'})
                     continue
                 
-                product = Product.objects.get(id=item_id, has_stock=True)
+                results.append({'id': item_id, 'pk': int(item_id), 'adjustment': adjustment, 'reason': reason})
+            except (ValueError, TypeError) as e:
+                results.append({'id': item_id, 'error': f'Invalid adjustment value: {str(e)}'})
+            except Exception as e:
+                logger.error(f"Failed to update stock for item {item_id}: {str(e)}")
+                results.append({'id': item_id, 'error': str(e)})
+        
+        with transaction.atomic():
+            # One locked lookup for every target; concurrent reservations wait for our commit
+            products = (
+                Product.objects.select_for_update()
+                .filter(has_stock=True)
+                .in_bulk([entry['pk'] for entry in results if 'pk' in entry])
+            )
+            
+            changed = {}
+            for entry in results:
+                if 'error' in entry:
+                    failed.append({'id': entry['id'], 'error': entry['error']})
+                    continue
                 
+                product = products.get(entry['pk'])
+                if product is None:
+                    failed.append({'id': entry['id'], 'error': 'Product not found or not inventory-tracked'})
+                    continue
+                
+                # Validated against the in-memory value, so repeated ids apply cumulatively
+                adjustment = entry['adjustment']
                 new_stock = max(0, product.stock + adjustment)
                 if new_stock < product.committed_stock:
-                    failed.append({'id': item_id, 'error': f'Stock cannot go below committed stock ({product.committed_stock})'})
+                    failed.append({'id': entry['id'], 'error': f'Stock cannot go below committed stock ({product.committed_stock})'})
                     continue
                 
                 previous_stock = product.stock
                 product.stock = new_stock
-                product.save(update_fields=['stock'])
-                updated_ids.append(item_id)
+                changed[product.pk] = product
+                updated_ids.append(entry['id'])
                 
                 adj_type = StockAuditLog.AdjustmentType.ADD if adjustment > 0 else StockAuditLog.AdjustmentType.DECREASE
                 audit_entries.append({
@@ -728,20 +762,16 @@ class BatchUpdateStockView(APIView):
                     'new_stock': new_stock,
                     'adjustment_type': adj_type,
                     'changed_by': user,
-                    'reason': reason,
+                    'reason': entry['reason'],
                     'batch_id': batch_id,
                 })
-            except Product.DoesNotExist:
-                failed.append({'id': item_id, 'error': 'Product not found or not inventory-tracked'})
-            except (ValueError, TypeError) as e:
-                failed.append({'id': item_id, 'error': f'Invalid adjustment value: {str(e)}'})
-            except Exception as e:
-                logger.error(f"Failed to update stock for item {item_id}: {str(e)}")
-                failed.append({'id': item_id, 'error': str(e)})
-        
-        # Bulk log all audit entries
-        if audit_entries:
-            bulk_log_stock_changes(audit_entries)
+            
+            if changed:
+                Product.objects.bulk_update(changed.values(), ['stock'], batch_size=500)
+            
+            # Bulk log all audit entries
+            if audit_entries:
+                bulk_log_stock_changes(audit_entries)
         
         return Response({
             "message": f"Updated {len(updated_ids)} item(s)",
@@ -3,11 +3,20 @@ Analytics views for the SuperAdmin dashboard.
 Provides aggregated data for reports: time-series, item popularity,
 agent performance, team performance, turnaround times, and entity analytics.
 """
+import csv
+import functools
+import io
 import logging
+import tempfile
 from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.db import connection
 from django.db.models import (
-    Count, Sum, Avg, F, Q, Value, CharField,
+    Aggregate, Count, Sum, Avg, F, Q, Value, CharField,
     ExpressionWrapper, DurationField, FloatField,
 )
 from django.db.models.functions import (
@@ -18,7 +27,9 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
-from .models import RedemptionRequest, RedemptionRequestItem
+from .models import RedemptionRequest, RedemptionRequestItem, RequestDailyRollup, ItemDailyRollup
+from .rollup import day_start
+from . import analytics_cache
 
 logger = logging.getLogger('analytics')
 
@@ -31,6 +42,34 @@ def _check_admin(request):
     return True
 
 
+def cached_analytics(get):
+    """
+    Serve an analytics GET from the analytics cache, keyed by view + query
+    params. Only successful responses are stored; the admin check runs before
+    the lookup so a cached payload never reaches a non-admin. Drill-down
+    exports (?export=) stream fresh rows and bypass the cache.
+    """
+    @functools.wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        if not _check_admin(request) or 'export' in request.query_params:
+            return get(self, request, *args, **kwargs)
+
+        key = analytics_cache.cache_key(type(self).__name__, request.query_params)
+        data = analytics_cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Analytics-Cache'] = 'HIT'
+            return response
+
+        response = get(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            analytics_cache.store(key, response.data)
+        response['X-Analytics-Cache'] = 'MISS'
+        return response
+
+    return wrapper
+
+
 def _parse_date_range(request):
     """
     Parse 'range' query param and return a (start_date, end_date) tuple.
@@ -61,6 +100,212 @@ def _base_qs(start_date):
     return qs
 
 
+# Daily rollups
+# -------------
+# Overview, time-series, items, agents, teams and entities aggregate from
+# RequestDailyRollup / ItemDailyRollup (see requests/rollup.py) instead of raw
+# rows. A range starts mid-day (now - N days), so whole days come from the
+# rollup and the partial first day from raw rows; the two are merged so the
+# result matches a raw query exactly. ANALYTICS_USE_ROLLUP=False reads raw rows.
+
+def _rollup_enabled():
+    return getattr(settings, 'ANALYTICS_USE_ROLLUP', True)
+
+
+def _requests(q=None):
+    """Metric: number of requests matching q."""
+    return ('requests', q)
+
+
+def _points(q=None):
+    """Metric: total_points of the requests matching q (0 when there are none)."""
+    return ('points', q)
+
+
+def _metric_alias(name):
+    # Metric names such as 'request_count' may also be rollup columns, which
+    # an annotation of the same name would shadow inside its own Sum().
+    return f'_m_{name}'
+
+
+def _metric_expressions(metrics, rollup):
+    expressions = {}
+    for name, (kind, q) in metrics.items():
+        if kind == 'points':
+            expression = Coalesce(Sum('total_points', filter=q), 0)
+        elif rollup:
+            expression = Coalesce(Sum('request_count', filter=q), 0)
+        else:
+            expression = Count('id', filter=q)
+        expressions[_metric_alias(name)] = expression
+    return expressions
+
+
+def _rename_metrics(row, metrics):
+    for name in metrics:
+        row[name] = row.pop(_metric_alias(name))
+    return row
+
+
+def _merge(parts, keys, metrics):
+    """Sum metric columns of rows from several sources that share the same key columns."""
+    merged = {}
+    for rows in parts:
+        for row in rows:
+            key = tuple(row[k] for k in keys)
+            if key in merged:
+                for name in metrics:
+                    merged[key][name] += row[name]
+            else:
+                merged[key] = dict(row)
+    return list(merged.values())
+
+
+def _first_full_day(start_date):
+    return timezone.localdate(start_date) + timedelta(days=1)
+
+
+def _request_aggregates(start_date, metrics, group_by=(), filters=Q(), trunc=None):
+    """
+    Aggregate requests dated on/after start_date (all time when None) into
+    one dict per group_by combination (a single dict when group_by is empty).
+    With `trunc` (TruncDay/TruncWeek/TruncMonth) rows are also grouped by
+    'period', an aware datetime just like the trunc of date_requested.
+    Rows come back unordered.
+    """
+    if not _rollup_enabled():
+        sources = [(_base_qs(start_date).filter(filters), False)]
+    else:
+        rollup_qs = RequestDailyRollup.objects.filter(filters)
+        sources = []
+        if start_date:
+            first_full_day = _first_full_day(start_date)
+            rollup_qs = rollup_qs.filter(day__gte=first_full_day)
+            boundary_qs = _base_qs(start_date).filter(filters, date_requested__lt=day_start(first_full_day))
+            sources.append((boundary_qs, False))
+        sources.append((rollup_qs, True))
+
+    keys = (('period',) if trunc else ()) + tuple(group_by)
+    parts = []
+    for qs, rollup in sources:
+        expressions = _metric_expressions(metrics, rollup)
+        if not keys:
+            parts.append([_rename_metrics(qs.aggregate(**expressions), metrics)])
+            continue
+        if trunc:
+            qs = qs.annotate(period=trunc('day' if rollup else 'date_requested'))
+        rows = [_rename_metrics(row, metrics) for row in qs.values(*keys).annotate(**expressions).order_by()]
+        if trunc and rollup:
+            # Truncating a DateField yields a date; match the raw aware datetime
+            for row in rows:
+                row['period'] = day_start(row['period'])
+        parts.append(rows)
+    return _merge(parts, keys, metrics)
+
+
+def _approved_item_aggregates(start_date):
+    """Approved item quantity, points and distinct request count per product, unordered."""
+    group_by = ('product__id', 'product__item_code', 'product__item_name', 'product__legend', 'product__category')
+    raw_metrics = {
+        'total_quantity': Sum('quantity'),
+        'total_points': Sum('total_points'),
+        'request_count': Count('request', distinct=True),
+    }
+    rollup_metrics = {
+        'total_quantity': Sum('total_quantity'),
+        'total_points': Sum('total_points'),
+        'request_count': Sum('request_count'),
+    }
+
+    raw_qs = RedemptionRequestItem.objects.filter(request__status='APPROVED')
+    if start_date:
+        raw_qs = raw_qs.filter(request__date_requested__gte=start_date)
+    if not _rollup_enabled():
+        sources = [(raw_qs, raw_metrics)]
+    else:
+        rollup_qs = ItemDailyRollup.objects.filter(status='APPROVED')
+        sources = []
+        if start_date:
+            first_full_day = _first_full_day(start_date)
+            rollup_qs = rollup_qs.filter(day__gte=first_full_day)
+            sources.append((raw_qs.filter(request__date_requested__lt=day_start(first_full_day)), raw_metrics))
+        sources.append((rollup_qs, rollup_metrics))
+
+    parts = [qs.values(*group_by).annotate(**metrics).order_by() for qs, metrics in sources]
+    return _merge(parts, group_by, raw_metrics)
+
+
+# Turnaround statistics
+# ---------------------
+# Durations between two timestamps (e.g. date_requested -> date_reviewed)
+# summarised as count / average / p50 / p90 hours. On PostgreSQL every span
+# and any extra aggregates come back from a single aggregate query using
+# percentile_cont; other backends (SQLite in development) fetch the timestamp
+# pairs in one query and compute the same figures in Python.
+
+class _PercentileCont(Aggregate):
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+
+TURNAROUND_PERCENTILES = (('p50', 0.5), ('p90', 0.9))
+
+
+def _hours(seconds):
+    return None if seconds is None else round(seconds / 3600, 1)
+
+
+def _percentile(ordered, fraction):
+    """Linear interpolation between closest ranks, as percentile_cont does."""
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _turnaround_stats(qs, spans, **aggregates):
+    """
+    Summarise each span {name: (start_field, end_field)} over the rows of qs
+    that have both timestamps. Returns ({name: {'count', 'avg_hours',
+    'p50_hours', 'p90_hours'}}, results of the extra `aggregates`).
+    """
+    if connection.vendor == 'postgresql':
+        for name, (start, end) in spans.items():
+            duration = ExpressionWrapper(F(end) - F(start), output_field=DurationField())
+            present = Q(**{f'{start}__isnull': False, f'{end}__isnull': False})
+            aggregates[f'_{name}_count'] = Count('pk', filter=present)
+            aggregates[f'_{name}_avg'] = Avg(duration, filter=present)
+            for label, fraction in TURNAROUND_PERCENTILES:
+                aggregates[f'_{name}_{label}'] = _PercentileCont(
+                    duration, fraction=fraction, filter=present, output_field=DurationField(),
+                )
+        row = qs.aggregate(**aggregates)
+        stats = {}
+        for name in spans:
+            summary = {'count': row.pop(f'_{name}_count')}
+            for label in ('avg', *dict(TURNAROUND_PERCENTILES)):
+                value = row.pop(f'_{name}_{label}')
+                summary[f'{label}_hours'] = _hours(value.total_seconds() if value is not None else None)
+            stats[name] = summary
+        return stats, row
+
+    fields = list(dict.fromkeys(field for span in spans.values() for field in span))
+    samples = {name: [] for name in spans}
+    for row in qs.order_by().values_list(*fields).iterator():
+        values = dict(zip(fields, row))
+        for name, (start, end) in spans.items():
+            if values[start] is not None and values[end] is not None:
+                samples[name].append((values[end] - values[start]).total_seconds())
+    stats = {}
+    for name, seconds in samples.items():
+        seconds.sort()
+        summary = {'count': len(seconds), 'avg_hours': _hours(sum(seconds) / len(seconds) if seconds else None)}
+        for label, fraction in TURNAROUND_PERCENTILES:
+            summary[f'{label}_hours'] = _hours(_percentile(seconds, fraction) if seconds else None)
+        stats[name] = summary
+    return stats, (qs.aggregate(**aggregates) if aggregates else {})
+
+
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 # 1. Enhanced Overview
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
@@ -69,27 +314,25 @@ class AnalyticsOverviewView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @cached_analytics
     def get(self, request):
         if not _check_admin(request):
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
 
         try:
             start_date, _ = _parse_date_range(request)
-            qs = _base_qs(start_date)
 
-            stats = qs.aggregate(
-                total_requests=Count('id'),
-                pending_count=Count('id', filter=Q(status='PENDING')),
-                approved_count=Count('id', filter=Q(status='APPROVED')),
-                rejected_count=Count('id', filter=Q(status='REJECTED')),
-                withdrawn_count=Count('id', filter=Q(status='WITHDRAWN')),
-                processed_count=Count('id', filter=Q(processing_status='PROCESSED')),
-                not_processed_count=Count('id', filter=Q(processing_status='NOT_PROCESSED')),
-                cancelled_count=Count('id', filter=Q(processing_status='CANCELLED')),
-                total_points_redeemed=Coalesce(
-                    Sum('total_points', filter=Q(status='APPROVED')), 0
-                ),
-            )
+            [stats] = _request_aggregates(start_date, {
+                'total_requests': _requests(),
+                'pending_count': _requests(Q(status='PENDING')),
+                'approved_count': _requests(Q(status='APPROVED')),
+                'rejected_count': _requests(Q(status='REJECTED')),
+                'withdrawn_count': _requests(Q(status='WITHDRAWN')),
+                'processed_count': _requests(Q(processing_status='PROCESSED')),
+                'not_processed_count': _requests(Q(processing_status='NOT_PROCESSED')),
+                'cancelled_count': _requests(Q(processing_status='CANCELLED')),
+                'total_points_redeemed': _points(Q(status='APPROVED')),
+            })
 
             from distributers.models import Distributor
             from customers.models import Customer
@@ -116,6 +359,7 @@ class AnalyticsTimeSeriesView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @cached_analytics
     def get(self, request):
         if not _check_admin(request):
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
@@ -123,7 +367,6 @@ class AnalyticsTimeSeriesView(APIView):
         try:
             start_date, _ = _parse_date_range(request)
             period = request.query_params.get('period', 'auto')
-            qs = _base_qs(start_date)
 
             # Auto-select granularity
             if period == 'auto':
@@ -141,16 +384,14 @@ class AnalyticsTimeSeriesView(APIView):
             else:
                 trunc_fn = {'daily': TruncDay, 'weekly': TruncWeek, 'monthly': TruncMonth}.get(period, TruncDay)
 
-            data = (
-                qs.annotate(period=trunc_fn('date_requested'))
-                .values('period')
-                .annotate(
-                    request_count=Count('id'),
-                    points_redeemed=Coalesce(Sum('total_points', filter=Q(status='APPROVED')), 0),
-                    approved_count=Count('id', filter=Q(status='APPROVED')),
-                    rejected_count=Count('id', filter=Q(status='REJECTED')),
-                )
-                .order_by('period')
+            data = sorted(
+                _request_aggregates(start_date, {
+                    'request_count': _requests(),
+                    'points_redeemed': _points(Q(status='APPROVED')),
+                    'approved_count': _requests(Q(status='APPROVED')),
+                    'rejected_count': _requests(Q(status='REJECTED')),
+                }, trunc=trunc_fn),
+                key=lambda entry: entry['period'],
             )
 
             result = [
@@ -183,6 +424,7 @@ class AnalyticsItemsView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @cached_analytics
     def get(self, request):
         if not _check_admin(request):
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
@@ -191,28 +433,10 @@ class AnalyticsItemsView(APIView):
             start_date, _ = _parse_date_range(request)
             limit = min(int(request.query_params.get('limit', 10)), 50)
 
-            items_qs = RedemptionRequestItem.objects.filter(
-                request__status='APPROVED',
-            )
-            if start_date:
-                items_qs = items_qs.filter(request__date_requested__gte=start_date)
-
-            data = (
-                items_qs
-                .values(
-                    'product__id',
-                    'product__item_code',
-                    'product__item_name',
-                    'product__legend',
-                    'product__category',
-                )
-                .annotate(
-                    total_quantity=Sum('quantity'),
-                    total_points=Sum('total_points'),
-                    request_count=Count('request', distinct=True),
-                )
-                .order_by('-total_quantity')[:limit]
-            )
+            data = sorted(
+                _approved_item_aggregates(start_date),
+                key=lambda entry: -entry['total_quantity'],
+            )[:limit]
 
             result = [
                 {
@@ -247,6 +471,7 @@ class AnalyticsAgentsView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @cached_analytics
     def get(self, request):
         if not _check_admin(request):
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
@@ -254,38 +479,41 @@ class AnalyticsAgentsView(APIView):
         try:
             start_date, _ = _parse_date_range(request)
             limit = min(int(request.query_params.get('limit', 10)), 50)
-            qs = _base_qs(start_date)
-
-            data = (
-                qs.values('requested_by')
-                .annotate(
-                    total_requests=Count('id'),
-                    approved_count=Count('id', filter=Q(status='APPROVED')),
-                    rejected_count=Count('id', filter=Q(status='REJECTED')),
-                    withdrawn_count=Count('id', filter=Q(status='WITHDRAWN')),
-                    processed_count=Count('id', filter=Q(processing_status='PROCESSED')),
-                    total_points=Coalesce(Sum('total_points', filter=Q(status='APPROVED')), 0),
-                )
-                .order_by('-total_requests')[:limit]
-            )
 
-            # Fetch user names
-            from django.contrib.auth import get_user_model
+            data = sorted(
+                _request_aggregates(start_date, {
+                    'total_requests': _requests(),
+                    'approved_count': _requests(Q(status='APPROVED')),
+                    'rejected_count': _requests(Q(status='REJECTED')),
+                    'withdrawn_count': _requests(Q(status='WITHDRAWN')),
+                    'processed_count': _requests(Q(processing_status='PROCESSED')),
+                    'total_points': _points(Q(status='APPROVED')),
+                }, group_by=('requested_by',)),
+                key=lambda entry: -entry['total_requests'],
+            )[:limit]
+
+            # Resolve names and teams for the whole page in two queries
             from users.models import UserProfile
-            User = get_user_model()
+            from teams.models import TeamMembership
+
+            user_ids = [entry['requested_by'] for entry in data]
+            agent_names = {
+                user_id: full_name or username
+                for user_id, full_name, username in UserProfile.objects.filter(user_id__in=user_ids)
+                .values_list('user_id', 'full_name', 'user__username')
+            }
+            # A user belongs to at most one team
+            team_names = dict(
+                TeamMembership.objects.filter(user_id__in=user_ids).values_list('user_id', 'team__name')
+            )
 
             result = []
             for entry in data:
                 user_id = entry['requested_by']
-                try:
-                    profile = UserProfile.objects.get(user_id=user_id)
-                    agent_name = profile.full_name or profile.user.username
-                    team_name = None
-                    from teams.models import TeamMembership
-                    membership = TeamMembership.objects.filter(user_id=user_id).select_related('team').first()
-                    if membership:
-                        team_name = membership.team.name
-                except UserProfile.DoesNotExist:
+                if user_id in agent_names:
+                    agent_name = agent_names[user_id]
+                    team_name = team_names.get(user_id)
+                else:
                     agent_name = f'User #{user_id}'
                     team_name = None
 
@@ -325,24 +553,23 @@ class AnalyticsTeamsView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @cached_analytics
     def get(self, request):
         if not _check_admin(request):
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
 
         try:
             start_date, _ = _parse_date_range(request)
-            qs = _base_qs(start_date).filter(team__isnull=False)
 
-            data = (
-                qs.values('team', 'team__name')
-                .annotate(
-                    total_requests=Count('id'),
-                    approved_count=Count('id', filter=Q(status='APPROVED')),
-                    rejected_count=Count('id', filter=Q(status='REJECTED')),
-                    processed_count=Count('id', filter=Q(processing_status='PROCESSED')),
-                    total_points=Coalesce(Sum('total_points', filter=Q(status='APPROVED')), 0),
-                )
-                .order_by('-total_requests')
+            data = sorted(
+                _request_aggregates(start_date, {
+                    'total_requests': _requests(),
+                    'approved_count': _requests(Q(status='APPROVED')),
+                    'rejected_count': _requests(Q(status='REJECTED')),
+                    'processed_count': _requests(Q(processing_status='PROCESSED')),
+                    'total_points': _points(Q(status='APPROVED')),
+                }, group_by=('team', 'team__name'), filters=Q(team__isnull=False)),
+                key=lambda entry: -entry['total_requests'],
             )
 
             result = []
@@ -377,10 +604,11 @@ class AnalyticsTeamsView(APIView):
 # 6. Turnaround Time
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 class AnalyticsTurnaroundView(APIView):
-    """Average processing turnaround times."""
+    """Processing turnaround times: averages and p50/p90 per step, plus a monthly trend."""
 
     permission_classes = [IsAuthenticated]
 
+    @cached_analytics
     def get(self, request):
         if not _check_admin(request):
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
@@ -388,49 +616,28 @@ class AnalyticsTurnaroundView(APIView):
         try:
             start_date, _ = _parse_date_range(request)
 
-            # Overall averages â€” only consider requests that have progressed
-            qs_reviewed = _base_qs(start_date).filter(
-                date_reviewed__isnull=False,
-            )
-            qs_processed = _base_qs(start_date).filter(
-                date_processed__isnull=False,
-            )
-
-            review_avg = qs_reviewed.annotate(
-                dur=ExpressionWrapper(
-                    F('date_reviewed') - F('date_requested'),
-                    output_field=DurationField(),
-                )
-            ).aggregate(avg_review=Avg('dur'))
-
-            process_avg = qs_processed.annotate(
-                dur=ExpressionWrapper(
-                    F('date_processed') - F('date_reviewed'),
-                    output_field=DurationField(),
-                )
-            ).aggregate(avg_process=Avg('dur'))
-
-            total_avg = qs_processed.annotate(
-                dur=ExpressionWrapper(
-                    F('date_processed') - F('date_requested'),
-                    output_field=DurationField(),
-                )
-            ).aggregate(avg_total=Avg('dur'))
+            # Overall figures in one pass â€” only requests that reached each step count
+            spans, _ = _turnaround_stats(_base_qs(start_date), {
+                'request_to_review': ('date_requested', 'date_reviewed'),
+                'review_to_process': ('date_reviewed', 'date_processed'),
+                'total': ('date_requested', 'date_processed'),
+            })
 
             def td_to_hours(td):
                 if td is None:
                     return None
                 return round(td.total_seconds() / 3600, 1)
 
-            overall = {
-                'avg_request_to_review_hours': td_to_hours(review_avg['avg_review']),
-                'avg_review_to_process_hours': td_to_hours(process_avg['avg_process']),
-                'avg_total_hours': td_to_hours(total_avg['avg_total']),
-            }
+            overall = {}
+            for name, summary in spans.items():
+                overall[f'avg_{name}_hours'] = summary['avg_hours']
+                overall[f'p50_{name}_hours'] = summary['p50_hours']
+                overall[f'p90_{name}_hours'] = summary['p90_hours']
+                overall[f'{name}_count'] = summary['count']
 
             # Monthly trend
             monthly_data = (
-                qs_processed
+                _base_qs(start_date).filter(date_processed__isnull=False)
                 .annotate(
                     month=TruncMonth('date_requested'),
                     total_dur=ExpressionWrapper(
@@ -463,6 +670,164 @@ class AnalyticsTurnaroundView(APIView):
             )
 
 
+# â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+# 7. Drill-down exports (shared by 7a / 7b)
+# â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+# The item/agent request drill-downs return at most 500 rows as JSON. With
+# ?export=csv or ?export=xlsx they return every row instead, read with
+# .iterator() and written out in chunks so memory stays flat. Exports are
+# never cached.
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+EXPORT_CHUNK_SIZE = 2000
+
+ITEM_REQUEST_COLUMNS = (
+    'request_id', 'date_requested', 'agent', 'team', 'requested_for', 'requested_for_type',
+    'item_name', 'item_code', 'quantity', 'points', 'status', 'processing_status',
+    'reviewed_by', 'date_reviewed', 'processed_by', 'date_processed', 'remarks',
+)
+AGENT_REQUEST_COLUMNS = (
+    'request_id', 'date_requested', 'requested_for', 'requested_for_type', 'items',
+    'total_points', 'status', 'processing_status', 'reviewed_by', 'date_reviewed',
+    'processed_by', 'date_processed', 'remarks', 'rejection_reason',
+)
+
+
+def _user_name(user):
+    """Display name; callers select_related the user's profile."""
+    if not user:
+        return None
+    profile = getattr(user, 'profile', None)
+    if profile:
+        return profile.full_name or user.username
+    return user.username
+
+
+def _item_request_rows(items):
+    for ri in items:
+        req = ri.request
+        yield {
+            'request_id': req.id,
+            'date_requested': req.date_requested.isoformat() if req.date_requested else None,
+            'agent': _user_name(req.requested_by),
+            'team': req.team.name if req.team else None,
+            'requested_for': req.get_requested_for_name(),
+            'requested_for_type': req.requested_for_type,
+            'item_name': ri.product.item_name if ri.product else None,
+            'item_code': ri.product.item_code if ri.product else None,
+            'quantity': ri.quantity,
+            'points': ri.total_points,
+            'status': req.status,
+            'processing_status': req.processing_status,
+            'reviewed_by': _user_name(req.reviewed_by),
+            'date_reviewed': req.date_reviewed.isoformat() if req.date_reviewed else None,
+            'processed_by': _user_name(req.processed_by),
+            'date_processed': req.date_processed.isoformat() if req.date_processed else None,
+            'remarks': req.remarks or '',
+        }
+
+
+def _agent_request_rows(requests):
+    for req in requests:
+        items_str = ', '.join(
+            f"{ri.product.item_name} x{ri.quantity}" if ri.product else f"Item x{ri.quantity}"
+            for ri in req.items.all()
+        )
+        yield {
+            'request_id': req.id,
+            'date_requested': req.date_requested.isoformat() if req.date_requested else None,
+            'requested_for': req.get_requested_for_name(),
+            'requested_for_type': req.requested_for_type,
+            'items': items_str,
+            'total_points': req.total_points,
+            'status': req.status,
+            'processing_status': req.processing_status,
+            'reviewed_by': _user_name(req.reviewed_by),
+            'date_reviewed': req.date_reviewed.isoformat() if req.date_reviewed else None,
+            'processed_by': _user_name(req.processed_by),
+            'date_processed': req.date_processed.isoformat() if req.date_processed else None,
+            'remarks': req.remarks or '',
+            'rejection_reason': req.rejection_reason or '',
+        }
+
+
+def _streaming_content(request, chunks):
+    """
+    Under ASGI Django buffers a sync iterator into a list before sending it,
+    so hand it an async iterator that pulls one chunk at a time on the sync
+    thread (where the queryset's cursor lives). WSGI streams `chunks` as is.
+    """
+    if not isinstance(request._request, ASGIRequest):
+        return chunks
+
+    next_chunk = sync_to_async(lambda: next(chunks, None), thread_sensitive=True)
+
+    async def stream():
+        try:
+            while (chunk := await next_chunk()) is not None:
+                yield chunk
+        finally:
+            await sync_to_async(chunks.close, thread_sensitive=True)()
+
+    return stream()
+
+
+def _csv_chunks(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([row[column] for column in columns])
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _xlsx_chunks(rows, columns, title):
+    # Write-only mode streams rows to a temporary file instead of holding cells in memory
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append(columns)
+    for row in rows:
+        sheet.append([row[column] for column in columns])
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while chunk := output.read(64 * 1024):
+            yield chunk
+
+
+def _export_response(request, export_format, rows, columns, name):
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {'error': f"export must be one of: {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    filename = f"{name}_{timezone.localdate().isoformat()}.{export_format}"
+    if export_format == 'xlsx':
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            return Response(
+                {'error': 'Excel export not available. Please install openpyxl.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        chunks = _xlsx_chunks(rows, columns, name)
+        content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        chunks = _csv_chunks(rows, columns)
+        content_type = 'text/csv'
+
+    response = StreamingHttpResponse(_streaming_content(request, chunks), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    logger.debug(f"[Analytics] Streaming {export_format} export {filename}")
+    return response
+
+
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 # 7a. Item Requests Detail (for export)
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
@@ -471,6 +836,7 @@ class AnalyticsItemRequestsView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @cached_analytics
     def get(self, request):
         if not _check_admin(request):
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
@@ -489,44 +855,21 @@ class AnalyticsItemRequestsView(APIView):
                 'request', 'request__requested_by', 'product',
                 'request__requested_for', 'request__requested_for_customer',
                 'request__team', 'request__reviewed_by', 'request__processed_by',
+                'request__requested_by__profile', 'request__reviewed_by__profile',
+                'request__processed_by__profile',
             )
             if start_date:
                 items_qs = items_qs.filter(request__date_requested__gte=start_date)
+            items_qs = items_qs.order_by('-request__date_requested')
 
-            items_qs = items_qs.order_by('-request__date_requested')[:500]
-
-            from users.models import UserProfile
-
-            def _user_name(user):
-                if not user:
-                    return None
-                profile = getattr(user, 'profile', None)
-                if profile:
-                    return profile.full_name or user.username
-                return user.username
+            export_format = request.query_params.get('export')
+            if export_format:
+                return _export_response(
+                    request, export_format, _item_request_rows(items_qs.iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+                    ITEM_REQUEST_COLUMNS, f"item_{product_id}_requests",
+                )
 
-            result = []
-            for ri in items_qs:
-                req = ri.request
-                result.append({
-                    'request_id': req.id,
-                    'date_requested': req.date_requested.isoformat() if req.date_requested else None,
-                    'agent': _user_name(req.requested_by),
-                    'team': req.team.name if req.team else None,
-                    'requested_for': req.get_requested_for_name(),
-                    'requested_for_type': req.requested_for_type,
-                    'item_name': ri.product.item_name if ri.product else None,
-                    'item_code': ri.product.item_code if ri.product else None,
-                    'quantity': ri.quantity,
-                    'points': ri.total_points,
-                    'status': req.status,
-                    'processing_status': req.processing_status,
-                    'reviewed_by': _user_name(req.reviewed_by),
-                    'date_reviewed': req.date_reviewed.isoformat() if req.date_reviewed else None,
-                    'processed_by': _user_name(req.processed_by),
-                    'date_processed': req.date_processed.isoformat() if req.date_processed else None,
-                    'remarks': req.remarks or '',
-                })
+            result = list(_item_request_rows(items_qs[:500]))
 
             logger.debug(f"[Analytics] Item requests export: product_id={product_id}, rows={len(result)}")
             return Response(result)
@@ -547,6 +890,7 @@ class AnalyticsAgentRequestsView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @cached_analytics
     def get(self, request):
         if not _check_admin(request):
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
@@ -563,40 +907,18 @@ class AnalyticsAgentRequestsView(APIView):
             ).select_related(
                 'requested_by', 'requested_for', 'requested_for_customer',
                 'team', 'reviewed_by', 'processed_by',
-            ).prefetch_related('items', 'items__product').order_by('-date_requested')[:500]
-
-            from users.models import UserProfile
-
-            def _user_name(user):
-                if not user:
-                    return None
-                profile = getattr(user, 'profile', None)
-                if profile:
-                    return profile.full_name or user.username
-                return user.username
-
-            result = []
-            for req in qs:
-                items_str = ', '.join(
-                    f"{ri.product.item_name} x{ri.quantity}" if ri.product else f"Item x{ri.quantity}"
-                    for ri in req.items.all()
+                'reviewed_by__profile', 'processed_by__profile',
+            ).prefetch_related('items', 'items__product').order_by('-date_requested')
+
+            export_format = request.query_params.get('export')
+            if export_format:
+                # With chunk_size, iterator() prefetches items one chunk at a time
+                return _export_response(
+                    request, export_format, _agent_request_rows(qs.iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+                    AGENT_REQUEST_COLUMNS, f"agent_{agent_id}_requests",
                 )
-                result.append({
-                    'request_id': req.id,
-                    'date_requested': req.date_requested.isoformat() if req.date_requested else None,
-                    'requested_for': req.get_requested_for_name(),
-                    'requested_for_type': req.requested_for_type,
-                    'items': items_str,
-                    'total_points': req.total_points,
-                    'status': req.status,
-                    'processing_status': req.processing_status,
-                    'reviewed_by': _user_name(req.reviewed_by),
-                    'date_reviewed': req.date_reviewed.isoformat() if req.date_reviewed else None,
-                    'processed_by': _user_name(req.processed_by),
-                    'date_processed': req.date_processed.isoformat() if req.date_processed else None,
-                    'remarks': req.remarks or '',
-                    'rejection_reason': req.rejection_reason or '',
-                })
+
+            result = list(_agent_request_rows(qs[:500]))
 
             logger.debug(f"[Analytics] Agent requests export: agent_id={agent_id}, rows={len(result)}")
             return Response(result)
@@ -617,6 +939,7 @@ class AnalyticsEntitiesView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @cached_analytics
     def get(self, request):
         if not _check_admin(request):
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
@@ -626,19 +949,21 @@ class AnalyticsEntitiesView(APIView):
             entity_type = request.query_params.get('type', 'distributor')
             limit = min(int(request.query_params.get('limit', 10)), 50)
 
-            qs = _base_qs(start_date).filter(status='APPROVED')
+            metrics = {
+                'request_count': _requests(),
+                'total_points': _points(),
+                'processed_count': _requests(Q(processing_status='PROCESSED')),
+            }
 
             if entity_type == 'customer':
-                data = (
-                    qs.filter(requested_for_customer__isnull=False)
-                    .values('requested_for_customer', 'requested_for_customer__name')
-                    .annotate(
-                        request_count=Count('id'),
-                        total_points=Sum('total_points'),
-                        processed_count=Count('id', filter=Q(processing_status='PROCESSED')),
-                    )
-                    .order_by('-total_points')[:limit]
-                )
+                data = sorted(
+                    _request_aggregates(
+                        start_date, metrics,
+                        group_by=('requested_for_customer', 'requested_for_customer__name'),
+                        filters=Q(status='APPROVED', requested_for_customer__isnull=False),
+                    ),
+                    key=lambda e: -e['total_points'],
+                )[:limit]
                 result = [
                     {
                         'entity_id': e['requested_for_customer'],
@@ -651,16 +976,14 @@ class AnalyticsEntitiesView(APIView):
                     for e in data
                 ]
             else:
-                data = (
-                    qs.filter(requested_for__isnull=False)
-                    .values('requested_for', 'requested_for__name')
-                    .annotate(
-                        request_count=Count('id'),
-                        total_points=Sum('total_points'),
-                        processed_count=Count('id', filter=Q(processing_status='PROCESSED')),
-                    )
-                    .order_by('-total_points')[:limit]
-                )
+                data = sorted(
+                    _request_aggregates(
+                        start_date, metrics,
+                        group_by=('requested_for', 'requested_for__name'),
+                        filters=Q(status='APPROVED', requested_for__isnull=False),
+                    ),
+                    key=lambda e: -e['total_points'],
+                )[:limit]
                 result = [
                     {
                         'entity_id': e['requested_for'],
@@ -743,9 +1066,12 @@ class UserAnalyticsView(APIView):
 
     def _sales_agent_stats(self, user):
         qs = RedemptionRequest.objects.filter(requested_by=user)
-        total = qs.count()
 
-        agg = qs.aggregate(
+        # Counts and turnaround (date_requested â†’ date_reviewed) together
+        spans, agg = _turnaround_stats(
+            qs,
+            {'turnaround': ('date_requested', 'date_reviewed')},
+            total=Count('id'),
             pending_count=Count('id', filter=Q(status='PENDING')),
             approved_count=Count('id', filter=Q(status='APPROVED')),
             rejected_count=Count('id', filter=Q(status='REJECTED')),
@@ -754,20 +1080,10 @@ class UserAnalyticsView(APIView):
             cancelled_count=Count('id', filter=Q(processing_status='CANCELLED')),
             total_points_redeemed=Coalesce(Sum('total_points', filter=Q(status='APPROVED')), 0),
         )
+        total = agg['total']
 
         approval_rate = round((agg['approved_count'] / total) * 100, 1) if total > 0 else 0
-
-        # Average turnaround: date_requested â†’ date_reviewed for reviewed requests
-        reviewed_qs = qs.filter(date_reviewed__isnull=False)
-        avg_turnaround = reviewed_qs.annotate(
-            dur=ExpressionWrapper(
-                F('date_reviewed') - F('date_requested'),
-                output_field=DurationField(),
-            )
-        ).aggregate(avg=Avg('dur'))
-        avg_hours = None
-        if avg_turnaround['avg']:
-            avg_hours = round(avg_turnaround['avg'].total_seconds() / 3600, 1)
+        turnaround = spans['turnaround']
 
         # Recent requests (up to 50 for client-side filtering)
         recent = (
@@ -803,7 +1119,9 @@ class UserAnalyticsView(APIView):
                 'cancelled_count': agg['cancelled_count'],
                 'approval_rate': approval_rate,
                 'total_points_redeemed': agg['total_points_redeemed'],
-                'avg_turnaround_hours': avg_hours,
+                'avg_turnaround_hours': turnaround['avg_hours'],
+                'p50_turnaround_hours': turnaround['p50_hours'],
+                'p90_turnaround_hours': turnaround['p90_hours'],
             },
             'recent_activity': recent_activity,
         })
@@ -811,25 +1129,19 @@ class UserAnalyticsView(APIView):
     def _approver_stats(self, user):
         # Requests this approver reviewed (approved or rejected)
         qs = RedemptionRequest.objects.filter(reviewed_by=user)
-        total = qs.count()
 
-        agg = qs.aggregate(
+        # Counts and review time (date_requested â†’ date_reviewed) together
+        spans, agg = _turnaround_stats(
+            qs,
+            {'review': ('date_requested', 'date_reviewed')},
+            total=Count('id'),
             approved_count=Count('id', filter=Q(status='APPROVED')),
             rejected_count=Count('id', filter=Q(status='REJECTED')),
         )
+        total = agg['total']
 
         approval_rate = round((agg['approved_count'] / total) * 100, 1) if total > 0 else 0
-
-        # Average review time: date_requested â†’ date_reviewed
-        avg_review = qs.filter(date_reviewed__isnull=False).annotate(
-            dur=ExpressionWrapper(
-                F('date_reviewed') - F('date_requested'),
-                output_field=DurationField(),
-            )
-        ).aggregate(avg=Avg('dur'))
-        avg_hours = None
-        if avg_review['avg']:
-            avg_hours = round(avg_review['avg'].total_seconds() / 3600, 1)
+        review = spans['review']
 
         # Also check sales approvals
         sales_qs = RedemptionRequest.objects.filter(sales_approved_by=user)
@@ -862,7 +1174,9 @@ class UserAnalyticsView(APIView):
                 'approved_count': agg['approved_count'],
                 'rejected_count': agg['rejected_count'],
                 'approval_rate': approval_rate,
-                'avg_review_hours': avg_hours,
+                'avg_review_hours': review['avg_hours'],
+                'p50_review_hours': review['p50_hours'],
+                'p90_review_hours': review['p90_hours'],
                 'sales_approvals_total': sales_total,
                 'sales_approved_count': sales_agg['sales_approved'],
                 'sales_rejected_count': sales_agg['sales_rejected'],
@@ -952,10 +1266,16 @@ class TeamAnalyticsView(APIView):
                 return Response({'error': 'Team not found'}, status=status.HTTP_404_NOT_FOUND)
 
             qs = RedemptionRequest.objects.filter(team=team)
-            total = qs.count()
 
             # â”€â”€ Aggregate stats â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-            agg = qs.aggregate(
+            # Turnaround: date_requested â†’ date_reviewed; processing: date_reviewed â†’ date_processed
+            spans, agg = _turnaround_stats(
+                qs,
+                {
+                    'turnaround': ('date_requested', 'date_reviewed'),
+                    'processing': ('date_reviewed', 'date_processed'),
+                },
+                total=Count('id'),
                 pending_count=Count('id', filter=Q(status='PENDING')),
                 approved_count=Count('id', filter=Q(status='APPROVED')),
                 rejected_count=Count('id', filter=Q(status='REJECTED')),
@@ -964,22 +1284,11 @@ class TeamAnalyticsView(APIView):
                 cancelled_count=Count('id', filter=Q(processing_status='CANCELLED')),
                 total_points_redeemed=Coalesce(Sum('total_points', filter=Q(status='APPROVED')), 0),
             )
+            total = agg['total']
 
             reviewed_total = agg['approved_count'] + agg['rejected_count']
             approval_rate = round((agg['approved_count'] / reviewed_total) * 100, 1) if reviewed_total > 0 else 0
 
-            # Avg turnaround: date_requested â†’ date_reviewed
-            avg_turn = qs.filter(date_reviewed__isnull=False).annotate(
-                dur=ExpressionWrapper(F('date_reviewed') - F('date_requested'), output_field=DurationField())
-            ).aggregate(avg=Avg('dur'))
-            avg_turnaround_hours = round(avg_turn['avg'].total_seconds() / 3600, 1) if avg_turn['avg'] else None
-
-            # Avg processing: date_reviewed â†’ date_processed
-            avg_proc = qs.filter(date_processed__isnull=False, date_reviewed__isnull=False).annotate(
-                dur=ExpressionWrapper(F('date_processed') - F('date_reviewed'), output_field=DurationField())
-            ).aggregate(avg=Avg('dur'))
-            avg_processing_hours = round(avg_proc['avg'].total_seconds() / 3600, 1) if avg_proc['avg'] else None
-
             member_count = team.memberships.count()
 
             # â”€â”€ Top 5 items â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
@@ -1004,17 +1313,28 @@ class TeamAnalyticsView(APIView):
             ]
 
             # â”€â”€ Member breakdown â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-            member_breakdown = []
-            for membership in team.memberships.select_related('user', 'user__profile').all():
-                u = membership.user
-                m_qs = qs.filter(requested_by=u)
-                m_total = m_qs.count()
-                m_agg = m_qs.aggregate(
+            # One grouped aggregate for every member instead of two queries each
+            per_member = {
+                row['requested_by']: row
+                for row in qs.values('requested_by').annotate(
+                    total_requests=Count('id'),
                     approved_count=Count('id', filter=Q(status='APPROVED')),
                     rejected_count=Count('id', filter=Q(status='REJECTED')),
                     pending_count=Count('id', filter=Q(status='PENDING')),
                     total_points_redeemed=Coalesce(Sum('total_points', filter=Q(status='APPROVED')), 0),
-                )
+                ).order_by()
+            }
+            no_requests = {
+                'total_requests': 0, 'approved_count': 0, 'rejected_count': 0,
+                'pending_count': 0, 'total_points_redeemed': 0,
+            }
+
+            member_breakdown = []
+            # Memberships, users and profiles come from the prefetch above
+            for membership in team.memberships.all():
+                u = membership.user
+                m_agg = per_member.get(u.id, no_requests)
+                m_total = m_agg['total_requests']
                 m_reviewed = m_agg['approved_count'] + m_agg['rejected_count']
                 m_approval = round((m_agg['approved_count'] / m_reviewed) * 100, 1) if m_reviewed > 0 else 0
 
@@ -1071,8 +1391,12 @@ class TeamAnalyticsView(APIView):
                     'cancelled_count': agg['cancelled_count'],
                     'approval_rate': approval_rate,
                     'total_points_redeemed': agg['total_points_redeemed'],
-                    'avg_turnaround_hours': avg_turnaround_hours,
-                    'avg_processing_hours': avg_processing_hours,
+                    'avg_turnaround_hours': spans['turnaround']['avg_hours'],
+                    'p50_turnaround_hours': spans['turnaround']['p50_hours'],
+                    'p90_turnaround_hours': spans['turnaround']['p90_hours'],
+                    'avg_processing_hours': spans['processing']['avg_hours'],
+                    'p50_processing_hours': spans['processing']['p50_hours'],
+                    'p90_processing_hours': spans['processing']['p90_hours'],
                     'member_count': member_count,
                     'top_items': top_items,
                 },
@@ -1086,3 +1410,17 @@ class TeamAnalyticsView(APIView):
                 {'error': 'Failed to fetch team analytics', 'detail': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+# â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+# 10. Analytics cache stats
+# â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+class AnalyticsCacheStatsView(APIView):
+    """Hit/miss counters for the analytics response cache (Admin only)."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not _check_admin(request):
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(analytics_cache.stats())
@@ -0,0 +1,78 @@
+"""
+Response cache for the dashboard analytics views (requests/analytics.py).
+
+Responses live in the 'analytics' cache alias (CACHES in settings; locmem by
+default, a FileBasedCache directory shares it between workers). Keys embed a
+generation number; invalidate() bumps it, so every cached response becomes
+unreachable at once and simply expires. requests.rollup invalidates after a
+request's day is refreshed, i.e. whenever a request changes status (or any
+other rollup field) or is deleted.
+"""
+import hashlib
+import logging
+
+from django.core.cache import caches
+from django.utils.http import urlencode
+
+logger = logging.getLogger('analytics')
+
+CACHE_ALIAS = 'analytics'
+_GENERATION_KEY = 'analytics:generation'
+_HITS_KEY = 'analytics:hits'
+_MISSES_KEY = 'analytics:misses'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _incr(key):
+    cache = _cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing (first use, or evicted); add() keeps a racing writer's value
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def cache_key(view_name, query_params):
+    """Key for one view + query string under the current generation."""
+    generation = _cache().get(_GENERATION_KEY, 0)
+    query = urlencode(sorted(query_params.lists()), doseq=True)
+    digest = hashlib.md5(f"{view_name}?{query}".encode()).hexdigest()
+    return f"analytics:{generation}:{digest}"
+
+
+def get(key):
+    """Cached response data for `key`, or None. Counts the hit or miss."""
+    data = _cache().get(key)
+    _incr(_HITS_KEY if data is not None else _MISSES_KEY)
+    return data
+
+
+def store(key, data):
+    _cache().set(key, data)
+
+
+def invalidate():
+    """Make every cached analytics response stale."""
+    try:
+        _incr(_GENERATION_KEY)
+    except Exception:
+        logger.exception("[Analytics] Cache invalidation failed")
+
+
+def stats():
+    """Cumulative hit/miss counters for the analytics cache."""
+    cache = _cache()
+    hits = cache.get(_HITS_KEY, 0)
+    misses = cache.get(_MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups * 100, 1) if lookups else 0,
+        'generation': cache.get(_GENERATION_KEY, 0),
+    }
@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class RequestsConfig(AppConfig):
     name = 'requests'
+
+    def ready(self):
+        from django.db.models.signals import post_delete
+
+        from .models import RedemptionRequest, RedemptionRequestItem
+        from .rollup import item_deleted, request_deleted
+
+        # Saves are tracked in the models; deletions (including cascades) arrive here
+        post_delete.connect(request_deleted, sender=RedemptionRequest, dispatch_uid='requests.rollup.request_deleted')
+        post_delete.connect(item_deleted, sender=RedemptionRequestItem, dispatch_uid='requests.rollup.item_deleted')
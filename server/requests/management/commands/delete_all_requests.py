@@ -333,6 +333,8 @@ class Command(BaseCommand):
         self.stdout.write(f"  ✓ Deleted {requests_deleted:,} total records (including cascades):")
         for model_name, count in cascade_dict.items():
             self.stdout.write(f"    - {model_name}: {count}")
+        # Queryset delete bypasses RedemptionRequest.save(), so reset popularity counters directly
+        Product.objects.update(approved_request_count=0)
 
         return refund_summary
 
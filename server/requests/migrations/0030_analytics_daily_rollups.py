@@ -0,0 +1,111 @@
+# Generated by Django 6.0 on 2026-10-16 21:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    RedemptionRequest = apps.get_model('requests', 'RedemptionRequest')
+    RedemptionRequestItem = apps.get_model('requests', 'RedemptionRequestItem')
+    RequestDailyRollup = apps.get_model('requests', 'RequestDailyRollup')
+    ItemDailyRollup = apps.get_model('requests', 'ItemDailyRollup')
+
+    request_rows = (
+        RedemptionRequest.objects.annotate(day=TruncDate('date_requested'))
+        .values('day', 'team', 'requested_by', 'requested_for', 'requested_for_customer', 'status', 'processing_status')
+        .annotate(request_count=Count('id'), total_points=Coalesce(Sum('total_points'), 0))
+        .order_by()
+    )
+    RequestDailyRollup.objects.bulk_create([
+        RequestDailyRollup(
+            day=row['day'],
+            team_id=row['team'],
+            requested_by_id=row['requested_by'],
+            requested_for_id=row['requested_for'],
+            requested_for_customer_id=row['requested_for_customer'],
+            status=row['status'],
+            processing_status=row['processing_status'],
+            request_count=row['request_count'],
+            total_points=row['total_points'],
+        )
+        for row in request_rows
+    ], batch_size=1000)
+
+    item_rows = (
+        RedemptionRequestItem.objects
+        .annotate(day=TruncDate('request__date_requested'), request_status=F('request__status'))
+        .values('day', 'product', 'request_status')
+        .annotate(
+            total_quantity=Coalesce(Sum('quantity'), 0),
+            total_points=Coalesce(Sum('total_points'), 0),
+            request_count=Count('request', distinct=True),
+        )
+        .order_by()
+    )
+    ItemDailyRollup.objects.bulk_create([
+        ItemDailyRollup(
+            day=row['day'],
+            product_id=row['product'],
+            status=row['request_status'],
+            total_quantity=row['total_quantity'],
+            total_points=row['total_points'],
+            request_count=row['request_count'],
+        )
+        for row in item_rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0006_enable_pg_trgm_add_is_prospect'),
+        ('distributers', '0010_alter_distributor_points'),
+        ('items_catalogue', '0029_product_search_vector'),
+        ('requests', '0029_split_remarks_fields'),
+        ('teams', '0010_alter_team_approver'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestDailyRollup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected'), ('WITHDRAWN', 'Withdrawn')], max_length=20)),
+                ('processing_status', models.CharField(choices=[('NOT_PROCESSED', 'Not Processed'), ('PARTIALLY_PROCESSED', 'Partially Processed'), ('PROCESSED', 'Processed'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('total_points', models.PositiveBigIntegerField(default=0)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('requested_for', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='distributers.distributor')),
+                ('requested_for_customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='customers.customer')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='teams.team')),
+            ],
+            options={
+                'verbose_name': 'Request Daily Rollup',
+                'verbose_name_plural': 'Request Daily Rollups',
+                'indexes': [models.Index(fields=['day'], name='req_rollup_day_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemDailyRollup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected'), ('WITHDRAWN', 'Withdrawn')], max_length=20)),
+                ('total_quantity', models.PositiveBigIntegerField(default=0)),
+                ('total_points', models.PositiveBigIntegerField(default=0)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='items_catalogue.product')),
+            ],
+            options={
+                'verbose_name': 'Item Daily Rollup',
+                'verbose_name_plural': 'Item Daily Rollups',
+                'indexes': [models.Index(fields=['status', 'day'], name='item_rollup_status_day_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
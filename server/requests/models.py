@@ -1,5 +1,7 @@
 import logging
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.core.validators import FileExtensionValidator
 from django.utils import timezone
 from django.conf import settings
@@ -9,6 +11,18 @@ from items_catalogue.models import Product
 from teams.models import Team
 from points_audit.utils import log_points_change
 
+# Fields that place a request (or item) in the analytics daily rollups; a save
+# that changes any of them refreshes the affected day (see requests.rollup)
+ROLLUP_FIELDS = {
+    'date_requested', 'team', 'requested_by', 'requested_for',
+    'requested_for_customer', 'status', 'processing_status', 'total_points',
+}
+ROLLUP_ATTNAMES = (
+    'date_requested', 'team_id', 'requested_by_id', 'requested_for_id',
+    'requested_for_customer_id', 'status', 'processing_status', 'total_points',
+)
+ITEM_ROLLUP_ATTNAMES = ('request_id', 'product_id', 'quantity', 'total_points')
+
 class PointsDeductionChoice(models.TextChoices):
     SELF = 'SELF', 'Self (Sales Agent)'
     DISTRIBUTOR = 'DISTRIBUTOR', 'Distributor'
@@ -572,6 +586,80 @@ class RedemptionRequest(models.Model):
             'users': list(user_status.values())
         }
 
+    # ------------------------------------------------------------------
+    # Product popularity counter (Product.approved_request_count)
+    # ------------------------------------------------------------------
+
+    def _counts_toward_popularity(self):
+        """An approved request counts toward its products' popularity unless it was cancelled."""
+        return (
+            self.status == RequestStatus.APPROVED
+            and self.processing_status != ProcessingStatus.CANCELLED
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember whether the stored row was counted so save() can detect transitions.
+        # None means status was deferred and the transition cannot be known.
+        if 'status' in field_names and 'processing_status' in field_names:
+            instance._popularity_counted = instance._counts_toward_popularity()
+        else:
+            instance._popularity_counted = None
+        # Same idea for the analytics rollup dimensions (None = unknown, always refresh)
+        if all(attname in field_names for attname in ROLLUP_ATTNAMES):
+            instance._rollup_state = instance._analytics_rollup_state()
+        else:
+            instance._rollup_state = None
+        return instance
+
+    def save(self, *args, **kwargs):
+        was_counted = False if self._state.adding else getattr(self, '_popularity_counted', None)
+        rollup_before = None if self._state.adding else getattr(self, '_rollup_state', None)
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        touched = None if update_fields is None else {name.removesuffix('_id') for name in update_fields}
+        if touched is None or {'status', 'processing_status'} & touched:
+            is_counted = self._counts_toward_popularity()
+            if was_counted is not None and is_counted != was_counted:
+                self._adjust_product_popularity(1 if is_counted else -1)
+            self._popularity_counted = is_counted
+        if touched is None or ROLLUP_FIELDS & touched:
+            self._refresh_analytics_rollup(rollup_before)
+
+    def _adjust_product_popularity(self, direction):
+        """Add (direction=1) or remove (direction=-1) this request's items from the product counters."""
+        per_product = (
+            self.items.values('product_id')
+            .annotate(n=models.Count('id'))
+            .values_list('product_id', 'n')
+        )
+        for product_id, n in per_product:
+            Product.objects.filter(pk=product_id).update(
+                approved_request_count=Greatest(F('approved_request_count') + direction * n, Value(0)),
+            )
+
+    # ------------------------------------------------------------------
+    # Analytics daily rollups (RequestDailyRollup / ItemDailyRollup)
+    # ------------------------------------------------------------------
+
+    def _analytics_rollup_state(self):
+        return tuple(getattr(self, attname) for attname in ROLLUP_ATTNAMES)
+
+    def _refresh_analytics_rollup(self, before):
+        """Mark the request's day (and its previous day, if it moved) for a rollup refresh."""
+        from .rollup import mark_days_dirty
+
+        after = self._analytics_rollup_state()
+        if before == after:
+            return
+        days = {timezone.localdate(self.date_requested)}
+        if before is not None:
+            days.add(timezone.localdate(before[0]))
+        mark_days_dirty(days)
+        self._rollup_state = after
+
     class Meta:
         verbose_name = "Redemption Request"
         verbose_name_plural = "Redemption Requests"
@@ -665,12 +753,29 @@ class RedemptionRequestItem(models.Model):
         """Remaining units to be fulfilled."""
         return max(0, self.quantity - self.fulfilled_quantity)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Fulfillment updates are frequent; only product/quantity/points feed the rollup
+        if all(attname in field_names for attname in ITEM_ROLLUP_ATTNAMES):
+            instance._rollup_state = tuple(getattr(instance, attname) for attname in ITEM_ROLLUP_ATTNAMES)
+        else:
+            instance._rollup_state = None
+        return instance
+
     def save(self, *args, **kwargs):
         # Ensure total_points is computed if not set (normally done in serializer)
         if not self.total_points and self.points_per_item:
             self.total_points = self.quantity * self.points_per_item
+        rollup_before = None if self._state.adding else getattr(self, '_rollup_state', None)
         super().save(*args, **kwargs)
 
+        rollup_after = tuple(getattr(self, attname) for attname in ITEM_ROLLUP_ATTNAMES)
+        if rollup_after != rollup_before:
+            from .rollup import mark_days_dirty
+            mark_days_dirty({timezone.localdate(self.request.date_requested)})
+            self._rollup_state = rollup_after
+
     def __str__(self):
         return f"{self.quantity}x {self.product} for Request #{self.request.id}"
 
@@ -758,3 +863,49 @@ class ProcessingPhoto(models.Model):
         verbose_name = "Processing Photo"
         verbose_name_plural = "Processing Photos"
         ordering = ['uploaded_at']
+
+
+class RequestDailyRollup(models.Model):
+    """
+    Request totals per (day, team, agent, entity, status, processing status)
+    for the analytics dashboard. Maintained by requests.rollup; rebuild with
+    `python manage.py rebuild_analytics_rollup`.
+    """
+    id = models.AutoField(primary_key=True)
+    day = models.DateField()
+    team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    requested_for = models.ForeignKey(Distributor, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    requested_for_customer = models.ForeignKey(Customer, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=20, choices=RequestStatus.choices)
+    processing_status = models.CharField(max_length=20, choices=ProcessingStatus.choices)
+    request_count = models.PositiveIntegerField(default=0)
+    total_points = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Request Daily Rollup"
+        verbose_name_plural = "Request Daily Rollups"
+        indexes = [
+            models.Index(fields=['day'], name='req_rollup_day_idx'),
+        ]
+
+
+class ItemDailyRollup(models.Model):
+    """
+    Item totals per (day, product, request status) for the analytics
+    dashboard. request_count counts distinct requests, so it sums across days.
+    """
+    id = models.AutoField(primary_key=True)
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=20, choices=RequestStatus.choices)
+    total_quantity = models.PositiveBigIntegerField(default=0)
+    total_points = models.PositiveBigIntegerField(default=0)
+    request_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Item Daily Rollup"
+        verbose_name_plural = "Item Daily Rollups"
+        indexes = [
+            models.Index(fields=['status', 'day'], name='item_rollup_status_day_idx'),
+        ]
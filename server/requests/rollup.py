@@ -0,0 +1,185 @@
+"""
+Maintenance of the analytics daily rollups (RequestDailyRollup, ItemDailyRollup).
+
+Instead of applying +/- deltas, a save that changes a request's rollup fields
+(or an item's product/quantity/points) marks the request's day dirty. Once
+the transaction commits, that day's rollup rows are recomputed from the raw
+RedemptionRequest / RedemptionRequestItem rows. A day holds few requests, so
+the refresh is cheap, and the rollup always matches the raw rows exactly.
+
+Deletions are picked up by post_delete receivers (connected in
+RequestsConfig.ready()), which also covers cascades from users, distributors
+and customers. Writes that bypass both (queryset.update(), raw SQL) need
+`python manage.py rebuild_analytics_rollup`.
+"""
+import logging
+import threading
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, F, QuerySet, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from . import analytics_cache
+from .models import ItemDailyRollup, RedemptionRequest, RedemptionRequestItem, RequestDailyRollup
+
+logger = logging.getLogger(__name__)
+
+REQUEST_DIMENSIONS = (
+    'team', 'requested_by', 'requested_for', 'requested_for_customer', 'status', 'processing_status',
+)
+
+# Arbitrary key (fits int4) for the advisory locks serialising rollup writers on PostgreSQL
+_ROLLUP_LOCK_KEY = 0x726f6c6c
+
+# Days marked dirty per thread; on_commit callbacks pop them so several saves
+# in one transaction refresh each day once
+_pending = threading.local()
+
+
+def day_start(day):
+    """Aware datetime of local midnight starting `day`."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def request_rows(queryset):
+    """Aggregate RedemptionRequest rows into RequestDailyRollup-shaped dicts."""
+    return (
+        queryset.annotate(day=TruncDate('date_requested'))
+        .values('day', *REQUEST_DIMENSIONS)
+        .annotate(request_count=Count('id'), total_points=Coalesce(Sum('total_points'), 0))
+        .order_by()
+    )
+
+
+def item_rows(queryset):
+    """Aggregate RedemptionRequestItem rows into ItemDailyRollup-shaped dicts."""
+    return (
+        queryset.annotate(day=TruncDate('request__date_requested'), request_status=F('request__status'))
+        .values('day', 'product', 'request_status')
+        .annotate(
+            total_quantity=Coalesce(Sum('quantity'), 0),
+            total_points=Coalesce(Sum('total_points'), 0),
+            request_count=Count('request', distinct=True),
+        )
+        .order_by()
+    )
+
+
+def _write(requests_qs, items_qs):
+    RequestDailyRollup.objects.bulk_create([
+        RequestDailyRollup(
+            day=row['day'],
+            team_id=row['team'],
+            requested_by_id=row['requested_by'],
+            requested_for_id=row['requested_for'],
+            requested_for_customer_id=row['requested_for_customer'],
+            status=row['status'],
+            processing_status=row['processing_status'],
+            request_count=row['request_count'],
+            total_points=row['total_points'],
+        )
+        for row in request_rows(requests_qs)
+    ], batch_size=1000)
+    ItemDailyRollup.objects.bulk_create([
+        ItemDailyRollup(
+            day=row['day'],
+            product_id=row['product'],
+            status=row['request_status'],
+            total_quantity=row['total_quantity'],
+            total_points=row['total_points'],
+            request_count=row['request_count'],
+        )
+        for row in item_rows(items_qs)
+    ], batch_size=1000)
+
+
+def _lock(days=None):
+    """
+    Serialise rollup writers so two refreshes of one day cannot interleave.
+    Refreshes hold the global key shared plus one (key, day) lock per day, so
+    writers of different days do not contend; a full rebuild (days=None)
+    holds the global key exclusively. Days are locked in sorted order.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if days is None:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [_ROLLUP_LOCK_KEY])
+            return
+        cursor.execute('SELECT pg_advisory_xact_lock_shared(%s)', [_ROLLUP_LOCK_KEY])
+        for day in days:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s::integer, %s::integer)', [_ROLLUP_LOCK_KEY, day.toordinal()])
+
+
+def refresh_days(days):
+    """Recompute the rollup rows of the given local dates from the raw rows."""
+    days = sorted(days)
+    with transaction.atomic():
+        _lock(days)
+        for day in days:
+            start, end = day_start(day), day_start(day + timedelta(days=1))
+            RequestDailyRollup.objects.filter(day=day).delete()
+            ItemDailyRollup.objects.filter(day=day).delete()
+            _write(
+                RedemptionRequest.objects.filter(date_requested__gte=start, date_requested__lt=end),
+                RedemptionRequestItem.objects.filter(
+                    request__date_requested__gte=start, request__date_requested__lt=end,
+                ),
+            )
+
+
+def rebuild_all():
+    """Drop and recompute every rollup row. Returns (request_rows, item_rows) written."""
+    with transaction.atomic():
+        _lock()
+        RequestDailyRollup.objects.all().delete()
+        ItemDailyRollup.objects.all().delete()
+        _write(RedemptionRequest.objects.all(), RedemptionRequestItem.objects.all())
+        counts = RequestDailyRollup.objects.count(), ItemDailyRollup.objects.count()
+    analytics_cache.invalidate()
+    return counts
+
+
+def mark_days_dirty(days):
+    """Refresh the given days once the current transaction commits (immediately in autocommit)."""
+    pending = getattr(_pending, 'days', None)
+    if pending is None:
+        pending = _pending.days = set()
+    for day in days:
+        pending.add(day)
+        transaction.on_commit(lambda day=day: _flush(day))
+
+
+def _flush(day):
+    pending = _pending.days
+    if day not in pending:
+        return  # Already refreshed by an earlier callback of this transaction
+    pending.discard(day)
+    try:
+        refresh_days([day])
+    except Exception:
+        # The request itself already committed; rebuild_analytics_rollup repairs the gap
+        logger.exception("Analytics rollup refresh failed for %s", day)
+    # Cached dashboard responses may include this day
+    analytics_cache.invalidate()
+
+
+def request_deleted(sender, instance, **kwargs):
+    """post_delete receiver for RedemptionRequest."""
+    mark_days_dirty({timezone.localdate(instance.date_requested)})
+
+
+def item_deleted(sender, instance, origin=None, **kwargs):
+    """post_delete receiver for RedemptionRequestItem."""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is not RedemptionRequestItem:
+        return  # Cascade from a request (or its owner); request_deleted covers the day
+    date_requested = (
+        RedemptionRequest.objects.filter(pk=instance.request_id)
+        .values_list('date_requested', flat=True)
+        .first()
+    )
+    if date_requested is not None:
+        mark_days_dirty({timezone.localdate(date_requested)})
@@ -274,6 +274,9 @@ class RedemptionRequestSerializer(serializers.ModelSerializer):
         Aggregate handler notes from all item fulfillment logs.
         If request-level processing_remarks exist, use those.
         Otherwise, compile a summary of all item-level fulfillment notes.
+        Reads logs from the items__fulfillment_logs prefetch cache when the
+        object came from _build_base_queryset(); falls back to a single query
+        otherwise (e.g. freshly created requests).
         """
         try:
             # If request has explicit processing_remarks set, return that
@@ -281,12 +284,20 @@ class RedemptionRequestSerializer(serializers.ModelSerializer):
                 return obj.processing_remarks
             
             # Otherwise, aggregate notes from all fulfillment logs across all items
-            from .models import ItemFulfillmentLog
-            all_logs = ItemFulfillmentLog.objects.filter(
-                item__request=obj
-            ).select_related('fulfilled_by__profile').order_by('fulfilled_at')
+            if 'items' in getattr(obj, '_prefetched_objects_cache', {}):
+                all_logs = sorted(
+                    (log for item in obj.items.all() for log in item.fulfillment_logs.all()),
+                    key=lambda log: log.fulfilled_at,
+                )
+            else:
+                from .models import ItemFulfillmentLog
+                all_logs = list(
+                    ItemFulfillmentLog.objects.filter(
+                        item__request=obj
+                    ).select_related('fulfilled_by__profile').order_by('fulfilled_at')
+                )
             
-            if not all_logs.exists():
+            if not all_logs:
                 return ''
             
             notes_list = []
@@ -316,6 +327,41 @@ class RedemptionRequestSerializer(serializers.ModelSerializer):
             return ''
 
 
+class RedemptionRequestSummarySerializer(serializers.ModelSerializer):
+    """
+    Slim list representation for queue screens and polling dashboards
+    (?view=summary). No nested items, logs or photos; pair with
+    _build_summary_queryset() so every field comes from a single query.
+    """
+    requested_by_name = serializers.SerializerMethodField()
+    requested_for_name = serializers.SerializerMethodField()
+    team_name = serializers.SerializerMethodField()
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    processing_status_display = serializers.CharField(source='get_processing_status_display', read_only=True)
+
+    class Meta:
+        model = RedemptionRequest
+        fields = [
+            'id', 'requested_by', 'requested_by_name', 'requested_for_type', 'requested_for_name',
+            'team', 'team_name', 'total_points',
+            'status', 'status_display', 'processing_status', 'processing_status_display',
+            'sales_approval_status', 'ar_status', 'date_requested',
+        ]
+        read_only_fields = fields
+
+    def get_requested_by_name(self, obj):
+        profile = getattr(obj.requested_by, 'profile', None)
+        if profile:
+            return profile.full_name or obj.requested_by.username
+        return obj.requested_by.username
+
+    def get_requested_for_name(self, obj):
+        return obj.get_requested_for_name()
+
+    def get_team_name(self, obj):
+        return obj.team.name if obj.team else None
+
+
 class CreateRedemptionRequestSerializer(serializers.Serializer):
     requested_for = serializers.PrimaryKeyRelatedField(
         queryset=Distributor.objects.filter(is_archived=False),
@@ -511,7 +557,7 @@ class CreateRedemptionRequestSerializer(serializers.Serializer):
             # Create the request items, calculate total points, and commit stock
             total_points = 0
             for item_data in items_data:
-                product = Product.objects.select_for_update().get(id=item_data['product_id'])
+                product = Product.objects.get(id=item_data['product_id'])
                 pricing_formula = product.pricing_formula
                 extra_data = item_data.get('extra_data', {})
                 quantity = item_data.get('quantity', 1)
@@ -546,7 +592,17 @@ class CreateRedemptionRequestSerializer(serializers.Serializer):
                     extra_data=extra_data,
                     pricing_formula=pricing_formula
                 )
-                product.commit_stock(quantity)
+                if not product.commit_stock(quantity):
+                    # Another request reserved the remaining units since validation ran
+                    raise serializers.ValidationError({
+                        'insufficient_stock': [{
+                            'item_code': product.item_code,
+                            'item_name': product.item_name,
+                            'available': Product.objects.get(pk=product.pk).available_stock,
+                            'requested': quantity,
+                        }],
+                        'message': 'Not enough available stock for the following items'
+                    })
             
             # Update total points on the request
             redemption_request.total_points = total_points
@@ -1,3 +1,586 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from customers.models import Customer
+from items_catalogue.models import Product
+from distributers.models import Distributor
+from teams.models import Team, TeamMembership
+from users.models import UserProfile
+from utils.middleware import SlidingSessionMiddleware
+from . import analytics_cache
+from .models import RedemptionRequest, RedemptionRequestItem, ItemFulfillmentLog, RequestDailyRollup
+from .views import HistoryCursorPagination
+
+
+def make_user(username, position, **profile_fields):
+    user = User.objects.create_user(username=username, password='pass1234!')
+    UserProfile.objects.create(
+        user=user,
+        position=position,
+        full_name=profile_fields.pop('full_name', username.title()),
+        email=f'{username}@example.com',
+        **profile_fields,
+    )
+    return user
+
+
+def login(client, user):
+    """force_login() plus the refresh stamp a real login sets, so the first
+    request does not also save the session (SlidingSessionMiddleware)."""
+    client.force_login(user)
+    session = client.session
+    SlidingSessionMiddleware.stamp(session)
+    session.save()
+
+
+class RequestFixturesMixin:
+    """Shared users, team, distributor and product for redemption request tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user('admin', 'Admin')
+        cls.handler = make_user('handler', 'Handler')
+        cls.approver = make_user('approver', 'Approver')
+        cls.agent = make_user('agent', 'Sales Agent', uses_points=True, points=10000)
+        cls.team = Team.objects.create(name='North', approver=cls.approver)
+        TeamMembership.objects.create(team=cls.team, user=cls.agent)
+        cls.distributor = Distributor.objects.create(name='Acme Trading', points=5000)
+        cls.product = Product.objects.create(
+            item_code='PLT-001', item_name='Platinum Cap', points=10, stock=1000,
+        )
+
+    def make_request(self, processed_notes=(), **fields):
+        """Create an APPROVED request with one item and optional fulfillment log notes."""
+        fields.setdefault('status', 'APPROVED')
+        fields.setdefault('team', self.team)
+        req = RedemptionRequest.objects.create(
+            requested_by=self.agent,
+            requested_for=self.distributor,
+            total_points=10,
+            **fields,
+        )
+        item = RedemptionRequestItem.objects.create(
+            request=req, product=self.product, quantity=len(processed_notes) or 1,
+            points_per_item=10, total_points=10,
+        )
+        for note in processed_notes:
+            ItemFulfillmentLog.objects.create(
+                item=item, fulfilled_quantity=1, fulfilled_by=self.handler, notes=note,
+            )
+        return req
+
+
+class ProcessingRemarksQueryCountTests(RequestFixturesMixin, TestCase):
+    """List endpoints must not issue a query per row to build processing_remarks."""
+
+    def setUp(self):
+        self.client = Client()
+        login(self.client, self.admin)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_processing_remarks_built_from_prefetch(self):
+        self.make_request(processed_notes=['Left at front desk', 'Second batch'])
+        _, response = self._count_queries('/api/redemption-requests/')
+        remarks = response.json()[0]['processing_remarks']
+        self.assertIn('Left at front desk (by Handler on', remarks)
+        self.assertIn(' | Second batch (by Handler on', remarks)
+
+    def test_explicit_processing_remarks_take_precedence(self):
+        self.make_request(processed_notes=['ignored'], processing_remarks='Delivered')
+        _, response = self._count_queries('/api/redemption-requests/')
+        self.assertEqual(response.json()[0]['processing_remarks'], 'Delivered')
+
+    def test_list_query_count_is_constant(self):
+        for url in ('/api/redemption-requests/', '/api/redemption-requests/history/'):
+            with self.subTest(url=url):
+                RedemptionRequest.objects.all().delete()
+                for _ in range(2):
+                    self.make_request(processed_notes=['note'])
+                small, _ = self._count_queries(url)
+                for _ in range(6):
+                    self.make_request(processed_notes=['note', 'another'])
+                large, response = self._count_queries(url)
+                body = response.json()
+                rows = body['results'] if isinstance(body, dict) else body
+                self.assertEqual(len(rows), 8)
+                self.assertEqual(small, large)
+
+
+class HistoryCursorPaginationTests(RequestFixturesMixin, TestCase):
+    """Keyset pagination and server-side filters on the history endpoints."""
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        base = timezone.now().replace(microsecond=0)
+        # Two rows share a timestamp so the id tiebreaker is exercised
+        stamps = [base - timedelta(days=d) for d in (0, 1, 1, 2, 3, 10)]
+        self.requests = [self.make_request(date_requested=stamp) for stamp in stamps]
+
+    def _collect_pages(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            ids.extend(row['id'] for row in body['results'])
+            url = body['next']
+            pages += 1
+        return ids, pages
+
+    def test_first_page_is_the_default(self):
+        for _ in range(HistoryCursorPagination.page_size):
+            self.make_request()
+        body = self.client.get('/api/redemption-requests/history/').json()
+        self.assertEqual(len(body['results']), HistoryCursorPagination.page_size)
+        self.assertIsNotNone(body['next_cursor'])
+
+    def test_page_size_is_capped(self):
+        for _ in range(HistoryCursorPagination.max_page_size + 1 - len(self.requests)):
+            self.make_request()
+        body = self.client.get('/api/redemption-requests/history/?page_size=100000').json()
+        self.assertEqual(len(body['results']), HistoryCursorPagination.max_page_size)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = [
+            r.id for r in sorted(self.requests, key=lambda r: (r.date_requested, r.id), reverse=True)
+        ]
+        ids, pages = self._collect_pages('/api/redemption-requests/history/?page_size=2')
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/redemption-requests/history/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_filters(self):
+        other_team = Team.objects.create(name='South')
+        self.make_request(team=other_team, processing_status='CANCELLED')
+        url = '/api/redemption-requests/history/?page_size=50'
+
+        rows = self.client.get(f'{url}&team_id={other_team.id}').json()['results']
+        self.assertEqual([r['team_name'] for r in rows], ['South'])
+
+        rows = self.client.get(f'{url}&processing_status=cancelled').json()['results']
+        self.assertEqual(len(rows), 1)
+
+        today = timezone.now().date()
+        window = f'&date_from={today - timedelta(days=2)}&date_to={today - timedelta(days=1)}'
+        rows = self.client.get(url + window).json()['results']
+        self.assertEqual(len(rows), 3)
+
+        rows = self.client.get(f'{url}&entity_type=distributor&entity_id={self.distributor.id}').json()['results']
+        self.assertEqual(len(rows), len(self.requests) + 1)
+        self.assertEqual(self.client.get(f'{url}&entity_type=customer').json()['results'], [])
+
+        self.assertEqual(self.client.get(f'{url}&date_from=yesterday').status_code, 400)
+
+
+class SummaryViewTests(RequestFixturesMixin, TestCase):
+    """?view=summary returns flat rows from a single un-prefetched query."""
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.approver)
+
+    def test_summary_rows_are_flat_and_single_query(self):
+        for _ in range(5):
+            self.make_request(processed_notes=['note'], status='PENDING', requires_sales_approval=True)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/redemption-requests/?view=summary')
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual(len(rows), 5)
+        self.assertNotIn('items', rows[0])
+        self.assertEqual(rows[0]['requested_by_name'], 'Agent')
+        self.assertEqual(rows[0]['requested_for_name'], 'Acme Trading')
+        self.assertEqual(rows[0]['team_name'], 'North')
+        request_queries = [
+            q['sql'] for q in ctx.captured_queries if 'requests_redemptionrequest' in q['sql']
+        ]
+        self.assertEqual(len(request_queries), 1)
+
+    def test_detail_keeps_full_tree(self):
+        req = self.make_request(status='PENDING', requires_sales_approval=True)
+        response = self.client.get(f'/api/redemption-requests/{req.id}/?view=summary')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('items', response.json())
+
+
+class ProductPopularityCounterTests(RequestFixturesMixin, TestCase):
+    """Product.approved_request_count follows request status transitions."""
+
+    def _counter(self):
+        return Product.objects.get(pk=self.product.pk).approved_request_count
+
+    def test_approve_then_cancel(self):
+        req = self.make_request(status='PENDING', requires_sales_approval=True, sales_approval_status='PENDING')
+        client = Client()
+        client.force_login(self.approver)
+        response = client.post(f'/api/redemption-requests/{req.id}/approve/', {}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._counter(), 1)
+
+        client.force_login(self.admin)
+        response = client.post(
+            f'/api/redemption-requests/{req.id}/cancel_request/',
+            {'cancellation_reason': 'Out of season'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._counter(), 0)
+
+    def test_saves_without_transition_leave_counter_alone(self):
+        req = self.make_request(status='PENDING')
+        req.status = 'APPROVED'
+        req.save()
+        req.save()
+        req.refresh_from_db()
+        req.save(update_fields=['approver_remarks'])
+        self.assertEqual(self._counter(), 1)
+        req.status = 'REJECTED'
+        req.save()
+        self.assertEqual(self._counter(), 0)
+
+    def test_rebuild_command_repairs_drift(self):
+        # Created straight into APPROVED before its items exist, so the counter misses it
+        self.make_request()
+        self.make_request(processing_status='CANCELLED')
+        self.assertEqual(self._counter(), 0)
+        call_command('rebuild_product_popularity', stdout=StringIO())
+        self.assertEqual(self._counter(), 1)
+
+    def test_catalogue_popularity_ordering_uses_counter(self):
+        other = Product.objects.create(item_code='AAA-001', item_name='Aardvark Mug', points=5, stock=5)
+        Product.objects.filter(pk=self.product.pk).update(approved_request_count=3)
+        client = Client()
+        client.force_login(self.agent)
+        rows = client.get('/api/catalogue/?ordering=popularity').json()['results']
+        self.assertEqual([r['id'] for r in rows], [self.product.id, other.id])
+        self.assertEqual(rows[0]['request_count'], 3)
+
+
+class AnalyticsRollupTests(RequestFixturesMixin, TestCase):
+    """Dashboard analytics read from the daily rollups and match the raw aggregates."""
+
+    ENDPOINTS = [
+        'overview/', 'time-series/', 'time-series/?period=weekly', 'items/', 'agents/',
+        'teams/', 'entities/', 'entities/?type=customer',
+    ]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        now = timezone.now()
+        other_agent = make_user('agent2', 'Sales Agent')
+        other_distributor = Distributor.objects.create(name='Zenith Supply', points=100)
+        customer = Customer.objects.create(name='Corner Store')
+        mug = Product.objects.create(item_code='MUG-001', item_name='Mug', points=5, stock=100)
+        rows = [
+            # (age, agent, distributor, customer, team, status, processing_status, points, product, quantity)
+            (timedelta(days=400), self.agent, self.distributor, None, self.team, 'APPROVED', 'PROCESSED', 70, mug, 7),
+            (timedelta(days=40), self.agent, self.distributor, None, self.team, 'APPROVED', 'NOT_PROCESSED', 50, self.product, 5),
+            # Either side of the 30-day cut-off, possibly on the same calendar day
+            (timedelta(days=30, hours=1), other_agent, other_distributor, None, None, 'APPROVED', 'PROCESSED', 30, mug, 3),
+            (timedelta(days=29, hours=23), self.agent, None, customer, self.team, 'APPROVED', 'PROCESSED', 40, mug, 4),
+            (timedelta(days=3), self.agent, self.distributor, None, self.team, 'REJECTED', 'NOT_PROCESSED', 20, self.product, 2),
+            (timedelta(days=1), other_agent, other_distributor, None, None, 'APPROVED', 'CANCELLED', 60, self.product, 6),
+            (timedelta(hours=1), self.agent, self.distributor, None, self.team, 'PENDING', 'NOT_PROCESSED', 10, self.product, 1),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for age, agent, distributor, for_customer, team, status_, processing, points, product, quantity in rows:
+                req = RedemptionRequest.objects.create(
+                    requested_by=agent, requested_for=distributor, requested_for_customer=for_customer,
+                    team=team, status=status_, processing_status=processing, total_points=points,
+                    date_requested=now - age,
+                )
+                RedemptionRequestItem.objects.create(
+                    request=req, product=product, quantity=quantity,
+                    points_per_item=points // quantity, total_points=points,
+                )
+
+    def _responses(self):
+        responses = {}
+        for endpoint in self.ENDPOINTS:
+            for range_ in ('7', '30', '90', 'all'):
+                separator = '&' if '?' in endpoint else '?'
+                response = self.client.get(f'/api/dashboard/analytics/{endpoint}{separator}range={range_}')
+                self.assertEqual(response.status_code, 200, endpoint)
+                responses[(endpoint, range_)] = response.json()
+        return responses
+
+    def test_rollup_matches_raw_aggregates(self):
+        from_rollup = self._responses()
+        analytics_cache.invalidate()
+        with override_settings(ANALYTICS_USE_ROLLUP=False):
+            from_raw = self._responses()
+        for key, expected in from_raw.items():
+            self.assertEqual(from_rollup[key], expected, key)
+        overview = from_rollup[('overview/', 'all')]
+        self.assertEqual((overview['total_requests'], overview['total_points_redeemed']), (7, 250))
+
+    def test_status_transitions_refresh_the_day(self):
+        pending = RedemptionRequest.objects.get(status='PENDING')
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.status = 'APPROVED'
+            pending.save()
+        overview = self.client.get('/api/dashboard/analytics/overview/?range=7').json()
+        self.assertEqual((overview['pending_count'], overview['approved_count']), (0, 2))
+        items = self.client.get('/api/dashboard/analytics/items/?range=7').json()
+        self.assertEqual(items[0]['total_quantity'], 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.delete()
+        overview = self.client.get('/api/dashboard/analytics/overview/?range=7').json()
+        self.assertEqual((overview['total_requests'], overview['approved_count']), (2, 1))
+
+    def test_saves_without_rollup_changes_skip_refresh(self):
+        req = RedemptionRequest.objects.get(status='PENDING')
+        with self.captureOnCommitCallbacks() as callbacks:
+            req.save(update_fields=['approver_remarks'])
+            req.save()
+        self.assertEqual(callbacks, [])
+
+    def test_rebuild_command_repairs_drift(self):
+        RequestDailyRollup.objects.filter(status='REJECTED').delete()
+        out = StringIO()
+        call_command('rebuild_analytics_rollup', '--dry-run', stdout=out)
+        self.assertIn('1 day(s) have drifted', out.getvalue())
+        call_command('rebuild_analytics_rollup', stdout=StringIO())
+        overview = self.client.get('/api/dashboard/analytics/overview/?range=all').json()
+        self.assertEqual(overview['rejected_count'], 1)
+
+
+class AnalyticsCacheTests(RequestFixturesMixin, TestCase):
+    """Analytics responses are cached per view + params and dropped on status changes."""
+
+    def setUp(self):
+        analytics_cache.invalidate()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def _overview(self, query='range=30'):
+        return self.client.get(f'/api/dashboard/analytics/overview/?{query}')
+
+    def test_hits_misses_and_invalidation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            req = self.make_request(status='PENDING')
+        before = analytics_cache.stats()
+
+        first = self._overview()
+        self.assertEqual(first['X-Analytics-Cache'], 'MISS')
+        second = self._overview()
+        self.assertEqual(second['X-Analytics-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(self._overview('range=7')['X-Analytics-Cache'], 'MISS')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            req.status = 'APPROVED'
+            req.save()
+        after = self._overview()
+        self.assertEqual(after['X-Analytics-Cache'], 'MISS')
+        self.assertEqual((after.json()['pending_count'], after.json()['approved_count']), (0, 1))
+
+        stats = self.client.get('/api/dashboard/analytics/cache-stats/').json()
+        self.assertEqual(stats['hits'] - before['hits'], 1)
+        self.assertEqual(stats['misses'] - before['misses'], 3)
+
+    def test_non_admins_never_see_cached_responses(self):
+        self._overview()
+        client = Client()
+        client.force_login(self.agent)
+        response = client.get('/api/dashboard/analytics/overview/?range=30')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(client.get('/api/dashboard/analytics/cache-stats/').status_code, 403)
+
+    def test_user_and_team_stats_are_not_cached(self):
+        # They read profiles and memberships, which do not invalidate the cache
+        url = f'/api/dashboard/analytics/team-stats/?team_id={self.team.id}'
+        first = self.client.get(url)
+        self.assertNotIn('X-Analytics-Cache', first)
+        self.assertEqual(first.json()['stats']['member_count'], 1)
+        TeamMembership.objects.filter(team=self.team).delete()
+        self.assertEqual(self.client.get(url).json()['stats']['member_count'], 0)
+
+        response = self.client.get(f'/api/dashboard/analytics/user-stats/?user_id={self.agent.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Analytics-Cache', response)
+
+
+class AnalyticsQueryCountTests(RequestFixturesMixin, TestCase):
+    """Agent and team analytics resolve names and member stats in bulk."""
+
+    def setUp(self):
+        self.client = Client()
+        login(self.client, self.admin)
+
+    def _add_agents(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_agents(count)
+
+    def _create_agents(self, count):
+        for i in range(count):
+            agent = make_user(f'extra{i}', 'Sales Agent')
+            TeamMembership.objects.create(team=self.team, user=agent)
+            RedemptionRequest.objects.create(
+                requested_by=agent, requested_for=self.distributor, team=self.team,
+                status='APPROVED', total_points=10 * (i + 1),
+            )
+
+    def _queries(self, url):
+        analytics_cache.invalidate()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_agents_query_count_is_constant(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_request()
+        few, _ = self._queries('/api/dashboard/analytics/agents/?range=all&limit=50')
+        self._add_agents(5)
+        many, rows = self._queries('/api/dashboard/analytics/agents/?range=all&limit=50')
+        self.assertEqual(few, many)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({row['team_name'] for row in rows}, {'North'})
+        self.assertIn('Extra4', {row['agent_name'] for row in rows})
+
+    def test_team_member_breakdown_query_count_is_constant(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_request()
+        url = f'/api/dashboard/analytics/team-stats/?team_id={self.team.id}'
+        few, _ = self._queries(url)
+        self._add_agents(5)
+        many, body = self._queries(url)
+        self.assertEqual(few, many)
+        breakdown = body['member_breakdown']
+        self.assertEqual(len(breakdown), 6)
+        self.assertEqual(max(m['total_points_redeemed'] for m in breakdown), 50)
+        self.assertEqual(sum(m['total_requests'] for m in breakdown), 6)
+
+
+class AnalyticsExportTests(RequestFixturesMixin, TestCase):
+    """Drill-down exports stream every row; the JSON responses stay capped."""
+
+    def setUp(self):
+        self.client = Client()
+        login(self.client, self.admin)
+
+    def _add_requests(self, count):
+        requests = RedemptionRequest.objects.bulk_create([
+            RedemptionRequest(
+                requested_by=self.agent, requested_for=self.distributor, team=self.team,
+                status='APPROVED', total_points=10, reviewed_by=self.approver,
+                date_reviewed=timezone.now(),
+            )
+            for _ in range(count)
+        ])
+        RedemptionRequestItem.objects.bulk_create([
+            RedemptionRequestItem(request=req, product=self.product, quantity=1, points_per_item=10, total_points=10)
+            for req in requests
+        ])
+
+    def _export(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            content = b''.join(response.streaming_content)
+        return len(ctx.captured_queries), response, content
+
+    def test_csv_export_is_not_capped(self):
+        self._add_requests(510)
+        url = f'/api/dashboard/analytics/item-requests/?product_id={self.product.id}&range=all'
+        self.assertEqual(len(self.client.get(url).json()), 500)
+
+        _, response, content = self._export(url + '&export=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment;', response['Content-Disposition'])
+        self.assertNotIn('X-Analytics-Cache', response)
+        lines = content.decode().splitlines()
+        self.assertEqual(len(lines), 511)
+        self.assertTrue(lines[0].startswith('request_id,date_requested,agent,team'))
+        self.assertIn('Approver', lines[1])
+
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+
+        self._add_requests(3)
+        _, response, content = self._export(
+            f'/api/dashboard/analytics/agent-requests/?agent_id={self.agent.id}&range=all&export=xlsx'
+        )
+        self.assertIn('.xlsx"', response['Content-Disposition'])
+        rows = list(load_workbook(BytesIO(content), read_only=True).active.iter_rows(values_only=True))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][:2], ('request_id', 'date_requested'))
+        self.assertEqual(rows[1][4], 'Platinum Cap x1')
+
+    def test_export_query_count_does_not_grow_with_rows(self):
+        url = f'/api/dashboard/analytics/agent-requests/?agent_id={self.agent.id}&range=all&export=csv'
+        self._add_requests(2)
+        few, _, _ = self._export(url)
+        self._add_requests(50)
+        many, _, content = self._export(url)
+        self.assertEqual(few, many)
+        self.assertEqual(len(content.decode().splitlines()), 53)
+
+    def test_unknown_export_format_is_rejected(self):
+        response = self.client.get(
+            f'/api/dashboard/analytics/item-requests/?product_id={self.product.id}&export=pdf'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class TurnaroundStatsTests(RequestFixturesMixin, TestCase):
+    """Turnaround averages and percentiles come from a single aggregate pass."""
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        analytics_cache.invalidate()
+        now = timezone.now()
+        for hours in (1, 2, 3, 4, 5):
+            req = self.make_request(reviewed_by=self.approver)
+            RedemptionRequest.objects.filter(pk=req.pk).update(
+                date_requested=now - timedelta(hours=10),
+                date_reviewed=now - timedelta(hours=10 - hours),
+                date_processed=now if hours == 5 else None,
+            )
+        self.make_request(status='PENDING')
+
+    def test_overall_percentiles(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/dashboard/analytics/turnaround/?range=all')
+        self.assertEqual(response.status_code, 200)
+        overall = response.json()['overall']
+        self.assertEqual(overall['request_to_review_count'], 5)
+        self.assertEqual(overall['avg_request_to_review_hours'], 3.0)
+        self.assertEqual(overall['p50_request_to_review_hours'], 3.0)
+        self.assertEqual(overall['p90_request_to_review_hours'], 4.6)
+        self.assertEqual(overall['avg_review_to_process_hours'], 5.0)
+        self.assertEqual(overall['p90_total_hours'], 10.0)
+        # Session/user lookups, then one stats query and one trend query
+        stats_queries = [q for q in ctx.captured_queries if 'redemption' in q['sql'].lower()]
+        self.assertEqual(len(stats_queries), 2)
+
+    def test_approver_and_team_stats_include_percentiles(self):
+        stats = self.client.get(f'/api/dashboard/analytics/user-stats/?user_id={self.approver.id}').json()['stats']
+        self.assertEqual(stats['total_reviewed'], 5)
+        self.assertEqual(stats['avg_review_hours'], 3.0)
+        self.assertEqual(stats['p50_review_hours'], 3.0)
+        self.assertEqual(stats['p90_review_hours'], 4.6)
+
+        stats = self.client.get(f'/api/dashboard/analytics/team-stats/?team_id={self.team.id}').json()['stats']
+        self.assertEqual(stats['total_requests'], 6)
+        self.assertEqual(stats['p50_turnaround_hours'], 3.0)
+        self.assertEqual(stats['avg_processing_hours'], 5.0)
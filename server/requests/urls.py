@@ -22,6 +22,7 @@ from .analytics import (
     AnalyticsAgentRequestsView,
     UserAnalyticsView,
     TeamAnalyticsView,
+    AnalyticsCacheStatsView,
 )
 
 router = DefaultRouter()
@@ -47,5 +48,6 @@ urlpatterns = [
     path('dashboard/analytics/agent-requests/', AnalyticsAgentRequestsView.as_view(), name='analytics-agent-requests'),
     path('dashboard/analytics/user-stats/', UserAnalyticsView.as_view(), name='analytics-user-stats'),
     path('dashboard/analytics/team-stats/', TeamAnalyticsView.as_view(), name='analytics-team-stats'),
+    path('dashboard/analytics/cache-stats/', AnalyticsCacheStatsView.as_view(), name='analytics-cache-stats'),
     path('', include(router.urls)),
 ]
@@ -10,6 +10,7 @@ import logging
 from .models import RedemptionRequest, RedemptionRequestItem, ItemFulfillmentLog, ProcessingPhoto, ApprovalStatusChoice, RequestStatus, RequestedForType, AcknowledgementReceiptStatus, ProcessingStatus
 from .serializers import (
     RedemptionRequestSerializer, 
+    RedemptionRequestSummarySerializer,
     CreateRedemptionRequestSerializer,
     RedemptionRequestItemSerializer,
     PartialFulfillmentSerializer,
@@ -24,6 +25,7 @@ from utils.email_service import (
 )
 from utils.sse import publish_sse_event
 from users.models import UserProfile
+from users.roles import role_directory
 from distributers.models import Distributor
 from customers.models import Customer
 from points_audit.utils import log_points_change, bulk_log_points_changes, generate_batch_id
@@ -74,11 +76,36 @@ def _build_base_queryset():
     )
 
 
+def _build_summary_queryset():
+    """
+    Flat queryset backing RedemptionRequestSummarySerializer: joins only the
+    relations the summary columns read and defers everything else. No
+    prefetches, so a list page is a single query.
+    """
+    return RedemptionRequest.objects.select_related(
+        'requested_by__profile',
+        'requested_for',
+        'requested_for_customer',
+        'team',
+    ).only(
+        'id', 'requested_for_type', 'total_points', 'status', 'processing_status',
+        'sales_approval_status', 'ar_status', 'date_requested', 'requires_sales_approval',
+        'requested_by__username', 'requested_by__profile__full_name',
+        'requested_for__name', 'requested_for_customer__name', 'team__name',
+    )
+
+
 class RedemptionRequestViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = RedemptionRequestSerializer
 
+    def _is_summary_view(self):
+        """?view=summary on the list endpoint returns the slim summary rows."""
+        return self.action == 'list' and self.request.query_params.get('view') == 'summary'
+
     def _base_queryset(self):
+        if self._is_summary_view():
+            return _build_summary_queryset()
         return _build_base_queryset()
 
     def get_queryset(self):
@@ -142,6 +169,8 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'create':
             return CreateRedemptionRequestSerializer
+        if self._is_summary_view():
+            return RedemptionRequestSummarySerializer
         return RedemptionRequestSerializer
 
     def create(self, request, *args, **kwargs):
@@ -191,8 +220,7 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
         
         if not approvers_emails:
             logger.warning(f"⚠ No team approver email found for request #{redemption_request.id}, falling back to all approvers")
-            approvers = UserProfile.objects.filter(position='Approver').exclude(email__isnull=True).exclude(email='')
-            approvers_emails = list(approvers.values_list('email', flat=True))
+            approvers_emails = role_directory.emails('Approver', notifications_only=False)
 
         if approvers_emails:
             logger.info(f"New request #{redemption_request.id} created, sending notification to approvers...")
@@ -218,11 +246,7 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
             sse_targets.append(redemption_request.team.approver_id)
         # Also notify admins if auto-approved (no sales approval needed)
         if not redemption_request.requires_sales_approval:
-            admin_ids = list(
-                UserProfile.objects.filter(position='Admin')
-                .values_list('user_id', flat=True)
-            )
-            sse_targets.extend(admin_ids)
+            sse_targets.extend(role_directory.admin_ids())
         if sse_targets:
             publish_sse_event('request_created', {
                 'request_id': redemption_request.id,
@@ -346,11 +370,7 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
 
         # SSE: notify sales agent + admins about approval
         sse_targets = [redemption_request.requested_by_id]
-        admin_ids = list(
-            UserProfile.objects.filter(position='Admin')
-            .values_list('user_id', flat=True)
-        )
-        sse_targets.extend(admin_ids)
+        sse_targets.extend(role_directory.admin_ids())
         publish_sse_event('request_approved', {
             'request_id': redemption_request.id,
             'status': redemption_request.status,
@@ -665,12 +685,7 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
 
         # SSE: notify sales agent + admins about cancellation
         sse_targets = [redemption_request.requested_by_id]
-        admin_ids = list(
-            UserProfile.objects.filter(position='Admin')
-            .exclude(user_id=request.user.id)
-            .values_list('user_id', flat=True)
-        )
-        sse_targets.extend(admin_ids)
+        sse_targets.extend(role_directory.admin_ids() - {request.user.id})
         publish_sse_event('request_cancelled', {
             'request_id': redemption_request.id,
         }, target_users=sse_targets)
@@ -919,7 +934,12 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
                         item.save(update_fields=['fulfilled_quantity'])
 
                         # Deduct actual stock and release committed reservation for fulfilled units
-                        product.deduct_stock(fulfill_qty)
+                        if not product.deduct_stock(fulfill_qty):
+                            transaction.set_rollback(True)
+                            return Response(
+                                {'error': f'Insufficient stock on hand for {product.item_code} to fulfill {fulfill_qty} unit(s)'},
+                                status=status.HTTP_409_CONFLICT
+                            )
 
                         # Create audit log
                         ItemFulfillmentLog.objects.create(
@@ -951,7 +971,12 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
                         item.item_processed_at = now
                         item.save(update_fields=['item_processed_by', 'item_processed_at'])
 
-                        product.deduct_stock(item.quantity)
+                        if not product.deduct_stock(item.quantity):
+                            transaction.set_rollback(True)
+                            return Response(
+                                {'error': f'Insufficient stock on hand for {product.item_code} to fulfill {item.quantity} unit(s)'},
+                                status=status.HTTP_409_CONFLICT
+                            )
 
                         ItemFulfillmentLog.objects.create(
                             item=item,
@@ -998,11 +1023,7 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
         serializer_out = self.get_serializer(redemption_request)
 
         # SSE: notify admins + sales agent about items processing
-        sse_targets = list(
-            UserProfile.objects.filter(position='Admin')
-            .exclude(user_id=request.user.id)
-            .values_list('user_id', flat=True)
-        )
+        sse_targets = list(role_directory.admin_ids() - {request.user.id})
         if is_complete:
             sse_targets.append(redemption_request.requested_by_id)
             if redemption_request.team and redemption_request.team.approver_id:
@@ -1158,10 +1179,7 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(redemption_request)
 
         # SSE: notify admins about AR upload
-        admin_ids = list(
-            UserProfile.objects.filter(position='Admin')
-            .values_list('user_id', flat=True)
-        )
+        admin_ids = list(role_directory.admin_ids())
         if admin_ids:
             publish_sse_event('ar_uploaded', {
                 'request_id': redemption_request.id,
@@ -1230,7 +1248,12 @@ class RedemptionRequestViewSet(viewsets.ModelViewSet):
 
 
 from rest_framework.views import APIView
+from rest_framework.pagination import BasePagination
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
 from django.db.models import Count, Q
+import base64
+import binascii
 
 class DashboardStatsView(APIView):
     """
@@ -1525,8 +1548,157 @@ class ApproverDashboardStatsView(APIView):
         })
 
 
+HISTORY_ENTITY_FIELDS = {
+    'distributor': ('DISTRIBUTOR', 'requested_for_id'),
+    'customer': ('CUSTOMER', 'requested_for_customer_id'),
+    'self': ('SELF', None),
+}
+
+
+def _apply_history_filters(queryset, params):
+    """
+    Apply the optional history filters shared by the Admin and Handler history views.
+
+    Supported query params:
+      status             comma-separated approval statuses (PENDING, APPROVED, ...)
+      processing_status  comma-separated processing statuses (PROCESSED, CANCELLED, ...)
+      team_id            team the request belongs to
+      date_from/date_to  inclusive YYYY-MM-DD window on date_requested
+      entity_type        distributor | customer | self
+      entity_id          distributor/customer id (requires entity_type)
+    """
+    from datetime import datetime, time, timedelta
+    from rest_framework.exceptions import ValidationError
+
+    status_param = params.get('status', '').strip()
+    if status_param:
+        queryset = queryset.filter(status__in=[s.strip().upper() for s in status_param.split(',') if s.strip()])
+
+    processing_param = params.get('processing_status', '').strip()
+    if processing_param:
+        queryset = queryset.filter(
+            processing_status__in=[s.strip().upper() for s in processing_param.split(',') if s.strip()]
+        )
+
+    team_id = params.get('team_id')
+    if team_id:
+        if not team_id.isdigit():
+            raise ValidationError({'team_id': 'Must be an integer'})
+        queryset = queryset.filter(team_id=int(team_id))
+
+    # Compare against aware day boundaries (not __date) so req_date_requested_idx is usable
+    for param, lookup, day_offset in (('date_from', 'date_requested__gte', 0), ('date_to', 'date_requested__lt', 1)):
+        value = params.get(param)
+        if not value:
+            continue
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValidationError({param: 'Must be a date in YYYY-MM-DD format'})
+        boundary = timezone.make_aware(datetime.combine(day + timedelta(days=day_offset), time.min))
+        queryset = queryset.filter(**{lookup: boundary})
+
+    entity_type = params.get('entity_type', '').strip().lower()
+    entity_id = params.get('entity_id')
+    if entity_type:
+        if entity_type not in HISTORY_ENTITY_FIELDS:
+            raise ValidationError({'entity_type': 'Must be one of: distributor, customer, self'})
+        requested_for_type, id_field = HISTORY_ENTITY_FIELDS[entity_type]
+        queryset = queryset.filter(requested_for_type=requested_for_type)
+        if entity_id:
+            if id_field is None or not entity_id.isdigit():
+                raise ValidationError({'entity_id': 'Must be an integer distributor or customer id'})
+            queryset = queryset.filter(**{id_field: int(entity_id)})
+    elif entity_id:
+        raise ValidationError({'entity_id': 'entity_type is required when filtering by entity_id'})
+
+    return queryset
+
+
+class HistoryCursorPagination(BasePagination):
+    """
+    Keyset pagination over (date_requested, id), newest first.
+
+    Each page is fetched with a WHERE on the last row's (date_requested, id)
+    instead of an OFFSET, so deep pages cost the same as the first one and
+    the range scan is served by req_date_requested_idx. No COUNT is issued.
+    Always applied: a request without ?cursor gets the first page.
+    """
+    page_size = 25
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-date_requested', '-id')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj):
+        raw = f"{obj.date_requested.isoformat()}|{obj.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        from datetime import datetime
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            date_str, id_str = raw.rsplit('|', 1)
+            return datetime.fromisoformat(date_str), int(id_str)
+        except (ValueError, TypeError, UnicodeDecodeError, binascii.Error):
+            raise NotFound('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            last_date, last_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(date_requested__lt=last_date) | Q(date_requested=last_date, id__lt=last_id)
+            )
+
+        # Fetch one extra row to know whether another page exists
+        rows = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
+
+
+def _history_response(request, queryset):
+    """Serialize one cursor page of a filtered history queryset."""
+    queryset = _apply_history_filters(queryset, request.query_params)
+    paginator = HistoryCursorPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = RedemptionRequestSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
 class ProcessedRequestHistoryView(APIView):
-    """View for getting all processed redemption requests (Admin only)"""
+    """
+    View for getting all processed redemption requests (Admin only).
+
+    Accepts the filters documented on _apply_history_filters. Results are
+    keyset-paginated (HistoryCursorPagination): follow `next` (or pass
+    `next_cursor` as ?cursor=) for older requests; ?page_size= caps at 100.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
@@ -1540,18 +1712,18 @@ class ProcessedRequestHistoryView(APIView):
                 'error': 'Access denied. Admin role required.'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        all_requests = _build_base_queryset().order_by('-date_requested')
-        serializer = RedemptionRequestSerializer(all_requests, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return _history_response(request, _build_base_queryset())
 
 
 class HandlerHistoryView(APIView):
-    """View for getting processed requests where the current handler user has processed items"""
+    """
+    View for getting processed requests where the current handler user has processed items.
+    Supports the same filters and cursor pagination as ProcessedRequestHistoryView.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
         """Get all requests where the current handler user has processed items"""
-        from django.db.models import Q
         user = request.user
         profile = getattr(user, 'profile', None)
         
@@ -1571,6 +1743,5 @@ class HandlerHistoryView(APIView):
                 ProcessingStatus.PROCESSED,
                 ProcessingStatus.CANCELLED
             ]
-        ).distinct().order_by('-date_requested')
-        serializer = RedemptionRequestSerializer(processed_requests, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        ).distinct()
+        return _history_response(request, processed_requests)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import UserProfile, LoginAttempt
+from .models import UserProfile, LoginAttempt, LoginThrottle
 
 
 class UserProfileInline(admin.StackedInline):
@@ -79,4 +79,19 @@ class LoginAttemptAdmin(admin.ModelAdmin):
         count = queryset.count()
         queryset.delete()
         self.message_user(request, f'{count} login attempt record(s) deleted.')
-    clear_attempts.short_description = 'Delete selected login attempts (unlocks account)'
+    clear_attempts.short_description = 'Delete selected login attempts'
+
+
+@admin.register(LoginThrottle)
+class LoginThrottleAdmin(admin.ModelAdmin):
+    list_display = ['key', 'failures', 'window_started_at']
+    search_fields = ['key']
+    readonly_fields = ['key', 'failures', 'window_started_at']
+    ordering = ['-window_started_at']
+    actions = ['reset_throttles']
+
+    def reset_throttles(self, request, queryset):
+        count = queryset.count()
+        queryset.delete()
+        self.message_user(request, f'{count} login throttle(s) reset.')
+    reset_throttles.short_description = 'Reset selected throttles (unlocks account / IP)'
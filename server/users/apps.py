@@ -3,3 +3,17 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+        from django.db.models.signals import post_delete, post_save
+
+        from .models import UserProfile, track_login_session
+        from .roles import invalidate_role_directory
+
+        # Position/email changes must be visible to SSE and email targeting
+        post_save.connect(invalidate_role_directory, sender=UserProfile, dispatch_uid='users.role_directory.save')
+        post_delete.connect(invalidate_role_directory, sender=UserProfile, dispatch_uid='users.role_directory.delete')
+
+        # Session -> user mapping used by single-session enforcement at login
+        user_logged_in.connect(track_login_session, dispatch_uid='users.user_session.login')
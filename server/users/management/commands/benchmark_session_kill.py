@@ -0,0 +1,99 @@
+"""
+Management command to measure single-session enforcement at login.
+
+Seeds N active sessions spread over M users inside a transaction that is
+rolled back afterwards (nothing is left behind), then times ending one
+user's other sessions two ways: the legacy scan that decodes every active
+session, and the indexed UserSession lookup used by LoginView.
+
+Usage:
+    python manage.py benchmark_session_kill                     # 10k sessions, 500 users
+    python manage.py benchmark_session_kill --sessions 50000 --users 2000
+"""
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.base import VALID_KEY_CHARS
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from users.models import UserSession
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _legacy_kill(user):
+    """The pre-UserSession implementation: decode every active session."""
+    user_id_str = str(user.pk)
+    for session in Session.objects.filter(expire_date__gte=timezone.now()):
+        if session.get_decoded().get('_auth_user_id') == user_id_str:
+            session.delete()
+
+
+class Command(BaseCommand):
+    help = "Benchmark ending a user's other sessions with many active sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sessions", type=int, default=10000, help="Active sessions to seed")
+        parser.add_argument("--users", type=int, default=500, help="Users owning those sessions")
+        parser.add_argument("--rounds", type=int, default=5, help="Logins timed per implementation")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n=== Session kill benchmark: {options['sessions']:,} sessions, {options['users']:,} users ===\n"
+        ))
+        self.stdout.write(f"{'lookup':<10} {'avg ms':>10} {'queries':>9}")
+        try:
+            with transaction.atomic():
+                users, seeded = self._seed(options)
+                for label, kill in (
+                    ("decode", _legacy_kill),
+                    ("indexed", lambda user: UserSession.end_other_sessions(user)),
+                ):
+                    elapsed, queries = self._time(kill, users[:options['rounds']])
+                    self.stdout.write(f"{label:<10} {elapsed * 1000:>10.1f} {queries:>9.0f}")
+                    # Both runs must start from the same population
+                    transaction.savepoint_rollback(seeded)
+                raise _Rollback
+        except _Rollback:
+            pass
+        self.stdout.write(self.style.SUCCESS("\nDone (seed data rolled back)"))
+
+    def _seed(self, options):
+        stamp = int(time.time())
+        users = User.objects.bulk_create([
+            User(username=f"bench-session-{stamp}-{index}") for index in range(options['users'])
+        ])
+        if not users[0].pk:
+            users = list(User.objects.filter(username__startswith=f"bench-session-{stamp}-").order_by('pk'))
+
+        store = SessionStore()
+        expire = timezone.now() + timedelta(hours=8)
+        sessions, owners = [], []
+        for index in range(options['sessions']):
+            user = users[index % len(users)]
+            key = get_random_string(32, VALID_KEY_CHARS)
+            sessions.append(Session(
+                session_key=key, expire_date=expire,
+                session_data=store.encode({'_auth_user_id': str(user.pk)}),
+            ))
+            owners.append(UserSession(session_id=key, user=user))
+        Session.objects.bulk_create(sessions, batch_size=2000)
+        UserSession.objects.bulk_create(owners, batch_size=2000)
+        return users, transaction.savepoint()
+
+    def _time(self, kill, users):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for user in users:
+                kill(user)
+            elapsed = time.perf_counter() - start
+        return elapsed / len(users), len(ctx.captured_queries) / len(users)
@@ -0,0 +1,42 @@
+"""
+Management command to prune login lockout bookkeeping.
+
+Lockouts are decided by LoginThrottle counters; the per-attempt
+login_attempts rows are no longer read or written. This deletes those legacy
+rows and any throttle whose failure window has closed.
+
+Usage:
+    python manage.py purge_login_attempts            # Delete legacy rows and expired throttles
+    python manage.py purge_login_attempts --dry-run  # Only report what would be deleted
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import LoginAttempt, LoginThrottle
+
+
+class Command(BaseCommand):
+    help = "Delete legacy login_attempts rows and expired login throttles"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows would be deleted",
+        )
+
+    def handle(self, *args, **options):
+        attempts = LoginAttempt.objects.all()
+        expired = LoginThrottle.objects.filter(window_started_at__lte=timezone.now() - LoginThrottle.window())
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(
+                f"Would delete {attempts.count()} login attempt(s) and {expired.count()} expired throttle(s) (dry run)"
+            ))
+            return
+
+        attempt_count, _ = attempts.delete()
+        throttle_count, _ = expired.delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {attempt_count} login attempt(s) and {throttle_count} expired throttle(s)"
+        ))
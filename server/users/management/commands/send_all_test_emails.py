@@ -83,7 +83,8 @@ class Command(BaseCommand):
                     subject=subject,
                     template_name=template_name,
                     context=context,
-                    recipient_list=[recipient]
+                    recipient_list=[recipient],
+                    immediate=True,
                 )
                 
                 if success:
@@ -76,6 +76,7 @@ class Command(BaseCommand):
                            f'SMTP Host: {settings.EMAIL_HOST}:{settings.EMAIL_PORT}\n\n'
                            'Best regards,\nPoints Redemption System',
                     recipient_list=[recipient],
+                    immediate=True,
                 )
             else:
                 # Send HTML email using template
@@ -152,7 +153,8 @@ class Command(BaseCommand):
                     subject=subject,
                     template_name=template_path,
                     context=context,
-                    recipient_list=[recipient]
+                    recipient_list=[recipient],
+                    immediate=True,
                 )
             
             self.stdout.write(self.style.NOTICE('-' * 60))
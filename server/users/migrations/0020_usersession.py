@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_user_sessions(apps, schema_editor):
+    """Map the sessions that are still active to their users (one-off decode)."""
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.utils import timezone
+
+    Session = apps.get_model('sessions', 'Session')
+    UserSession = apps.get_model('users', 'UserSession')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    decoder = SessionStore()
+    owners = {}
+    for session_key, session_data in (
+        Session.objects.filter(expire_date__gte=timezone.now()).values_list('session_key', 'session_data').iterator()
+    ):
+        user_id = decoder.decode(session_data).get('_auth_user_id')
+        if user_id is not None:
+            owners[session_key] = int(user_id)
+
+    existing = set(User.objects.filter(pk__in=set(owners.values())).values_list('pk', flat=True))
+    UserSession.objects.bulk_create(
+        [
+            UserSession(session_id=session_key, user_id=user_id)
+            for session_key, user_id in owners.items()
+            if user_id in existing
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sessions', '0001_initial'),
+        ('users', '0019_userprofile_email_notifications_enabled_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSession',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='user_session', serialize=False, to='sessions.session')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='login_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'user_sessions',
+            },
+        ),
+        migrations.RunPython(backfill_user_sessions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0020_usersession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginThrottle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('window_started_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'login_throttles',
+            },
+        ),
+    ]
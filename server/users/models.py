@@ -1,10 +1,17 @@
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from django.conf import settings
 
 
 class LoginAttempt(models.Model):
-    """Tracks failed login attempts per username for rate-limiting / lockout."""
+    """Legacy per-attempt failure log.
+
+    Lockout state now lives in LoginThrottle (one counter row per
+    username). The classmethods below keep their original signatures but no longer
+    insert or count rows here; `manage.py purge_login_attempts` removes the
+    old rows.
+    """
 
     username = models.CharField(max_length=150, db_index=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
@@ -20,42 +27,167 @@ class LoginAttempt(models.Model):
     # ---- helpers --------------------------------------------------------
 
     LOCKOUT_THRESHOLD = 5          # max failures before lockout
-    LOCKOUT_WINDOW_MINUTES = 15    # rolling window for counting failures
+    LOCKOUT_WINDOW_MINUTES = 15    # window for counting failures
 
     @classmethod
     def recent_failures(cls, username):
         """Return the number of failed attempts within the lockout window."""
-        cutoff = timezone.now() - timezone.timedelta(minutes=cls.LOCKOUT_WINDOW_MINUTES)
-        return cls.objects.filter(username=username, attempted_at__gte=cutoff).count()
+        return cls.lockout_state(username)[0]
 
     @classmethod
     def is_locked_out(cls, username):
-        return cls.recent_failures(username) >= cls.LOCKOUT_THRESHOLD
+        return cls.lockout_seconds_remaining(username) > 0
 
     @classmethod
     def record_failure(cls, username, ip_address=None):
-        cls.objects.create(username=username, ip_address=ip_address)
+        # ip_address is accepted for the original signature; lockouts are per username only
+        LoginThrottle.hit(LoginThrottle.user_key(username))
 
     @classmethod
     def clear_failures(cls, username):
-        """Remove all failure records for this username (called on successful login)."""
-        cls.objects.filter(username=username).delete()
+        """Reset the failure counter for this username (called on successful login)."""
+        LoginThrottle.objects.filter(key=LoginThrottle.user_key(username)).delete()
 
     @classmethod
     def lockout_seconds_remaining(cls, username):
-        """Seconds until the oldest relevant failure falls outside the window."""
-        cutoff = timezone.now() - timezone.timedelta(minutes=cls.LOCKOUT_WINDOW_MINUTES)
-        oldest = (
-            cls.objects
-            .filter(username=username, attempted_at__gte=cutoff)
-            .order_by('attempted_at')
-            .first()
+        """Seconds until the username's failure window closes (0 if not locked)."""
+        return cls.lockout_state(username)[1]
+
+    @classmethod
+    def lockout_state(cls, username):
+        """Return (failures in the window, lockout seconds remaining) in one query."""
+        throttles = LoginThrottle.active([LoginThrottle.user_key(username)])
+        if not throttles:
+            return 0, 0
+        throttle = throttles[0]
+        seconds = throttle.seconds_remaining() if throttle.failures >= cls.LOCKOUT_THRESHOLD else 0
+        return throttle.failures, seconds
+
+    @classmethod
+    def locked_usernames(cls):
+        """Usernames currently locked out, in one query (for user lists)."""
+        return {
+            throttle.key[len(LoginThrottle.USER_PREFIX):]
+            for throttle in LoginThrottle.active_since().filter(
+                key__startswith=LoginThrottle.USER_PREFIX, failures__gte=cls.LOCKOUT_THRESHOLD,
+            )
+        }
+
+
+class LoginThrottle(models.Model):
+    """Fixed-window failed-login counter, one row per username.
+
+    The window opens at the first failure and lasts
+    LoginAttempt.LOCKOUT_WINDOW_MINUTES; a failure after it closes starts a
+    new window. hit() is a single conditional UPDATE (an INSERT the first
+    time), and lockout checks read at most one row per key.
+    """
+
+    USER_PREFIX = 'user:'
+
+    key = models.CharField(max_length=200, unique=True)
+    failures = models.PositiveIntegerField(default=0)
+    window_started_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'login_throttles'
+
+    def __str__(self):
+        return f"{self.key}: {self.failures}"
+
+    @classmethod
+    def user_key(cls, username):
+        return f"{cls.USER_PREFIX}{username}"
+
+    @staticmethod
+    def window():
+        return timezone.timedelta(minutes=LoginAttempt.LOCKOUT_WINDOW_MINUTES)
+
+    @classmethod
+    def active_since(cls, now=None):
+        """Throttles whose window is still open."""
+        return cls.objects.filter(window_started_at__gt=(now or timezone.now()) - cls.window())
+
+    @classmethod
+    def active(cls, keys):
+        return list(cls.active_since().filter(key__in=list(keys)))
+
+    @classmethod
+    def hit(cls, key):
+        """Count one failure for `key`, opening a new window if the last one closed."""
+        from django.db import IntegrityError, transaction
+        from django.db.models import Case, F, Value, When
+
+        now = timezone.now()
+        in_window = Q(window_started_at__gt=now - cls.window())
+        # Both CASEs see the pre-update row, so the window check is consistent
+        updated = cls.objects.filter(key=key).update(
+            failures=Case(When(in_window, then=F('failures') + 1), default=Value(1)),
+            window_started_at=Case(When(in_window, then=F('window_started_at')), default=Value(now)),
         )
-        if oldest is None:
-            return 0
-        unlock_at = oldest.attempted_at + timezone.timedelta(minutes=cls.LOCKOUT_WINDOW_MINUTES)
-        remaining = (unlock_at - timezone.now()).total_seconds()
-        return max(int(remaining), 0)
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(key=key, failures=1, window_started_at=now)
+        except IntegrityError:
+            # A concurrent failure created the row first
+            cls.hit(key)
+
+    def seconds_remaining(self):
+        unlock_at = self.window_started_at + self.window()
+        return max(int((unlock_at - timezone.now()).total_seconds()), 0)
+
+
+class UserSession(models.Model):
+    """Owner of each authenticated Django session.
+
+    Single-session enforcement looks a user's sessions up here by user_id
+    instead of decoding every row of django_session. Rows are written on
+    login (user_logged_in, see UsersConfig.ready()) and cascade away with
+    their session on logout, key cycling and clearsessions.
+    """
+
+    session = models.OneToOneField(
+        'sessions.Session', on_delete=models.CASCADE, primary_key=True, related_name='user_session',
+    )
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='login_sessions')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'user_sessions'
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.session_id}"
+
+    @classmethod
+    def track(cls, user, session_key):
+        """Record that `session_key` belongs to `user`."""
+        if session_key:
+            cls.objects.update_or_create(session_id=session_key, defaults={'user': user})
+
+    @classmethod
+    def end_other_sessions(cls, user, keep_session_key=None):
+        """Delete every session of `user` except `keep_session_key`. Returns how many were deleted."""
+        from django.contrib.sessions.models import Session
+
+        sessions = Session.objects.filter(user_session__user=user)
+        if keep_session_key:
+            sessions = sessions.exclude(session_key=keep_session_key)
+        deleted = sessions.delete()[1]
+        return deleted.get(Session._meta.label, 0)
+
+
+def track_login_session(sender, request, user, **kwargs):
+    """user_logged_in receiver: map the freshly cycled session key to the user."""
+    session = getattr(request, 'session', None)
+    if session is None:
+        return
+    if session.session_key is None:
+        # login() flushed a session that belonged to someone else; the new
+        # one has no row yet
+        session.save()
+    UserSession.track(user, session.session_key)
 
 
 class UserProfile(models.Model):
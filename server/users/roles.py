@@ -0,0 +1,117 @@
+"""
+Process-local directory of users by position, for SSE and email targeting.
+
+Hot write endpoints (create/approve/cancel/process/AR upload) all notify the
+Admins, and the email helpers look up Admin/Approver addresses. Instead of
+querying user_profiles on every call, role_directory loads every profile's
+(user_id, position, email, email_notifications_enabled) once and answers
+from memory.
+
+The cache is dropped by UserProfile post_save/post_delete signals (connected
+in UsersConfig.ready()). Signals only fire in the process that made the
+change, and queryset.update() bypasses them, so entries also expire after
+ROLE_DIRECTORY_TTL seconds (default 60) so other workers converge. Lookups
+inside a transaction read through to the database and are never cached.
+"""
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+
+
+class _Member(NamedTuple):
+    user_id: int
+    email: str
+    email_notifications_enabled: bool
+
+
+class _Snapshot(NamedTuple):
+    members: dict[str, tuple[_Member, ...]]
+    ids: dict[str, frozenset[int]]
+
+
+class RoleDirectory:
+    """User ids and notification addresses grouped by UserProfile.position."""
+
+    def __init__(self, ttl: float | None = None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot: _Snapshot | None = None
+        self._loaded_at = 0.0
+        # Bumped by invalidate() so a load racing with a profile change is not kept
+        self._generation = 0
+
+    def _load(self) -> _Snapshot:
+        from django.db import connection
+
+        if connection.in_atomic_block:
+            # Uncommitted rows may still roll back; read through without caching
+            return self._query()
+
+        ttl = self._ttl if self._ttl is not None else getattr(settings, 'ROLE_DIRECTORY_TTL', 60)
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._loaded_at < ttl:
+                return self._snapshot
+            generation = self._generation
+
+        snapshot = self._query()
+        with self._lock:
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._loaded_at = time.monotonic()
+        return snapshot
+
+    @staticmethod
+    def _query() -> _Snapshot:
+        from .models import UserProfile
+
+        grouped: dict[str, list[_Member]] = {}
+        rows = UserProfile.objects.values_list('position', 'user_id', 'email', 'email_notifications_enabled')
+        for position, user_id, email, enabled in rows:
+            grouped.setdefault(position, []).append(_Member(user_id, email or '', enabled))
+        return _Snapshot(
+            members={position: tuple(group) for position, group in grouped.items()},
+            ids={position: frozenset(m.user_id for m in group) for position, group in grouped.items()},
+        )
+
+    def invalidate(self):
+        """Forget the cached directory; the next lookup reloads it."""
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+
+    def user_ids(self, position: str) -> frozenset[int]:
+        """User ids holding `position`."""
+        return self._load().ids.get(position, frozenset())
+
+    def admin_ids(self) -> frozenset[int]:
+        return self.user_ids('Admin')
+
+    def approver_ids(self) -> frozenset[int]:
+        return self.user_ids('Approver')
+
+    def handler_ids(self) -> frozenset[int]:
+        return self.user_ids('Handler')
+
+    def emails(self, position: str, notifications_only: bool = True) -> list[str]:
+        """Non-empty email addresses for `position`, optionally only users who accept notifications."""
+        return [
+            member.email
+            for member in self._load().members.get(position, ())
+            if member.email and (member.email_notifications_enabled or not notifications_only)
+        ]
+
+
+# Module-level singleton shared by views and email helpers
+role_directory = RoleDirectory()
+
+
+def invalidate_role_directory(sender, **kwargs):
+    """post_save/post_delete receiver for UserProfile."""
+    from django.db import transaction
+
+    role_directory.invalidate()
+    # Again once the change is visible to other connections, in case one
+    # reloaded the committed (old) rows in between
+    transaction.on_commit(role_directory.invalidate)
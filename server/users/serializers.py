@@ -245,4 +245,7 @@ class UserListSerializer(serializers.ModelSerializer):
 
     def get_is_locked(self, obj):
         """Check whether this user is currently locked out due to failed login attempts"""
+        locked = self.context.get('locked_usernames')
+        if locked is not None:
+            return obj.username in locked
         return LoginAttempt.is_locked_out(obj.username)
@@ -1,3 +1,173 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import LoginAttempt, LoginThrottle, UserProfile, UserSession
+from .roles import role_directory
+
+
+def _profile(username, position, **extra):
+    user = User.objects.create_user(username=username, password='pass1234!')
+    return UserProfile.objects.create(user=user, position=position, full_name=username,
+                                      email=f'{username}@example.com', **extra)
+
+
+class RoleDirectoryTests(TransactionTestCase):
+    def setUp(self):
+        role_directory.invalidate()
+
+    def test_lookups_are_cached_until_a_profile_changes(self):
+        admin = _profile('admin', 'Admin')
+        _profile('approver', 'Approver', email_notifications_enabled=False)
+        handler = _profile('handler', 'Handler')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(role_directory.admin_ids(), {admin.user_id})
+            self.assertEqual(role_directory.handler_ids(), {handler.user_id})
+            self.assertEqual(role_directory.emails('Approver'), [])
+            self.assertEqual(role_directory.emails('Approver', notifications_only=False), ['approver@example.com'])
+
+        handler.position = 'Admin'
+        handler.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(role_directory.admin_ids(), {admin.user_id, handler.user_id})
+            self.assertEqual(role_directory.handler_ids(), set())
+
+        admin.user.delete()
+        self.assertEqual(role_directory.admin_ids(), {handler.user_id})
+
+
+class RoleDirectoryTransactionTests(TestCase):
+    def test_lookups_inside_a_transaction_are_not_cached(self):
+        role_directory.invalidate()
+        admin = _profile('admin', 'Admin')
+        self.assertEqual(role_directory.admin_ids(), {admin.user_id})
+        self.assertIsNone(role_directory._snapshot)
+
+
+class SingleSessionTests(TestCase):
+    def _login(self, username):
+        client = Client()
+        response = client.post('/api/login/', {'username': username, 'password': 'pass1234!'})
+        self.assertEqual(response.status_code, 200)
+        return client
+
+    def test_login_ends_other_sessions_of_the_same_user_only(self):
+        agent = _profile('agent', 'Sales Agent').user
+        _profile('other', 'Sales Agent')
+        first = self._login('agent')
+        other = self._login('other')
+        second = self._login('agent')
+
+        self.assertEqual(UserSession.objects.filter(user=agent).count(), 1)
+        self.assertFalse(Session.objects.filter(session_key=first.session.session_key).exists())
+        self.assertTrue(Session.objects.filter(session_key=second.session.session_key).exists())
+        self.assertTrue(Session.objects.filter(session_key=other.session.session_key).exists())
+
+        second.post('/api/logout/')
+        self.assertFalse(UserSession.objects.filter(user=agent).exists())
+
+    def test_kill_does_not_scan_unrelated_sessions(self):
+        agent = _profile('agent', 'Sales Agent').user
+        self._login('agent')
+
+        def queries():
+            with CaptureQueriesContext(connection) as ctx:
+                UserSession.end_other_sessions(agent)
+            return len(ctx.captured_queries)
+
+        few = queries()
+        for index in range(20):
+            self._login(_profile(f'user{index}', 'Sales Agent').user.username)
+        self._login('agent')
+        self.assertEqual(queries(), few)
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        _profile('agent', 'Sales Agent')
+        self.client = Client()
+
+    def _fail(self, ip='10.0.0.1', username='agent'):
+        return self.client.post(
+            '/api/login/', {'username': username, 'password': 'wrong'}, REMOTE_ADDR=ip,
+        )
+
+    def test_lockout_after_threshold_and_reset_on_success(self):
+        for expected in range(LoginAttempt.LOCKOUT_THRESHOLD - 1, 0, -1):
+            self.assertEqual(self._fail().json()['remaining_attempts'], expected)
+        response = self._fail()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(response.json()['retry_after'], 0)
+        self.assertTrue(LoginAttempt.is_locked_out('agent'))
+        self.assertEqual(LoginAttempt.locked_usernames(), {'agent'})
+        self.assertFalse(LoginAttempt.objects.exists())  # No per-attempt rows any more
+
+        LoginAttempt.clear_failures('agent')
+        self.assertFalse(LoginAttempt.is_locked_out('agent'))
+        response = self.client.post('/api/login/', {'username': 'agent', 'password': 'pass1234!'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_window_expiry_starts_a_new_window(self):
+        for _ in range(LoginAttempt.LOCKOUT_THRESHOLD):
+            LoginAttempt.record_failure('agent')
+        LoginThrottle.objects.update(window_started_at=timezone.now() - LoginThrottle.window())
+        self.assertFalse(LoginAttempt.is_locked_out('agent'))
+        LoginAttempt.record_failure('agent')
+        self.assertEqual(LoginAttempt.recent_failures('agent'), 1)
+
+    def test_lockout_is_per_username_not_per_address(self):
+        # Many usernames failing from one (shared or proxy) address lock none
+        # of the others out, whatever X-Forwarded-For says
+        for index in range(4 * LoginAttempt.LOCKOUT_THRESHOLD):
+            self.client.post(
+                '/api/login/', {'username': f'guess{index}', 'password': 'wrong'},
+                REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR='10.0.0.1',
+            )
+        self.assertEqual(self._fail(ip='10.0.0.9').status_code, 401)
+        self.assertFalse(LoginThrottle.objects.exclude(key__startswith=LoginThrottle.USER_PREFIX).exists())
+        response = self.client.post(
+            '/api/login/', {'username': 'agent', 'password': 'pass1234!'}, REMOTE_ADDR='10.0.0.9',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_locked_username_refuses_the_right_password_from_any_address(self):
+        for _ in range(LoginAttempt.LOCKOUT_THRESHOLD):
+            self._fail(ip='10.0.0.9')
+        response = self.client.post(
+            '/api/login/', {'username': 'agent', 'password': 'pass1234!'}, REMOTE_ADDR='10.0.0.1',
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_lockout_check_is_a_single_query(self):
+        LoginAttempt.record_failure('agent')
+        with self.assertNumQueries(1):
+            LoginAttempt.is_locked_out('agent')
+        with self.assertNumQueries(1):
+            LoginAttempt.record_failure('agent')
+
+    def test_failed_login_reads_throttles_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._fail()
+        reads = [
+            q for q in ctx.captured_queries
+            if q['sql'].lstrip().upper().startswith('SELECT') and 'login_throttles' in q['sql']
+        ]
+        self.assertEqual(len(reads), 2)  # One lockout check before and one after authenticate()
+
+    def test_purge_command(self):
+        LoginAttempt.objects.create(username='agent')
+        LoginAttempt.record_failure('agent')
+        LoginThrottle.objects.create(
+            key=LoginThrottle.user_key('old'), failures=3,
+            window_started_at=timezone.now() - LoginThrottle.window(),
+        )
+        call_command('purge_login_attempts', stdout=StringIO())
+        self.assertFalse(LoginAttempt.objects.exists())
+        self.assertEqual(list(LoginThrottle.objects.values_list('key', flat=True)), ['user:agent'])
@@ -21,7 +21,7 @@ from points_audit.models import PointsAuditLog
 # Configure logger for user operations
 logger = logging.getLogger('email')
 
-from .models import UserProfile
+from .models import UserProfile, UserSession
 from .serializers import UserSerializer, UserListSerializer, SalesAgentOptionSerializer
 
 
@@ -82,6 +82,14 @@ class UserViewSet(viewsets.ModelViewSet):
         if self.action == 'create':
             return UserSerializer
         return UserListSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            # One lookup for the whole page instead of a lockout query per user
+            from .models import LoginAttempt
+            context['locked_usernames'] = LoginAttempt.locked_usernames()
+        return context
     
     def list(self, request, *args, **kwargs):
         """Override list to support fetching all accounts or return paginated results"""
@@ -330,6 +338,8 @@ class UserViewSet(viewsets.ModelViewSet):
             request.user.set_password(new_password)
             request.user.save()
             update_session_auth_hash(request, request.user)
+            # The session key was cycled; map the new key to the user again
+            UserSession.track(request.user, request.session.session_key)
             logger.info(f"✓ Password changed successfully for user {request.user.username}")
 
             # Send security notification email
@@ -3,10 +3,17 @@ Email Service Utility Module
 
 Provides email sending functionality using Django's built-in email system with Gmail SMTP.
 Includes comprehensive debug logging for troubleshooting email issues.
+
+When EMAIL_OUTBOX_ENABLED is set (the default), rendered emails are written
+to the OutboundEmail outbox and delivered by `manage.py send_queued_emails`
+instead of opening an SMTP connection inside the request.
 """
 
 import logging
-from django.core.mail import send_mail, EmailMultiAlternatives
+from datetime import timedelta
+from django.core.mail import send_mail, EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
@@ -27,7 +34,49 @@ def _should_send_email(user):
     return profile.email_notifications_enabled
 
 
-def send_email_notification(subject, message, recipient_list, html_message=None):
+def _outbox_enabled():
+    return getattr(settings, 'EMAIL_OUTBOX_ENABLED', True)
+
+
+def queue_email(subject, body, recipient_list, html_message=None, cc_list=None):
+    """
+    Insert a rendered email into the outbox for the send_queued_emails worker.
+
+    The row is written in the caller's transaction, so it is only picked up
+    after that transaction commits and is discarded if it rolls back.
+
+    Returns:
+        OutboundEmail: the queued row
+    """
+    from .models import OutboundEmail
+
+    queued = OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        html_body=html_message or '',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+        cc=list(cc_list or []),
+    )
+    logger.info(f"✉ Queued email #{queued.id} to {', '.join(recipient_list)}: {subject}")
+    return queued
+
+
+def _build_message(subject, body, recipient_list, html_message=None, cc_list=None, from_email=None, connection=None):
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=recipient_list,
+        cc=cc_list or [],
+        connection=connection,
+    )
+    if html_message:
+        email.attach_alternative(html_message, "text/html")
+    return email
+
+
+def send_email_notification(subject, message, recipient_list, html_message=None, immediate=False):
     """
     Send email notification using Django's built-in email system
     
@@ -36,11 +85,16 @@ def send_email_notification(subject, message, recipient_list, html_message=None)
         message (str): Plain text message content
         recipient_list (list): List of recipient email addresses
         html_message (str, optional): HTML content for the email
+        immediate (bool): Bypass the outbox and talk to SMTP now (diagnostics)
     
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email was queued or sent successfully, False otherwise
     """
     try:
+        if _outbox_enabled() and not immediate:
+            queue_email(subject, message, recipient_list, html_message=html_message)
+            return True
+
         logger.debug(f"=== EMAIL SEND START ===")
         logger.debug(f"From: {settings.DEFAULT_FROM_EMAIL}")
         logger.debug(f"To: {recipient_list}")
@@ -52,14 +106,7 @@ def send_email_notification(subject, message, recipient_list, html_message=None)
         
         if html_message:
             # Send email with HTML content
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=recipient_list,
-            )
-            email.attach_alternative(html_message, "text/html")
-            email.send()
+            _build_message(subject, message, recipient_list, html_message=html_message).send()
             logger.info(f"✓ HTML email sent successfully to {', '.join(recipient_list)}")
         else:
             # Send plain text email
@@ -83,7 +130,7 @@ def send_email_notification(subject, message, recipient_list, html_message=None)
         return False
 
 
-def send_html_email(subject, template_name, context, recipient_list, cc_list=None):
+def send_html_email(subject, template_name, context, recipient_list, cc_list=None, immediate=False):
     """
     Send HTML email using Django templates
     
@@ -93,9 +140,10 @@ def send_html_email(subject, template_name, context, recipient_list, cc_list=Non
         context (dict): Context data for template rendering
         recipient_list (list): List of recipient email addresses
         cc_list (list, optional): List of CC email addresses
+        immediate (bool): Bypass the outbox and talk to SMTP now (diagnostics)
     
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email was queued or sent successfully, False otherwise
     """
     try:
         logger.debug(f"=== HTML EMAIL TEMPLATE START ===")
@@ -110,16 +158,12 @@ def send_html_email(subject, template_name, context, recipient_list, cc_list=Non
         plain_message = strip_tags(html_message)
         logger.debug(f"Plain text version created ({len(plain_message)} chars)")
         
+        if _outbox_enabled() and not immediate:
+            queue_email(subject, plain_message, recipient_list, html_message=html_message, cc_list=cc_list)
+            return True
+
         # Send the email
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=recipient_list,
-            cc=cc_list or [],
-        )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
+        _build_message(subject, plain_message, recipient_list, html_message=html_message, cc_list=cc_list).send()
         
         logger.info(f"✓ Template email sent successfully to {', '.join(recipient_list)}")
         logger.debug(f"=== HTML EMAIL TEMPLATE SUCCESS ===")
@@ -134,6 +178,91 @@ def send_html_email(subject, template_name, context, recipient_list, cc_list=Non
         return False
 
 
+def _retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ... capped at one hour."""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 60)
+    return timedelta(seconds=min(base * (2 ** (attempts - 1)), 3600))
+
+
+def _record_failed_attempt(queued, error, max_attempts, counts):
+    """Reschedule a claimed outbox row with backoff, or mark it FAILED once out of attempts."""
+    from .models import OutboundEmail
+
+    queued.attempts += 1
+    queued.last_error = f"{type(error).__name__}: {error}"
+    if queued.attempts >= max_attempts:
+        queued.status = OutboundEmail.Status.FAILED
+        counts['failed'] += 1
+        logger.error(f"✗ Giving up on email #{queued.id} after {queued.attempts} attempts: {error}")
+    else:
+        queued.next_attempt_at = timezone.now() + _retry_delay(queued.attempts)
+        counts['retried'] += 1
+        logger.warning(f"⚠ Email #{queued.id} failed (attempt {queued.attempts}), retrying at {queued.next_attempt_at}: {error}")
+    queued.save(update_fields=['attempts', 'status', 'next_attempt_at', 'last_error'])
+
+
+def deliver_queued_emails(batch_size=50):
+    """
+    Send one batch of due outbox emails over a single SMTP connection.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED (where the
+    database supports it) so several workers can drain the outbox safely.
+    Failed sends are rescheduled with exponential backoff until
+    EMAIL_OUTBOX_MAX_ATTEMPTS is reached, then marked FAILED. If the SMTP
+    connection cannot be opened, every claimed row counts one failed attempt.
+
+    Returns:
+        dict: counts of 'sent', 'retried' and 'failed' emails in this batch
+    """
+    from .models import OutboundEmail
+
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    counts = {'sent': 0, 'retried': 0, 'failed': 0}
+
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.Status.PENDING, next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not batch:
+            return counts
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            # SMTP connect/auth failure: back off the whole batch instead of
+            # rolling back and retrying the same rows on the next tick
+            logger.error(f"✗ Could not open SMTP connection for {len(batch)} queued email(s): {e}")
+            for queued in batch:
+                _record_failed_attempt(queued, e, max_attempts, counts)
+            return counts
+
+        try:
+            for queued in batch:
+                try:
+                    _build_message(
+                        queued.subject, queued.body, queued.to,
+                        html_message=queued.html_body, cc_list=queued.cc,
+                        from_email=queued.from_email, connection=connection,
+                    ).send()
+                except Exception as e:
+                    _record_failed_attempt(queued, e, max_attempts, counts)
+                else:
+                    queued.attempts += 1
+                    queued.status = OutboundEmail.Status.SENT
+                    queued.sent_at = timezone.now()
+                    queued.last_error = ''
+                    counts['sent'] += 1
+                    logger.info(f"✓ Outbox email #{queued.id} sent to {', '.join(queued.to)}")
+                    queued.save(update_fields=['attempts', 'status', 'sent_at', 'last_error'])
+        finally:
+            connection.close()
+
+    return counts
+
+
 def send_request_approved_email(request_obj, distributor, approved_by):
     """
     Send email notification when a redemption request is approved
@@ -557,12 +686,11 @@ def send_approved_request_notification_to_admin(request_obj, distributor, approv
         bool: True if email sent successfully, False otherwise
     """
     try:
-        # Import UserProfile here to avoid circular imports
-        from users.models import UserProfile
+        # Import the role directory here to avoid circular imports
+        from users.roles import role_directory
         
         # Get all superadmin (Admin) emails
-        admin_profiles = UserProfile.objects.filter(position='Admin')
-        admin_emails = [profile.email for profile in admin_profiles if profile.email and profile.email_notifications_enabled]
+        admin_emails = role_directory.emails('Admin')
         
         if not admin_emails:
             logger.warning(f"No admin emails found for request #{request_obj.id} approval notification")
@@ -772,12 +900,8 @@ def send_request_withdrawn_email(request_obj, distributor, withdrawn_by):
     """
     try:
         # Send to all approvers
-        from users.models import UserProfile
-        approver_profiles = UserProfile.objects.filter(
-            position='Approver',
-            email_notifications_enabled=True,
-        ).exclude(email__isnull=True).exclude(email='')
-        recipient_emails = list(approver_profiles.values_list('email', flat=True))
+        from users.roles import role_directory
+        recipient_emails = role_directory.emails('Approver')
 
         if not recipient_emails:
             logger.warning(f"No approvers found to notify for withdrawn request #{request_obj.id}")
@@ -0,0 +1,305 @@
+"""
+Management command to benchmark the hot API endpoints: query counts and latency.
+
+Seeds a synthetic dataset (users of every role, teams, distributors,
+products, requests with items) inside a transaction that is rolled back
+afterwards, so nothing is left behind. It then calls each endpoint through
+the Django test client as the matching role and records the per-call query
+count and p50/p95 latency. Query counts are checked against QUERY_BUDGETS,
+which do not grow with the dataset, so a per-row query (N+1) fails the run.
+
+The JSON report (--output) can be diffed between commits. The command exits
+with an error when a budget is exceeded or an endpoint does not answer 2xx.
+
+Usage:
+    python manage.py benchmark_api                                 # 5k requests, 20 iterations
+    python manage.py benchmark_api --requests 20000 --iterations 50
+    python manage.py benchmark_api --output bench.json --label "$(git rev-parse --short HEAD)"
+"""
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+# Max queries per call, including session/auth lookups; independent of dataset size
+QUERY_BUDGETS = {
+    'requests_list_agent': 15,
+    'requests_list_approver': 15,
+    'requests_list_handler': 15,
+    'requests_list_admin': 15,
+    'requests_summary_admin': 10,
+    'catalogue_search': 10,
+    'dashboard_stats': 10,
+    'agent_dashboard_stats': 12,
+    'approver_dashboard_stats': 12,
+    'analytics_overview': 12,
+    'analytics_agents': 12,
+    'analytics_turnaround': 10,
+    'analytics_team_stats': 15,
+    'mark_items_processed': 40,
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Benchmark query counts and latency of the core API on a synthetic dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000, help="Redemption requests to seed")
+        parser.add_argument("--products", type=int, default=500, help="Catalogue products to seed")
+        parser.add_argument("--agents", type=int, default=200, help="Sales agents to seed")
+        parser.add_argument("--teams", type=int, default=20, help="Teams (one approver each) to seed")
+        parser.add_argument("--iterations", type=int, default=20, help="Timed calls per endpoint")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the dataset")
+        parser.add_argument("--output", help="Write the JSON report to this path")
+        parser.add_argument("--label", default="", help="Free-form run label stored in the report")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n=== API benchmark: {options['requests']:,} requests, {options['products']:,} products, "
+            f"{options['agents']:,} agents, {options['teams']:,} teams ===\n"
+        ))
+        report = None
+        try:
+            with transaction.atomic():
+                data = self._seed(options)
+                report = self._run(data, options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"\nReport written to {options['output']}")
+
+        failures = [
+            name for name, result in report['endpoints'].items()
+            if not result['within_budget'] or not result['ok']
+        ]
+        if failures:
+            raise CommandError(f"Over query budget or failing: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("\nAll endpoints within budget (seed data rolled back)"))
+
+    # ---- dataset ------------------------------------------------------------
+
+    def _seed(self, options):
+        from distributers.models import Distributor
+        from items_catalogue.models import Product
+        from requests.models import RedemptionRequest, RedemptionRequestItem
+        from requests.rollup import rebuild_all
+        from teams.models import Team, TeamMembership
+        from users.models import UserProfile
+
+        rng = random.Random(options['seed'])
+        stamp = f"bench{int(time.time())}"
+        now = timezone.now()
+
+        def make_users(prefix, position, count):
+            users = User.objects.bulk_create([
+                User(username=f"{stamp}-{prefix}{index}") for index in range(count)
+            ])
+            if not users or not users[0].pk:
+                users = list(User.objects.filter(username__startswith=f"{stamp}-{prefix}").order_by('pk'))
+            UserProfile.objects.bulk_create([
+                UserProfile(
+                    user=user, position=position, full_name=f"{prefix.title()} {index}",
+                    email=f"{user.username}@bench.invalid",
+                )
+                for index, user in enumerate(users)
+            ])
+            return users
+
+        admin = make_users('admin', 'Admin', 1)[0]
+        approvers = make_users('approver', 'Approver', options['teams'])
+        handlers = make_users('handler', 'Handler', 5)
+        agents = make_users('agent', 'Sales Agent', options['agents'])
+
+        Team.objects.bulk_create([
+            Team(name=f"{stamp} Team {index}", approver=approver) for index, approver in enumerate(approvers)
+        ])
+        teams = list(Team.objects.filter(name__startswith=f"{stamp} Team").order_by('pk'))
+        agent_team = {agent.pk: teams[index % len(teams)] for index, agent in enumerate(agents)}
+        TeamMembership.objects.bulk_create([
+            TeamMembership(team=agent_team[agent.pk], user=agent) for agent in agents
+        ])
+
+        Distributor.objects.bulk_create([
+            Distributor(name=f"{stamp} Distributor {index}", points=100000) for index in range(50)
+        ])
+        distributors = list(Distributor.objects.filter(name__startswith=f"{stamp} Distributor"))
+
+        categories = ('Apparel', 'Bags', 'Drinkware', 'Stationery', 'Electronics')
+        Product.objects.bulk_create([
+            Product(
+                item_code=f"{stamp}-{index:05d}", item_name=f"Platinum {categories[index % 5]} {index}",
+                category=categories[index % 5], points=10 + index % 90, stock=100000,
+                # Every fifth product is left unassigned so Admins process it
+                mktg_admin=None if index % 5 == 0 else handlers[(index // 5) % len(handlers)],
+            )
+            for index in range(options['products'])
+        ])
+        products = list(Product.objects.filter(item_code__startswith=f"{stamp}-").order_by('pk'))
+
+        statuses = ['APPROVED'] * 6 + ['PENDING'] * 2 + ['REJECTED', 'WITHDRAWN']
+        seeded = []
+        for _ in range(options['requests']):
+            agent = rng.choice(agents)
+            team = agent_team[agent.pk]
+            status = rng.choice(statuses)
+            requested = now - timedelta(days=rng.randint(0, 364), hours=rng.randint(0, 23))
+            reviewed = status in ('APPROVED', 'REJECTED')
+            processed = status == 'APPROVED' and rng.random() < 0.5
+            seeded.append(RedemptionRequest(
+                requested_by=agent, requested_for=rng.choice(distributors), team=team,
+                status=status, requires_sales_approval=rng.random() < 0.5,
+                processing_status='PROCESSED' if processed else 'NOT_PROCESSED',
+                date_requested=requested,
+                reviewed_by=team.approver if reviewed else None,
+                date_reviewed=requested + timedelta(hours=rng.randint(1, 72)) if reviewed else None,
+                date_processed=requested + timedelta(hours=rng.randint(73, 240)) if processed else None,
+            ))
+        seeded = RedemptionRequest.objects.bulk_create(seeded, batch_size=1000)
+        if not seeded[0].pk:
+            seeded = list(RedemptionRequest.objects.filter(requested_by__in=agents).order_by('pk'))
+
+        items = []
+        for req in seeded:
+            for product in rng.sample(products, rng.randint(1, 3)):
+                quantity = rng.randint(1, 5)
+                items.append(RedemptionRequestItem(
+                    request=req, product=product, quantity=quantity,
+                    points_per_item=int(product.points), total_points=int(product.points) * quantity,
+                ))
+        RedemptionRequestItem.objects.bulk_create(items, batch_size=2000)
+
+        # Fresh approved requests for mark_items_processed, one per timed call
+        unassigned = [product for product in products if product.mktg_admin_id is None]
+        to_process = []
+        for _ in range(options['iterations']):
+            agent = rng.choice(agents)
+            req = RedemptionRequest.objects.create(
+                requested_by=agent, requested_for=rng.choice(distributors), team=agent_team[agent.pk],
+                status='APPROVED', reviewed_by=agent_team[agent.pk].approver, date_reviewed=now,
+            )
+            item = RedemptionRequestItem.objects.create(
+                request=req, product=rng.choice(unassigned), quantity=1, points_per_item=10, total_points=10,
+            )
+            to_process.append((req.pk, item.pk))
+
+        # Rollup refreshes run on commit, which never comes here; build them directly
+        rebuild_all()
+
+        return {
+            'admin': admin, 'approver': approvers[0], 'handler': handlers[0],
+            'agent': agents[0], 'team': teams[0], 'to_process': to_process,
+        }
+
+    # ---- endpoints ----------------------------------------------------------
+
+    def _endpoints(self, data):
+        from requests import analytics_cache
+
+        to_process = iter(data['to_process'])
+
+        def mark_processed():
+            request_id, item_id = next(to_process)
+            return (
+                f"/api/redemption-requests/{request_id}/mark_items_processed/",
+                {'items': [{'item_id': item_id, 'fulfilled_quantity': 1}]},
+            )
+
+        cold = analytics_cache.invalidate  # Analytics are timed without their response cache
+        return [
+            # (name, role, method, path or callable returning (path, body), before each call)
+            ('requests_list_agent', 'agent', 'get', '/api/redemption-requests/', None),
+            ('requests_list_approver', 'approver', 'get', '/api/redemption-requests/?not_processed=1', None),
+            ('requests_list_handler', 'handler', 'get', '/api/redemption-requests/', None),
+            ('requests_list_admin', 'admin', 'get', '/api/redemption-requests/?not_processed=1', None),
+            ('requests_summary_admin', 'admin', 'get', '/api/redemption-requests/?view=summary', None),
+            ('catalogue_search', 'agent', 'get', '/api/catalogue/?search=platinum&page_size=50', None),
+            ('dashboard_stats', 'admin', 'get', '/api/dashboard/stats/', None),
+            ('agent_dashboard_stats', 'agent', 'get', '/api/agent/dashboard/stats/', None),
+            ('approver_dashboard_stats', 'approver', 'get', '/api/approver/dashboard/stats/', None),
+            ('analytics_overview', 'admin', 'get', '/api/dashboard/analytics/overview/?range=365', cold),
+            ('analytics_agents', 'admin', 'get', '/api/dashboard/analytics/agents/?range=365&limit=50', cold),
+            ('analytics_turnaround', 'admin', 'get', '/api/dashboard/analytics/turnaround/?range=365', cold),
+            ('analytics_team_stats', 'admin', 'get',
+             f"/api/dashboard/analytics/team-stats/?team_id={data['team'].pk}", cold),
+            ('mark_items_processed', 'admin', 'post', mark_processed, None),
+        ]
+
+    def _run(self, data, options):
+        clients = {}
+        for role in ('admin', 'approver', 'handler', 'agent'):
+            # HTTP_HOST must be in ALLOWED_HOSTS outside the test runner
+            client = clients[role] = Client(HTTP_HOST='localhost')
+            client.force_login(data[role])
+
+        self.stdout.write(f"{'endpoint':<26} {'queries':>8} {'budget':>7} {'p50 ms':>9} {'p95 ms':>9}")
+        results = {}
+        for name, role, method, target, before in self._endpoints(data):
+            timings, queries, statuses = [], [], set()
+            for _ in range(options['iterations']):
+                path, body = target() if callable(target) else (target, None)
+                if before:
+                    before()
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    if method == 'post':
+                        response = clients[role].post(path, body, content_type='application/json')
+                    else:
+                        response = clients[role].get(path)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries.append(len(ctx.captured_queries))
+                statuses.add(response.status_code)
+
+            budget = QUERY_BUDGETS[name]
+            result = results[name] = {
+                'role': role,
+                'method': method.upper(),
+                'path': path,
+                'statuses': sorted(statuses),
+                'ok': all(200 <= code < 300 for code in statuses),
+                'queries': max(queries),
+                'query_budget': budget,
+                'within_budget': max(queries) <= budget,
+                'p50_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(_percentile(timings, 0.95), 2),
+                'samples': len(timings),
+            }
+            line = (
+                f"{name:<26} {result['queries']:>8} {budget:>7} "
+                f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f}"
+            )
+            if result['within_budget'] and result['ok']:
+                self.stdout.write(line)
+            else:
+                self.stdout.write(self.style.ERROR(f"{line}  statuses={result['statuses']}"))
+
+        return {
+            'label': options['label'],
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'dataset': {
+                key: options[key] for key in ('requests', 'products', 'agents', 'teams', 'iterations', 'seed')
+            },
+            'endpoints': results,
+        }
@@ -0,0 +1,114 @@
+"""
+Management command to measure SSE fan-out throughput on a single worker.
+
+Connects N in-process SSE clients to a private SSEBus (in-memory backend,
+nothing touches the database or the live bus), publishes events from a
+worker thread the way sync views do, and reports events/sec until every
+client has rendered every frame. Each run is timed twice: with the batched
+handoff (one call_soon_threadsafe per event) and with the legacy handoff
+(one call_soon_threadsafe per queue, JSON rendered per connection).
+
+Usage:
+    python manage.py benchmark_sse_fanout                       # 1k clients, broadcasts
+    python manage.py benchmark_sse_fanout --clients 200 --events 2000
+    python manage.py benchmark_sse_fanout --targeted 25         # each event targets 25 users
+"""
+import asyncio
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.sse import InMemoryBackend, SSEBus
+
+
+class _PerQueueHandoffBus(SSEBus):
+    """The pre-batching delivery path: one cross-thread callback per queue."""
+
+    def _deliver(self, message: dict):
+        envelope = message["event"]
+        target_users = message.get("targets")
+        self._remember(envelope, target_users)
+        targets = target_users if target_users is not None else list(self._subscribers.keys())
+        loop = self._loop
+        for uid in targets:
+            for queue in list(self._subscribers.get(uid, ())):
+                loop.call_soon_threadsafe(self._offer, uid, queue, envelope)
+
+
+def _legacy_frame(event):
+    if "id" in event:
+        return f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+    return f"data: {json.dumps(event)}\n\n"
+
+
+def _batched_frame(event):
+    return event.frame
+
+
+class Command(BaseCommand):
+    help = "Benchmark SSE publish fan-out (events/sec) with many connected clients"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000, help="Connected SSE clients")
+        parser.add_argument("--per-user", type=int, default=2, help="Connections (tabs) per user")
+        parser.add_argument("--events", type=int, default=500, help="Events to publish per run")
+        parser.add_argument("--targeted", type=int, default=0,
+                            help="Users targeted per event (0 = broadcast to everyone)")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for targeting")
+
+    def handle(self, *args, **options):
+        users = max(1, options["clients"] // options["per_user"])
+        mode = f"{options['targeted']} users/event" if options["targeted"] else "broadcast"
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n=== SSE fan-out benchmark: {users * options['per_user']:,} clients, "
+            f"{options['events']:,} events, {mode} ===\n"
+        ))
+        self.stdout.write(f"{'handoff':<10} {'events/s':>10} {'deliveries/s':>14} {'total ms':>10}")
+
+        for label, bus_class, render in (
+            ("per-queue", _PerQueueHandoffBus, _legacy_frame),
+            ("batched", SSEBus, _batched_frame),
+        ):
+            elapsed, deliveries = asyncio.run(self._run(bus_class, render, users, options))
+            self.stdout.write(
+                f"{label:<10} {options['events'] / elapsed:>10,.0f} "
+                f"{deliveries / elapsed:>14,.0f} {elapsed * 1000:>10.1f}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("\nDone"))
+
+    async def _run(self, bus_class, render, users, options):
+        rng = random.Random(options["seed"])
+        events = options["events"]
+        # Queues large enough that overflow handling never kicks in
+        bus = bus_class(backend=InMemoryBackend(), maxsize=events + 1)
+
+        queues = [(uid, bus.subscribe(uid)) for uid in range(users) for _ in range(options["per_user"])]
+        if options["targeted"]:
+            targets = [rng.sample(range(users), min(options["targeted"], users)) for _ in range(events)]
+        else:
+            targets = [None] * events
+        expected = {uid: 0 for uid in range(users)}
+        for target in targets:
+            for uid in (target if target is not None else range(users)):
+                expected[uid] += 1
+
+        async def consume(uid, queue):
+            for _ in range(expected[uid]):
+                render(await queue.get())
+
+        def publish_all():
+            for index, target in enumerate(targets):
+                bus.publish("request_updated", {"request_id": index, "status": "APPROVED"}, target)
+
+        loop = asyncio.get_running_loop()
+        consumers = [asyncio.create_task(consume(uid, queue)) for uid, queue in queues]
+        start = time.perf_counter()
+        await loop.run_in_executor(None, publish_all)
+        await asyncio.gather(*consumers)
+        elapsed = time.perf_counter() - start
+
+        deliveries = sum(expected[uid] for uid, _ in queues)
+        return elapsed, deliveries
@@ -0,0 +1,55 @@
+"""
+Drain the OutboundEmail outbox.
+
+Usage:
+    python manage.py send_queued_emails            # run forever, polling every 5s
+    python manage.py send_queued_emails --once     # send everything due, then exit
+"""
+
+import logging
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from utils.email_service import deliver_queued_emails
+
+logger = logging.getLogger('email')
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbound emails, reusing one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain due emails and exit instead of polling')
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails sent per SMTP connection')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        once = options['once']
+        batch_size = options['batch_size']
+        interval = options['interval']
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+
+        while True:
+            try:
+                counts = deliver_queued_emails(batch_size=batch_size)
+            except Exception as e:
+                # SMTP/DB outage: keep the worker alive and try again next tick
+                logger.error(f"✗ Outbox batch failed: {e}")
+                logger.exception("Full traceback:")
+                counts = None
+
+            if counts:
+                for key, value in counts.items():
+                    totals[key] += value
+
+            drained = not counts or sum(counts.values()) < batch_size
+            if drained:
+                if once:
+                    break
+                time.sleep(interval)
+                # Drop a DB connection that went stale or broke while idle
+                close_old_connections()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: {totals['sent']} sent, {totals['retried']} rescheduled, {totals['failed']} failed"
+        ))
@@ -1,5 +1,14 @@
-from django.http import JsonResponse
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
 from django.contrib.sessions.exceptions import SessionInterrupted
+from django.db import connection
+from django.http import JsonResponse
+
+timing_logger = logging.getLogger('request_timing')
 
 
 class SessionInterruptedMiddleware:
@@ -20,3 +29,130 @@ class SessionInterruptedMiddleware:
                 status=401,
             )
         return response
+
+
+class SlidingSessionMiddleware:
+    """Keep the SESSION_COOKIE_AGE sliding window without saving every request.
+
+    SESSION_SAVE_EVERY_REQUEST rewrites the django_session row (and re-sends
+    the cookie) on every API call, SSE reconnect and dashboard poll. Instead,
+    an authenticated session is only marked modified, so SessionMiddleware
+    saves it with a fresh expiry and cookie, once its remaining lifetime
+    drops below SESSION_REFRESH_THRESHOLD seconds. Must sit after
+    SessionMiddleware so this runs first on the way out.
+    """
+
+    REFRESHED_AT_KEY = '_session_refreshed_at'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @classmethod
+    def stamp(cls, session):
+        """Record that `session`'s expiry was just reset; the caller saves it."""
+        session[cls.REFRESHED_AT_KEY] = int(time.time())
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        if session is None or SESSION_KEY not in session:
+            return response  # Anonymous or logged out
+
+        # A session saved anyway (e.g. at login) gets its expiry reset for free
+        if session.modified:
+            self.stamp(session)
+            return response
+
+        threshold = getattr(settings, 'SESSION_REFRESH_THRESHOLD', settings.SESSION_COOKIE_AGE)
+        # Unstamped sessions (created before this middleware) count as expiring
+        # and are saved once, so they keep sliding like any other
+        age = int(time.time()) - session.get(self.REFRESHED_AT_KEY, 0)
+        if settings.SESSION_COOKIE_AGE - age < threshold:
+            self.stamp(session)
+        return response
+
+
+class _RequestMetrics:
+    """Per-request counters; also the connection.execute_wrapper callable."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_started = None
+        self.render_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+
+class RequestTimingMiddleware:
+    """Measure DB queries, DB time, response rendering and wall time per request.
+
+    Queries are counted with connection.execute_wrapper. Rendering covers
+    DRF/template responses turning their data into bytes (JSON renderer,
+    serializer output); queries issued by serializers inside the view count
+    as db. Requests slower than SLOW_REQUEST_MS or issuing more than
+    SLOW_REQUEST_QUERIES queries get one JSON log line on the
+    'request_timing' logger, and REQUEST_TIMING_HEADER adds a Server-Timing
+    header. Streaming responses (SSE, exports) are timed up to their first
+    byte. Sits first in MIDDLEWARE so session/auth queries are included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'REQUEST_TIMING_ENABLED', True):
+            return self.get_response(request)
+
+        metrics = request._timing_metrics = _RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+        total_seconds = time.perf_counter() - metrics.started
+
+        timings = {
+            'db': metrics.db_seconds * 1000,
+            'render': metrics.render_seconds * 1000,
+            'app': max(total_seconds - metrics.db_seconds - metrics.render_seconds, 0) * 1000,
+            'total': total_seconds * 1000,
+        }
+        if getattr(settings, 'REQUEST_TIMING_HEADER', False):
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration:.1f}' + (f';desc="{metrics.queries} queries"' if name == 'db' else '')
+                for name, duration in timings.items()
+            )
+
+        if (
+            timings['total'] >= getattr(settings, 'SLOW_REQUEST_MS', 1000)
+            or metrics.queries > getattr(settings, 'SLOW_REQUEST_QUERIES', 100)
+        ):
+            user = getattr(request, 'user', None)
+            timing_logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'view': getattr(getattr(request, 'resolver_match', None), 'view_name', None),
+                'status': response.status_code,
+                'queries': metrics.queries,
+                **{f'{name}_ms': round(duration, 1) for name, duration in timings.items()},
+                'user_id': user.pk if user is not None and user.is_authenticated else None,
+            }))
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before the response is rendered; the callback runs right after
+        metrics = getattr(request, '_timing_metrics', None)
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: self._rendered(metrics))
+        return response
+
+    @staticmethod
+    def _rendered(metrics):
+        metrics.render_seconds += time.perf_counter() - metrics.render_started
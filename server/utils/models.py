@@ -0,0 +1,49 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    """
+    Transactional email outbox.
+
+    Email helpers in utils.email_service render their message and insert a
+    row here instead of talking to SMTP inside the request. Because the row
+    is written in the caller's transaction, it only becomes visible to the
+    `send_queued_emails` worker once that transaction commits (and vanishes
+    if it rolls back).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        SENT = 'SENT', 'Sent'
+        FAILED = 'FAILED', 'Failed'
+
+    id = models.AutoField(primary_key=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(help_text='Plain text body')
+    html_body = models.TextField(blank=True, default='', help_text='Optional HTML alternative')
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list, help_text='List of recipient addresses')
+    cc = models.JSONField(default=list, blank=True, help_text='List of CC addresses')
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0, help_text='Delivery attempts made so far')
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='Earliest time the worker may (re)try this email',
+    )
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['created_at']
+        indexes = [
+            # The worker's claim query: status=PENDING AND next_attempt_at <= now
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+
+    def __str__(self):
+        return f"[{self.status}] {self.subject} -> {', '.join(self.to)}"
@@ -1,41 +1,288 @@
 """
-In-memory SSE (Server-Sent Events) event bus for real-time notifications.
+SSE (Server-Sent Events) event bus for real-time notifications.
 
-Single-worker deployment: uses asyncio.Queue per connected client.
-For multi-worker deployments, replace with Redis pub/sub.
+Each worker process keeps its own connected clients (one asyncio.Queue per
+browser tab). How a published event reaches those workers is decided by a
+pluggable backend, selected with the SSE_BACKEND setting:
+
+  - 'memory'   (default) delivers inside the publishing process only.
+               Correct for a single uvicorn worker.
+  - 'postgres' sends events through PostgreSQL LISTEN/NOTIFY, so a publish
+               in any worker reaches subscribers on every worker.
 """
 
 import asyncio
 import json
 import logging
+import select
+import threading
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
 
 logger = logging.getLogger(__name__)
 
 
-class SSEBus:
-    """In-memory event bus that routes events to connected SSE clients."""
+class SSEBackend:
+    """
+    Transport between publishers and the workers holding SSE connections.
+
+    publish() receives a JSON-serializable message {"targets", "event"}.
+    The backend must eventually call the `deliver` callback given to
+    start() with that message in every worker that has started.
+    """
+
+    def start(self, deliver):
+        raise NotImplementedError
+
+    def publish(self, message: dict):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class InMemoryBackend(SSEBackend):
+    """Delivers straight to subscribers of the current process."""
 
     def __init__(self):
-        # user_id -> set of asyncio.Queue instances (one per browser tab/connection)
-        self._subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self._deliver = None
+
+    def start(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, message: dict):
+        # Nobody has subscribed in this process yet, so there is nobody to deliver to
+        if self._deliver is not None:
+            self._deliver(message)
+
+
+class PostgresNotifyBackend(SSEBackend):
+    """
+    Fan-out through PostgreSQL LISTEN/NOTIFY on the database we already run.
+
+    publish() issues pg_notify() on the Django connection, so an event sent
+    inside a transaction is only delivered once it commits. Each process
+    that holds SSE clients runs one daemon thread with a dedicated
+    connection LISTENing on the channel. The thread reconnects with backoff
+    if that connection drops.
+
+    NOTIFY payloads are limited to ~8000 bytes. SSE envelopes are a few
+    ids and flags, well within that.
+    """
+
+    def __init__(self, conn_params: dict | None = None, channel: str = 'sse_events', using: str = 'default'):
+        self._conn_params = conn_params
+        self.channel = channel
+        self.using = using
+        self._deliver = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._listening = threading.Event()
+
+    def _get_conn_params(self) -> dict:
+        if self._conn_params is None:
+            from django.db import connections
+            self._conn_params = connections[self.using].get_connection_params()
+        return self._conn_params
+
+    def start(self, deliver):
+        self._deliver = deliver
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen_forever, name='sse-pg-listener', daemon=True)
+            self._thread.start()
+
+    def wait_until_listening(self, timeout: float | None = None) -> bool:
+        """Block until the listener has issued LISTEN (used by tests and startup checks)."""
+        return self._listening.wait(timeout)
+
+    def publish(self, message: dict):
+        from django.db import connections, transaction
+        # Savepoint so a failed NOTIFY cannot poison the caller's transaction
+        with transaction.atomic(using=self.using), connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, json.dumps(message)])
+
+    def close(self):
+        self._stopped.set()
+
+    def _listen_forever(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        backoff = 1
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**self._get_conn_params())
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                self._listening.set()
+                backoff = 1
+                logger.info("SSE listener connected on channel %s", self.channel)
+
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue  # Timeout: re-check the stop flag
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._handle(notify.payload)
+            except Exception as e:
+                self._listening.clear()
+                if self._stopped.is_set():
+                    break
+                logger.warning("SSE listener error (%s), reconnecting in %ss", e, backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _handle(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("SSE listener received malformed payload: %.200s", payload)
+            return
+        if self._deliver is not None:
+            self._deliver(message)
+
+
+def get_backend() -> SSEBackend:
+    """Build the backend named by settings.SSE_BACKEND."""
+    from django.conf import settings
+
+    name = getattr(settings, 'SSE_BACKEND', 'memory')
+    if name == 'memory':
+        return InMemoryBackend()
+    if name == 'postgres':
+        return PostgresNotifyBackend(channel=getattr(settings, 'SSE_PG_CHANNEL', 'sse_events'))
+    raise ValueError(f"Unknown SSE_BACKEND: {name!r}")
+
+
+class SSEEvent(dict):
+    """
+    Event envelope shared by every connection it is delivered to.
+
+    The SSE wire frame is rendered once, on first use, and reused by every
+    stream and replay that sends this event.
+    """
+
+    __slots__ = ('_frame',)
+
+    @property
+    def frame(self) -> str:
+        try:
+            return self._frame
+        except AttributeError:
+            data = json.dumps(self)
+            if 'id' in self:
+                self._frame = f"id: {self['id']}\ndata: {data}\n\n"
+            else:
+                self._frame = f"data: {data}\n\n"
+            return self._frame
+
+
+OVERFLOW_COALESCE = 'coalesce'
+OVERFLOW_RESYNC = 'resync'
+
+
+class SSEClientQueue(asyncio.Queue):
+    """
+    Bounded queue for one SSE connection.
+
+    offer() never raises QueueFull. When a slow client's queue is full it
+    applies the overflow policy:
+      - 'coalesce': replace the newest queued event for the same request_id
+        with this one. Events without a request_id, or with no queued match,
+        fall through to a resync.
+      - 'resync': discard everything queued and leave a single {"type":
+        "resync"} event telling the client to refetch its state.
+    Only call offer() from the event loop thread.
+    """
+
+    def __init__(self, maxsize: int, overflow: str = OVERFLOW_COALESCE):
+        super().__init__(maxsize=maxsize)
+        self.overflow = overflow
+
+    def offer(self, envelope: dict) -> tuple[str, int]:
+        """Enqueue per policy. Returns (outcome, events_lost): 'queued', 'coalesced' or 'resync'."""
+        try:
+            self.put_nowait(envelope)
+            return 'queued', 0
+        except asyncio.QueueFull:
+            pass
+
+        # asyncio.Queue keeps pending items in the `_queue` deque
+        pending = self._queue
+        request_id = envelope.get('request_id')
+        if self.overflow == OVERFLOW_COALESCE and request_id is not None:
+            for index in range(len(pending) - 1, -1, -1):
+                if pending[index].get('request_id') == request_id:
+                    pending[index] = envelope
+                    return 'coalesced', 1
+
+        lost = len(pending) + 1
+        pending.clear()
+        self.put_nowait(SSEEvent(type='resync', timestamp=time.time()))
+        return 'resync', lost
+
+
+class SSEBus:
+    """Routes events from the backend to the SSE clients connected to this process."""
+
+    def __init__(self, backend: SSEBackend | None = None, maxsize: int | None = None, overflow: str | None = None):
+        self._backend = backend
+        self._started = False
+        # Queue bound and overflow policy; None means read from settings on subscribe
+        self._maxsize = maxsize
+        self._overflow = overflow
+        # user_id -> set of SSEClientQueue instances (one per browser tab/connection)
+        self._subscribers: dict[int, set[SSEClientQueue]] = defaultdict(set)
+        # user_id -> cumulative overflow counters for this process (see stats())
+        self._overflow_counts: dict[int, dict[str, int]] = defaultdict(lambda: {'coalesced': 0, 'dropped': 0})
+        # Recent events kept for Last-Event-ID replay: one ring buffer per target
+        # user plus one for broadcasts, holding (arrival, envelope) pairs where
+        # arrival counts deliveries to this process. _evicted records the newest
+        # arrival pushed out of each buffer so replay can tell when a gap is too
+        # old to fill.
+        self._replay_size: int | None = None
+        self._replay: dict[int | None, deque] = {}
+        self._evicted: dict[int | None, int] = {}
+        self._arrivals = 0
+        self._replay_lock = threading.Lock()
+        self._last_event_id = 0
+        self._id_lock = threading.Lock()
         # The running event loop, captured when the first client connects.
-        # publish() is called from sync threads; it uses this to schedule
-        # put_nowait() thread-safely via call_soon_threadsafe().
+        # Deliveries arrive from sync view threads or the backend listener thread;
+        # they hand each event to the loop with one call_soon_threadsafe().
         self._loop: asyncio.AbstractEventLoop | None = None
 
-    def subscribe(self, user_id: int) -> asyncio.Queue:
-        """Register a new SSE client for the given user. Returns an asyncio.Queue.
+    @property
+    def backend(self) -> SSEBackend:
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
+
+    def subscribe(self, user_id: int) -> SSEClientQueue:
+        """Register a new SSE client for the given user. Returns its bounded queue.
         Must be called from an async context (captures the running event loop)."""
-        queue: asyncio.Queue = asyncio.Queue()
-        # Capture the running loop so publish() can use call_soon_threadsafe()
+        from django.conf import settings
+
+        maxsize = self._maxsize if self._maxsize is not None else getattr(settings, 'SSE_QUEUE_MAXSIZE', 100)
+        overflow = self._overflow or getattr(settings, 'SSE_QUEUE_OVERFLOW', OVERFLOW_COALESCE)
+        queue = SSEClientQueue(maxsize=maxsize, overflow=overflow)
+        # Capture the running loop so deliveries can use call_soon_threadsafe()
         self._loop = asyncio.get_running_loop()
         self._subscribers[user_id].add(queue)
+        if not self._started:
+            # Only processes that actually hold SSE clients need to receive events
+            self.backend.start(self._deliver)
+            self._started = True
         logger.debug("SSE subscribe: user=%s, connections=%d", user_id, len(self._subscribers[user_id]))
         return queue
 
-    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+    def unsubscribe(self, user_id: int, queue: SSEClientQueue):
         """Remove an SSE client."""
         self._subscribers[user_id].discard(queue)
         if not self._subscribers[user_id]:
@@ -44,7 +291,7 @@ class SSEBus:
 
     def publish(self, event_type: str, data: dict, target_users: list[int] | None = None):
         """
-        Send an event to connected clients.
+        Send an event to connected clients on every worker.
         Safe to call from synchronous Django views (threads).
 
         Args:
@@ -56,33 +303,133 @@ class SSEBus:
             "type": event_type,
             "timestamp": time.time(),
             **data,
+            "id": self._next_event_id(),
         }
+        targets = list(target_users) if target_users is not None else None
+        try:
+            self.backend.publish({"targets": targets, "event": envelope})
+        except Exception as e:
+            # Notifications are best-effort; never fail the request that triggered them
+            logger.error("SSE publish failed: type=%s, error=%s", event_type, e)
 
-        targets = target_users if target_users is not None else list(self._subscribers.keys())
+    def _next_event_id(self) -> int:
+        """
+        Event id (microsecond clock, bumped on ties within this process).
+        Ids come from the publishing process, so every worker buffers the
+        same id for the same event and a client may reconnect to any worker.
+        They identify events but do not order them: ids are taken before the
+        publishing transaction commits, on hosts whose clocks may differ, so
+        a lower id can be delivered after a higher one.
+        """
+        with self._id_lock:
+            self._last_event_id = max(self._last_event_id + 1, time.time_ns() // 1000)
+            return self._last_event_id
+
+    def _remember(self, envelope: dict, target_users: list[int] | None):
+        """Append an event to the replay buffers of its targets (or the broadcast buffer)."""
+        if self._replay_size is None:
+            from django.conf import settings
+            self._replay_size = getattr(settings, 'SSE_REPLAY_BUFFER_SIZE', 50)
+        if not self._replay_size or 'id' not in envelope:
+            return
+        keys = target_users if target_users is not None else [None]
+        with self._replay_lock:
+            self._arrivals += 1
+            for key in keys:
+                buffer = self._replay.get(key)
+                if buffer is None:
+                    buffer = self._replay[key] = deque(maxlen=self._replay_size)
+                if len(buffer) == buffer.maxlen:
+                    self._evicted[key] = buffer[0][0]
+                buffer.append((self._arrivals, envelope))
+
+    def replay(self, user_id: int, last_event_id: int) -> list[dict] | None:
+        """
+        Events for `user_id` delivered after the event `last_event_id`, in
+        delivery order. Every worker receives events in the same order
+        (publish order in memory, commit order through NOTIFY), so the gap is
+        located by the exact id rather than by comparing ids. Returns None
+        when the gap cannot be filled (that event is no longer or was never
+        buffered here, or later ones were evicted) and the client should
+        resync instead.
+        """
+        keys = (user_id, None)
+        with self._replay_lock:
+            since = next(
+                (
+                    arrival
+                    for key in keys
+                    for arrival, envelope in self._replay.get(key, ())
+                    if envelope['id'] == last_event_id
+                ),
+                None,
+            )
+            if since is None or any(self._evicted.get(key, 0) > since for key in keys):
+                return None
+            events = [
+                (arrival, envelope)
+                for key in keys
+                for arrival, envelope in self._replay.get(key, ())
+                if arrival > since
+            ]
+        return [envelope for _, envelope in sorted(events, key=lambda item: item[0])]
+
+    def _deliver(self, message: dict):
+        """Hand a backend message to this process's matching queues."""
+        envelope = SSEEvent(message["event"])
+        target_users = message.get("targets")
+        self._remember(envelope, target_users)
         loop = self._loop
-        sent = 0
+        if loop is not None and loop.is_running():
+            # One thread-safe handoff per event; the fan-out itself runs on the loop
+            try:
+                loop.call_soon_threadsafe(self._fan_out, envelope, target_users)
+            except RuntimeError:
+                pass  # loop was closed
+        else:
+            self._fan_out(envelope, target_users)
 
+    def _fan_out(self, envelope: SSEEvent, target_users: list[int] | None):
+        """Offer one event to every matching queue. Runs on the event loop thread."""
+        targets = target_users if target_users is not None else list(self._subscribers.keys())
+        sent = 0
         for uid in targets:
             # Snapshot the set to avoid mutation while iterating
-            for queue in list(self._subscribers.get(uid, set())):
-                if loop is not None and loop.is_running():
-                    # Thread-safe: schedule the put into the event loop
-                    try:
-                        loop.call_soon_threadsafe(queue.put_nowait, envelope)
-                        sent += 1
-                    except RuntimeError:
-                        pass  # loop was closed
-                else:
-                    try:
-                        queue.put_nowait(envelope)
-                        sent += 1
-                    except asyncio.QueueFull:
-                        logger.warning("SSE queue full for user=%s, dropping event", uid)
-
-        logger.debug("SSE publish: type=%s, targets=%s, delivered=%d", event_type, targets, sent)
-
-
-# Module-level singleton
+            for queue in list(self._subscribers.get(uid, ())):
+                self._offer(uid, queue, envelope)
+                sent += 1
+        logger.debug("SSE deliver: type=%s, targets=%s, delivered=%d", envelope.get("type"), targets, sent)
+
+    def _offer(self, user_id: int, queue: SSEClientQueue, envelope: dict):
+        """Enqueue on the loop thread and account for slow consumers."""
+        outcome, lost = queue.offer(envelope)
+        if outcome == 'coalesced':
+            self._overflow_counts[user_id]['coalesced'] += lost
+            logger.debug("SSE queue full for user=%s, coalesced request_id=%s", user_id, envelope.get('request_id'))
+        elif outcome == 'resync':
+            self._overflow_counts[user_id]['dropped'] += lost
+            logger.warning("SSE queue full for user=%s, dropped %d event(s) and sent resync", user_id, lost)
+
+    def stats(self) -> dict[int, dict]:
+        """
+        Per-user SSE health for this process: open connections, events
+        currently queued, and cumulative coalesced/dropped counts. Users who
+        have disconnected keep their counters so past lag stays visible.
+        """
+        users = set(self._subscribers) | set(self._overflow_counts)
+        stats = {}
+        for uid in users:
+            queues = list(self._subscribers.get(uid, ()))
+            counts = self._overflow_counts.get(uid, {'coalesced': 0, 'dropped': 0})
+            stats[uid] = {
+                'connections': len(queues),
+                'queued': sum(q.qsize() for q in queues),
+                **counts,
+            }
+        return stats
+
+
+# Module-level singleton; the backend is resolved from settings on first use
 sse_bus = SSEBus()
 
 
@@ -5,13 +5,16 @@ Requires ASGI deployment (uvicorn) — will not work under WSGI (gunicorn).
 """
 
 import asyncio
-import json
 import logging
+import time
 
 from asgiref.sync import sync_to_async
 from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from utils.sse import sse_bus
+from utils.sse import SSEEvent, sse_bus
 
 logger = logging.getLogger(__name__)
 
@@ -19,13 +22,22 @@ logger = logging.getLogger(__name__)
 HEARTBEAT_INTERVAL = 30
 
 
+def _parse_event_id(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
 async def sse_events_view(request):
     """
     SSE endpoint: GET /api/sse/events/
 
     Django's AuthenticationMiddleware already populates request.user via
     SessionMiddleware, so no manual session parsing is needed.
-    The browser's EventSource API auto-reconnects on disconnect.
+    The browser's EventSource API auto-reconnects on disconnect and sends
+    the last received `id:` as Last-Event-ID; events buffered since then are
+    replayed before live streaming resumes.
     """
     # Session/user lookup hits the ORM synchronously — must use sync_to_async
     # inside an async view to avoid SynchronousOnlyOperation errors.
@@ -38,12 +50,32 @@ async def sse_events_view(request):
     # call_soon_threadsafe() safely from sync view threads.
     queue = sse_bus.subscribe(user_id)
 
+    # EventSource resends the last `id:` it saw when it reconnects
+    last_event_id = _parse_event_id(request.headers.get("Last-Event-ID"))
+    if last_event_id is None:
+        replayed = []
+    else:
+        # Subscribed first, so nothing published from now on can fall between
+        # the buffer snapshot and the live queue; duplicates are skipped below
+        replayed = sse_bus.replay(user_id, last_event_id)
+        if replayed is None:
+            replayed = [SSEEvent(type="resync", timestamp=time.time())]
+        logger.debug("SSE reconnect: user=%s, last_event_id=%s, replaying=%d", user_id, last_event_id, len(replayed))
+
     async def event_stream():
+        # Ids do not follow delivery order, so skip exactly the replayed ones
+        # rather than everything below a high-water mark
+        already_sent = {event["id"] for event in replayed if "id" in event}
         try:
+            for event in replayed:
+                yield event.frame
             while True:
                 try:
                     event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
-                    yield f"data: {json.dumps(event)}\n\n"
+                    if event.get("id") in already_sent:
+                        already_sent.discard(event["id"])
+                        continue  # Already sent during replay
+                    yield event.frame
                 except asyncio.TimeoutError:
                     # Heartbeat comment — keeps the connection alive through proxies
                     yield ": heartbeat\n\n"
@@ -60,3 +92,26 @@ async def sse_events_view(request):
     response["Cache-Control"] = "no-cache"
     response["X-Accel-Buffering"] = "no"  # Disable nginx buffering
     return response
+
+
+class SSEStatsView(APIView):
+    """
+    GET /api/sse/stats/ — per-user SSE queue health for the worker that serves
+    the request (Admin only). Lagging clients show up with non-zero
+    `coalesced` (events merged by request_id) or `dropped` (events discarded
+    in favour of a resync) counts.
+    """
+
+    def get(self, request):
+        profile = getattr(request.user, 'profile', None)
+        if not request.user.is_superuser and not (profile and profile.position == 'Admin'):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+
+        users = [
+            {'user_id': uid, **counters}
+            for uid, counters in sorted(sse_bus.stats().items())
+        ]
+        return Response({
+            'total_connections': sum(u['connections'] for u in users),
+            'users': users,
+        })
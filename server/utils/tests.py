@@ -0,0 +1,465 @@
+import asyncio
+import json
+import multiprocessing
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .email_service import deliver_queued_emails, send_html_email
+from .middleware import SlidingSessionMiddleware
+from .models import OutboundEmail
+from .sse import InMemoryBackend, PostgresNotifyBackend, SSEBus, get_backend
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_OUTBOX_ENABLED=True,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+)
+class EmailOutboxTests(TestCase):
+    def _queue(self, to='agent@example.com'):
+        return send_html_email(
+            subject='Request #1 Approved',
+            template_name='emails/test.html',
+            context={},
+            recipient_list=[to],
+            cc_list=['approver@example.com'],
+        )
+
+    def test_helpers_queue_instead_of_sending(self):
+        self.assertTrue(self._queue())
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.status, OutboundEmail.Status.PENDING)
+        self.assertEqual(queued.to, ['agent@example.com'])
+        self.assertTrue(queued.html_body)
+
+    def test_worker_sends_batch_over_one_connection(self):
+        for i in range(3):
+            self._queue(to=f'agent{i}@example.com')
+        with mock.patch('utils.email_service.get_connection', wraps=mail.get_connection) as get_connection:
+            counts = deliver_queued_emails(batch_size=10)
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(counts, {'sent': 3, 'retried': 0, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].cc, ['approver@example.com'])
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.Status.SENT).exists())
+
+    def test_failures_back_off_then_give_up(self):
+        self._queue()
+        with mock.patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('smtp down')):
+            self.assertEqual(deliver_queued_emails()['retried'], 1)
+            queued = OutboundEmail.objects.get()
+            self.assertGreater(queued.next_attempt_at, timezone.now())
+            self.assertIn('smtp down', queued.last_error)
+
+            # Not due yet: nothing is picked up
+            self.assertEqual(deliver_queued_emails(), {'sent': 0, 'retried': 0, 'failed': 0})
+
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_queued_emails()['failed'], 1)
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.Status.FAILED)
+
+    def test_smtp_connect_failure_backs_off_the_batch(self):
+        self._queue()
+        self._queue(to='other@example.com')
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=OSError('auth failed')):
+            self.assertEqual(deliver_queued_emails(), {'sent': 0, 'retried': 2, 'failed': 0})
+            for queued in OutboundEmail.objects.all():
+                self.assertEqual(queued.attempts, 1)
+                self.assertGreater(queued.next_attempt_at, timezone.now())
+                self.assertIn('auth failed', queued.last_error)
+
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_queued_emails()['failed'], 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_management_command_drains_outbox(self):
+        self._queue()
+        call_command('send_queued_emails', '--once', stdout=mock.MagicMock())
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_OUTBOX_ENABLED=False)
+    def test_outbox_can_be_disabled(self):
+        self.assertTrue(self._queue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', EMAIL_OUTBOX_ENABLED=True)
+class EmailOutboxTransactionTests(TransactionTestCase):
+    def test_rolled_back_transaction_discards_queued_email(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                send_html_email('Subject', 'emails/test.html', {}, ['agent@example.com'])
+                raise RuntimeError('rollback')
+        self.assertFalse(OutboundEmail.objects.exists())
+
+
+def _sse_worker(conn_params, channel, user_id, ready, results):
+    """Child process: one event loop with its own bus, like a separate uvicorn worker."""
+    backend = PostgresNotifyBackend(conn_params=conn_params, channel=channel)
+    bus = SSEBus(backend=backend)
+
+    async def main():
+        queue = bus.subscribe(user_id)
+        await asyncio.get_running_loop().run_in_executor(None, backend.wait_until_listening, 10)
+        ready.set()
+        event = await asyncio.wait_for(queue.get(), timeout=10)
+        results.put(event)
+
+    try:
+        asyncio.run(main())
+    finally:
+        backend.close()
+
+
+class SSEBusTests(TestCase):
+    def test_in_memory_routing_from_sync_thread(self):
+        bus = SSEBus(backend=InMemoryBackend())
+
+        async def main():
+            agent_queue = bus.subscribe(1)
+            admin_queue = bus.subscribe(2)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, bus.publish, 'request_approved', {'request_id': 5}, [1])
+            await loop.run_in_executor(None, bus.publish, 'request_created', {'request_id': 6}, None)
+            first = await asyncio.wait_for(agent_queue.get(), 1)
+            second = await asyncio.wait_for(agent_queue.get(), 1)
+            only = await asyncio.wait_for(admin_queue.get(), 1)
+            return first, second, only, admin_queue.empty()
+
+        first, second, only, drained = asyncio.run(main())
+        self.assertEqual((first['type'], first['request_id']), ('request_approved', 5))
+        self.assertEqual(second['type'], 'request_created')
+        self.assertEqual(only['request_id'], 6)
+        self.assertTrue(drained)
+
+    def test_publish_hands_off_once_per_event(self):
+        bus = SSEBus(backend=InMemoryBackend())
+
+        async def main():
+            queues = [bus.subscribe(uid) for uid in (1, 1, 2, 3)]
+            loop = asyncio.get_running_loop()
+            with mock.patch.object(loop, 'call_soon_threadsafe', wraps=loop.call_soon_threadsafe) as handoff:
+                await loop.run_in_executor(None, bus.publish, 'request_created', {'request_id': 7}, None)
+                await loop.run_in_executor(None, bus.publish, 'request_approved', {'request_id': 7}, [1, 2])
+                await asyncio.sleep(0)
+            # run_in_executor also completes its future via call_soon_threadsafe
+            fan_outs = [c for c in handoff.call_args_list if c.args[0] == bus._fan_out]
+            return len(fan_outs), [[q.get_nowait() for _ in range(q.qsize())] for q in queues]
+
+        handoffs, received = asyncio.run(main())
+        self.assertEqual(handoffs, 2)
+        self.assertEqual([len(events) for events in received], [2, 2, 2, 1])
+        # Every connection shares one envelope, so the frame is rendered once
+        shared = received[0][1]
+        self.assertIs(shared, received[2][1])
+        self.assertIs(shared.frame, received[1][1].frame)
+        self.assertTrue(shared.frame.startswith(f"id: {shared['id']}\ndata: "))
+
+    def test_full_queue_coalesces_by_request_id(self):
+        bus = SSEBus(backend=InMemoryBackend(), maxsize=2, overflow='coalesce')
+
+        async def main():
+            queue = bus.subscribe(1)
+            for request_id, status_ in ((10, 'PENDING'), (11, 'PENDING'), (10, 'APPROVED'), (12, 'PENDING')):
+                bus.publish('request_approved', {'request_id': request_id, 'status': status_}, [1])
+            await asyncio.sleep(0)
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        events = asyncio.run(main())
+        # request 10 was coalesced to its latest state; request 12 had nothing to merge with
+        self.assertEqual([e['type'] for e in events], ['resync'])
+        self.assertEqual(bus.stats()[1], {'connections': 1, 'queued': 0, 'coalesced': 1, 'dropped': 3})
+
+    def test_coalesced_event_keeps_latest_state(self):
+        bus = SSEBus(backend=InMemoryBackend(), maxsize=2, overflow='coalesce')
+
+        async def main():
+            queue = bus.subscribe(1)
+            bus.publish('request_created', {'request_id': 10}, [1])
+            bus.publish('request_created', {'request_id': 11}, [1])
+            bus.publish('request_approved', {'request_id': 10}, [1])
+            await asyncio.sleep(0)
+            return [queue.get_nowait() for _ in range(queue.qsize())], bus.stats()[1]
+
+        events, stats = asyncio.run(main())
+        self.assertEqual([(e['type'], e['request_id']) for e in events],
+                         [('request_approved', 10), ('request_created', 11)])
+        self.assertEqual((stats['connections'], stats['coalesced'], stats['dropped']), (1, 1, 0))
+
+    def test_resync_policy(self):
+        bus = SSEBus(backend=InMemoryBackend(), maxsize=3, overflow='resync')
+
+        async def main():
+            queue = bus.subscribe(1)
+            for request_id in range(5):
+                bus.publish('request_created', {'request_id': request_id}, [1])
+            await asyncio.sleep(0)
+            return [queue.get_nowait()['type'] for _ in range(queue.qsize())]
+
+        self.assertEqual(asyncio.run(main()), ['resync', 'request_created'])
+        self.assertEqual(bus.stats()[1]['dropped'], 4)
+
+    def test_stats_endpoint_is_admin_only(self):
+        from django.contrib.auth.models import User
+        from users.models import UserProfile
+
+        agent = User.objects.create_user(username='agent', password='pass1234!')
+        UserProfile.objects.create(user=agent, position='Sales Agent', full_name='Agent', email='a@example.com')
+        admin = User.objects.create_user(username='admin', password='pass1234!')
+        UserProfile.objects.create(user=admin, position='Admin', full_name='Admin', email='b@example.com')
+        client = Client()
+        client.force_login(agent)
+        self.assertEqual(client.get('/api/sse/stats/').status_code, 403)
+        client.force_login(admin)
+        response = client.get('/api/sse/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('users', response.json())
+
+    def test_replay_from_last_event_id(self):
+        bus = SSEBus(backend=InMemoryBackend())
+
+        async def main():
+            bus.subscribe(99)  # Start buffering, as the first connection in a worker would
+            bus.publish('request_created', {'request_id': 1}, [1])
+            bus.publish('request_created', {'request_id': 2}, [2])
+            bus.publish('request_approved', {'request_id': 1}, None)
+            bus.publish('request_approved', {'request_id': 3}, [1])
+            await asyncio.sleep(0)
+
+        asyncio.run(main())
+        first = bus._replay[1][0][1]
+        events = bus.replay(1, first['id'])
+        self.assertEqual([(e['type'], e['request_id']) for e in events],
+                         [('request_approved', 1), ('request_approved', 3)])
+        self.assertEqual(bus.replay(1, events[-1]['id']), [])
+
+    def test_replay_follows_delivery_order_not_ids(self):
+        # A lower id committed (and delivered) after a higher one must not be lost
+        bus = SSEBus(backend=InMemoryBackend())
+
+        async def main():
+            bus.subscribe(1)
+            for event_id, request_id in ((300, 1), (100, 2), (200, 3)):
+                bus._deliver({'targets': [1], 'event': {'type': 'request_created', 'request_id': request_id, 'id': event_id}})
+
+        asyncio.run(main())
+        self.assertEqual([e['request_id'] for e in bus.replay(1, 300)], [2, 3])
+        self.assertEqual([e['request_id'] for e in bus.replay(1, 100)], [3])
+
+    def test_view_replays_missed_events_with_ids(self):
+        from django.contrib.auth.models import User
+        from django.test import AsyncRequestFactory
+        from . import sse_views
+
+        user = User.objects.create_user(username='agent', password='pass1234!')
+        bus = SSEBus(backend=InMemoryBackend())
+
+        async def main():
+            live = bus.subscribe(user.pk)
+            bus.publish('request_created', {'request_id': 1}, [user.pk])
+            bus.publish('request_approved', {'request_id': 1}, [user.pk])
+            await asyncio.sleep(0)
+            seen = live.get_nowait()
+
+            request = AsyncRequestFactory().get('/api/sse/events/', headers={'Last-Event-ID': str(seen['id'])})
+            request.user = user
+            with mock.patch.object(sse_views, 'sse_bus', bus):
+                response = await sse_views.sse_events_view(request)
+                stream = response.streaming_content
+                chunk = await anext(stream)
+                # A live event with a lower id than the replayed one still goes out
+                bus._deliver({'targets': [user.pk], 'event': {'type': 'request_rejected', 'id': seen['id'] - 1}})
+                late = await anext(stream)
+                await stream.aclose()
+            return chunk, late
+
+        chunk, late = asyncio.run(main())
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        late = late.decode() if isinstance(late, bytes) else late
+        self.assertTrue(chunk.startswith('id: '))
+        self.assertIn('"type": "request_approved"', chunk)
+        self.assertIn('"type": "request_rejected"', late)
+
+    @override_settings(SSE_REPLAY_BUFFER_SIZE=2)
+    def test_replay_gap_too_old_requires_resync(self):
+        bus = SSEBus(backend=InMemoryBackend())
+
+        async def main():
+            queue = bus.subscribe(1)
+            for request_id in range(4):
+                bus.publish('request_created', {'request_id': request_id}, [1])
+            await asyncio.sleep(0)
+            return [queue.get_nowait()['id'] for _ in range(queue.qsize())]
+
+        ids = asyncio.run(main())
+        # Ids never buffered here, or already evicted, cannot be replayed
+        self.assertIsNone(bus.replay(1, 0))
+        self.assertIsNone(bus.replay(1, ids[1]))
+        kept = bus.replay(1, ids[2])
+        self.assertEqual([e['request_id'] for e in kept], [3])
+
+    def test_unknown_backend_setting(self):
+        with override_settings(SSE_BACKEND='carrier-pigeon'):
+            with self.assertRaises(ValueError):
+                get_backend()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'LISTEN/NOTIFY requires PostgreSQL')
+class PostgresSSEFanOutTests(TransactionTestCase):
+    def test_publish_reaches_subscribers_in_other_processes(self):
+        ctx = multiprocessing.get_context('fork')
+        conn_params = connection.get_connection_params()
+        channel = 'sse_events_test'
+        results = ctx.Queue()
+        workers = []
+        for _ in range(2):
+            ready = ctx.Event()
+            proc = ctx.Process(target=_sse_worker, args=(conn_params, channel, 7, ready, results))
+            workers.append((proc, ready))
+        # The forked children must not share the parent's open socket
+        connection.close()
+        for proc, _ in workers:
+            proc.start()
+        try:
+            for _, ready in workers:
+                self.assertTrue(ready.wait(15))
+            SSEBus(backend=PostgresNotifyBackend(channel=channel)).publish(
+                'items_processed', {'request_id': 42}, target_users=[7],
+            )
+            events = [results.get(timeout=10) for _ in workers]
+        finally:
+            for proc, _ in workers:
+                proc.join(15)
+                if proc.is_alive():
+                    proc.terminate()
+        self.assertEqual([e['request_id'] for e in events], [42, 42])
+        self.assertEqual({e['type'] for e in events}, {'items_processed'})
+
+
+@override_settings(SESSION_COOKIE_AGE=28800, SESSION_REFRESH_THRESHOLD=28800 - 300)
+class SlidingSessionTests(TestCase):
+    def setUp(self):
+        from users.models import UserProfile
+
+        user = User.objects.create_user(username='agent', password='pass1234!')
+        UserProfile.objects.create(user=user, position='Sales Agent', email='agent@example.com')
+        self.client = Client()
+        self.client.force_login(user)
+
+    def _session_writes(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/users/me/')
+        writes = [
+            q for q in ctx.captured_queries
+            if 'django_session' in q['sql'] and q['sql'].lstrip().upper().startswith(('UPDATE', 'INSERT'))
+        ]
+        return len(writes), response
+
+    def test_unstamped_session_is_stamped_once(self):
+        # Sessions from before the middleware (and force_login) have no stamp
+        writes, response = self._session_writes()
+        self.assertEqual(writes, 1)
+        self.assertIn('sessionid', response.cookies)
+        self.assertIn(SlidingSessionMiddleware.REFRESHED_AT_KEY, self.client.session)
+
+        writes, response = self._session_writes()
+        self.assertEqual(writes, 0)
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_login_stamps_the_session(self):
+        client = Client()
+        with mock.patch('utils.middleware.time.time', return_value=1_800_000_000):
+            response = client.post('/api/login/', {'username': 'agent', 'password': 'pass1234!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.session[SlidingSessionMiddleware.REFRESHED_AT_KEY], 1_800_000_000)
+
+    def test_session_is_saved_only_near_the_threshold(self):
+        start = 1_800_000_000
+        session = self.client.session
+        session[SlidingSessionMiddleware.REFRESHED_AT_KEY] = start
+        session.save()
+
+        with mock.patch('utils.middleware.time.time', return_value=start + 299):
+            writes, response = self._session_writes()
+        self.assertEqual(writes, 0)
+        self.assertNotIn('sessionid', response.cookies)
+
+        with mock.patch('utils.middleware.time.time', return_value=start + 301):
+            writes, _ = self._session_writes()
+        self.assertEqual(writes, 1)
+        self.assertEqual(
+            self.client.session[SlidingSessionMiddleware.REFRESHED_AT_KEY], start + 301,
+        )
+
+    def test_anonymous_requests_do_not_create_sessions(self):
+        self.client.logout()
+        writes, _ = self._session_writes()
+        self.assertEqual(writes, 0)
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        from users.models import UserProfile
+
+        user = User.objects.create_user(username='agent', password='pass1234!')
+        UserProfile.objects.create(user=user, position='Sales Agent', email='agent@example.com')
+        self.client = Client()
+        self.client.force_login(user)
+
+    @override_settings(REQUEST_TIMING_HEADER=True, SLOW_REQUEST_MS=10_000, SLOW_REQUEST_QUERIES=1000)
+    def test_server_timing_header_without_slow_log(self):
+        with self.assertNoLogs('request_timing'):
+            response = self.client.get('/api/users/me/')
+        timing = response['Server-Timing']
+        for name in ('db;dur=', 'render;dur=', 'app;dur=', 'total;dur='):
+            self.assertIn(name, timing)
+        self.assertRegex(timing, r'desc="[1-9]\d* queries"')
+
+    @override_settings(REQUEST_TIMING_HEADER=False, SLOW_REQUEST_MS=10_000, SLOW_REQUEST_QUERIES=0)
+    def test_slow_request_is_logged_as_json(self):
+        with self.assertLogs('request_timing', level='WARNING') as logs:
+            response = self.client.get('/api/users/me/')
+        self.assertNotIn('Server-Timing', response)
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['event'], 'slow_request')
+        self.assertEqual(entry['path'], '/api/users/me/')
+        self.assertEqual(entry['status'], 200)
+        self.assertGreater(entry['queries'], 0)
+        self.assertIsNotNone(entry['user_id'])
+        self.assertLessEqual({'db_ms', 'render_ms', 'app_ms', 'total_ms'}, set(entry))
+
+
+class BenchmarkApiCommandTests(TestCase):
+    def test_small_dataset_stays_within_query_budgets(self):
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.json')
+            call_command(
+                'benchmark_api', requests=120, products=20, agents=8, teams=2, iterations=2,
+                output=path, label='test', stdout=StringIO(),
+            )
+            with open(path) as fh:
+                report = json.load(fh)
+
+        self.assertEqual(report['label'], 'test')
+        self.assertEqual(report['dataset']['requests'], 120)
+        endpoints = report['endpoints']
+        self.assertIn('mark_items_processed', endpoints)
+        for name, result in endpoints.items():
+            self.assertTrue(result['ok'], name)
+            self.assertLessEqual(result['queries'], result['query_budget'], name)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'], name)
+        # Seed data is rolled back
+        self.assertFalse(User.objects.filter(username__startswith='bench').exists())
@@ -1,10 +1,8 @@
 # server/views.py
 from django.contrib.auth import authenticate, login, logout as auth_logout
-from django.contrib.sessions.models import Session
 from utils.validators import validate_password_strength
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.utils.decorators import method_decorator
-from django.utils import timezone
 from django.middleware.csrf import get_token
 from rest_framework import serializers
 from rest_framework.views import APIView
@@ -29,38 +27,16 @@ class LoginView(APIView):
             status=status.HTTP_200_OK
         )
 
-    def _get_client_ip(self, request):
-        x_forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded:
-            ip = x_forwarded.split(',')[0].strip()
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        
-        # Strip port number if present (e.g., "192.168.1.1:8080" -> "192.168.1.1")
-        if ip and ':' in ip:
-            # Handle IPv6 addresses (contain multiple colons)
-            # For IPv4:port, split and take first part
-            if ip.count(':') == 1:  # IPv4 with port
-                ip = ip.split(':')[0]
-        
-        return ip
-
     def _kill_other_sessions(self, user, current_session_key=None):
         """Delete every other Django session that belongs to *user*.
 
-        Django stores session data as a pickled dict. We decode each
-        active session and check whether its ``_auth_user_id`` matches.
+        Sessions are found through the indexed ``UserSession`` mapping
+        (written on login) rather than by decoding every active session.
         ``current_session_key`` is excluded so that any in-flight requests
         still using that session are not interrupted mid-response.
         """
-        from django.contrib.sessions.models import Session as SessionModel
-        user_id_str = str(user.pk)
-        for session in SessionModel.objects.filter(expire_date__gte=timezone.now()):
-            if session.session_key == current_session_key:
-                continue  # never delete the session that owns this login request
-            data = session.get_decoded()
-            if data.get('_auth_user_id') == user_id_str:
-                session.delete()
+        from users.models import UserSession
+        UserSession.end_other_sessions(user, keep_session_key=current_session_key)
 
     # Handle login POST requests
     def post(self, request):
@@ -68,12 +44,11 @@ class LoginView(APIView):
         if serializer.is_valid():
             username = serializer.validated_data['username']
             password = serializer.validated_data['password']
-            client_ip = self._get_client_ip(request)
 
             # --- rate-limit / lockout check ----------------------------------
             from users.models import LoginAttempt
-            if LoginAttempt.is_locked_out(username):
-                remaining = LoginAttempt.lockout_seconds_remaining(username)
+            _, remaining = LoginAttempt.lockout_state(username)
+            if remaining:
                 return Response({
                     "error": "Account temporarily locked",
                     "detail": f"Too many failed login attempts. Try again in {remaining // 60} min {remaining % 60} sec.",
@@ -132,7 +107,7 @@ class LoginView(APIView):
                 LoginAttempt.clear_failures(username)
 
                 # Kill sessions that belong to this user BEFORE login() so
-                # that zombie sessions (resurrected by SESSION_SAVE_EVERY_REQUEST
+                # that zombie sessions (resurrected by a sliding-session save
                 # on an in-flight request) are cleaned up even if their key
                 # differs from the about-to-be-cycled key.
                 pre_login_key = request.session.session_key
@@ -172,12 +147,11 @@ class LoginView(APIView):
                 return response
 
             # --- bad credentials: record failure -----------------------------
-            LoginAttempt.record_failure(username, ip_address=client_ip)
-            failures = LoginAttempt.recent_failures(username)
+            LoginAttempt.record_failure(username)
+            failures, remaining_secs = LoginAttempt.lockout_state(username)
             remaining_attempts = max(LoginAttempt.LOCKOUT_THRESHOLD - failures, 0)
 
-            if remaining_attempts == 0:
-                remaining_secs = LoginAttempt.lockout_seconds_remaining(username)
+            if remaining_secs:
                 return Response({
                     "error": "Account temporarily locked",
                     "detail": f"Too many failed login attempts. Try again in {remaining_secs // 60} min {remaining_secs % 60} sec.",